@@ -0,0 +1,122 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rooms.stats import get_room_stats
+
+from .svg import bar_chart_svg
+
+
+# =========================================================
+# DASHBOARD CHARTS (rendered once, served from cache)
+# =========================================================
+#
+# Charts only change when the room counts change. The dashboard links to
+# each chart as a normal image URL containing a fingerprint of the data it
+# shows (/dashboard/charts/<kind>/<fingerprint>.svg). The image is rendered
+# the first time that URL is requested and then served from the cache.
+#
+# Only the rendered images are cached. The counts are read again from the
+# room stats (one small RoomStat query) whenever a fingerprint has to be
+# checked, so every worker process agrees on them, whatever changed the
+# rooms (a single save, an import, rebuild_room_stats).
+
+# Bump when the chart look changes so old cached images are not reused
+RENDER_VERSION = 2
+
+# Chart settings per chart kind
+CHARTS = {
+    'type': {
+        'title': 'Rooms by Type',
+        'colors': ['#4CAF50', '#2196F3', '#FF9800'],
+    },
+    'location': {
+        'title': 'Rooms by Location',
+        'colors': ['#F44336', '#3F51B5', '#FFC107'],
+    },
+}
+
+
+def chart_cache():
+    """
+    Cache backend that stores the charts (CACHES alias from settings)
+    """
+    return caches[getattr(settings, 'DASHBOARD_CHART_CACHE', 'default')]
+
+
+# ---------------------------------------------
+# Chart data
+# ---------------------------------------------
+
+def compute_chart_counts(stats=None):
+    """
+    Room counts for every chart: {kind: (labels, counts)}
+
+    `stats` is the result of rooms.stats.get_room_stats(); it is fetched
+    when not given.
+    """
+    stats = stats or get_room_stats()
+    by_type = stats['rooms_by_type']
+    by_location = stats['rooms_by_location']
+
+    return {
+        'type': (list(by_type), list(by_type.values())),
+        'location': (list(by_location), list(by_location.values())),
+    }
+
+
+def fingerprint(kind, labels, counts):
+    """
+    Short hash identifying one chart's data; used in the URL and as ETag
+    """
+    data = json.dumps([RENDER_VERSION, kind, list(labels), list(counts)])
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+# ---------------------------------------------
+# Rendering
+# ---------------------------------------------
+
+def image_cache_key(kind, chart_fingerprint):
+    return f'dashboard:chart:{kind}:{chart_fingerprint}'
+
+
+def render_chart(kind, labels, counts):
+    """
+    SVG text for one chart kind
+    """
+    options = CHARTS[kind]
+    return bar_chart_svg(options['title'], labels, counts, options['colors'])
+
+
+def render_and_store(kind, chart_fingerprint, labels, counts):
+    """
+    Render one chart, keep it in the cache and return the SVG text
+    """
+    svg = render_chart(kind, labels, counts)
+    chart_cache().set(
+        image_cache_key(kind, chart_fingerprint),
+        svg,
+        getattr(settings, 'DASHBOARD_CHART_TIMEOUT', 60 * 60 * 24),
+    )
+    return svg
+
+
+def get_chart_image(kind, chart_fingerprint):
+    """
+    SVG text for a chart, or None if the fingerprint is not current.
+
+    If the image was evicted from the cache but still matches the current
+    data, it is rendered again.
+    """
+    svg = chart_cache().get(image_cache_key(kind, chart_fingerprint))
+    if svg is not None:
+        return svg
+
+    labels, counts = compute_chart_counts()[kind]
+    if fingerprint(kind, labels, counts) != chart_fingerprint:
+        return None
+
+    return render_and_store(kind, chart_fingerprint, labels, counts)
@@ -0,0 +1,108 @@
+import math
+
+from django.utils.html import escape
+
+
+# =========================================================
+# SIMPLE SVG BAR CHARTS
+# =========================================================
+#
+# Draws the same bar charts the dashboard used to get from matplotlib
+# (title, "Count" axis, dashed grid lines, "count (percent%)" above each
+# bar) as plain SVG text. No plotting library is needed, so nothing heavy
+# is imported into the web workers.
+
+WIDTH = 600
+HEIGHT = 400
+
+# Space around the plot area for titles and labels
+MARGIN_LEFT = 60
+MARGIN_RIGHT = 20
+MARGIN_TOP = 50
+MARGIN_BOTTOM = 50
+
+FONT = 'font-family="Inter, Helvetica, Arial, sans-serif"'
+
+
+def nice_step(max_value, max_ticks=6):
+    """
+    Grid step of 1, 2 or 5 times a power of ten, giving at most `max_ticks` lines
+    """
+    if max_value <= max_ticks:
+        return 1
+    power = 10 ** math.floor(math.log10(max_value / max_ticks))
+    for multiple in (1, 2, 5, 10):
+        step = multiple * power
+        if max_value / step <= max_ticks:
+            return step
+    return 10 * power
+
+
+def bar_chart_svg(title, labels, counts, colors):
+    """
+    Return an SVG document (str) with one bar per label
+    """
+    plot_width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    plot_bottom = MARGIN_TOP + plot_height
+
+    total = sum(counts)
+    step = nice_step(max(counts, default=0))
+    # Leave headroom above the highest bar for its label
+    top_value = max(step, (max(counts, default=0) // step + 1) * step)
+
+    def y_for(value):
+        return plot_bottom - value / top_value * plot_height
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+        f'width="{WIDTH}" height="{HEIGHT}" role="img" aria-label="{escape(title)}">',
+        f'<rect width="{WIDTH}" height="{HEIGHT}" fill="#ffffff"/>',
+        f'<text x="{WIDTH / 2}" y="{MARGIN_TOP / 2 + 6}" text-anchor="middle" '
+        f'font-size="16" {FONT}>{escape(title)}</text>',
+        f'<text transform="translate(16 {MARGIN_TOP + plot_height / 2}) rotate(-90)" '
+        f'text-anchor="middle" font-size="12" {FONT}>Count</text>',
+    ]
+
+    # Horizontal grid lines with their values
+    for value in range(0, top_value + 1, step):
+        y = y_for(value)
+        parts.append(
+            f'<line x1="{MARGIN_LEFT}" y1="{y:.1f}" x2="{MARGIN_LEFT + plot_width}" y2="{y:.1f}" '
+            f'stroke="#b0b0b0" stroke-dasharray="4 3" stroke-opacity="0.7"/>'
+        )
+        parts.append(
+            f'<text x="{MARGIN_LEFT - 8}" y="{y + 4:.1f}" text-anchor="end" '
+            f'font-size="11" {FONT}>{value}</text>'
+        )
+
+    # Bars, value labels and category labels
+    slot = plot_width / max(len(labels), 1)
+    bar_width = slot * 0.8
+    for index, (label, count) in enumerate(zip(labels, counts)):
+        x = MARGIN_LEFT + index * slot + (slot - bar_width) / 2
+        y = y_for(count)
+        color = colors[index % len(colors)] if colors else '#4f46e5'
+        percent = (count / total * 100) if total > 0 else 0
+        center = x + bar_width / 2
+
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_width:.1f}" '
+            f'height="{plot_bottom - y:.1f}" fill="{escape(color)}"/>'
+        )
+        parts.append(
+            f'<text x="{center:.1f}" y="{y - 6:.1f}" text-anchor="middle" '
+            f'font-size="12" {FONT}>{count} ({percent:.1f}%)</text>'
+        )
+        parts.append(
+            f'<text x="{center:.1f}" y="{plot_bottom + 20}" text-anchor="middle" '
+            f'font-size="12" {FONT}>{escape(label)}</text>'
+        )
+
+    # X axis line
+    parts.append(
+        f'<line x1="{MARGIN_LEFT}" y1="{plot_bottom}" x2="{MARGIN_LEFT + plot_width}" '
+        f'y2="{plot_bottom}" stroke="#333333"/>'
+    )
+    parts.append('</svg>')
+    return '\n'.join(parts)
@@ -1,3 +1,127 @@
+import csv
+import datetime
+import io
+import pathlib
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from monitoring.testing import QueryBudgetMixin
+from rooms.importing import IMPORT_FIELDS
+from rooms.models import Booking, Room
+
+from . import charts
+
+
+def make_room(owner, **kwargs):
+    fields = {
+        'owner': owner,
+        'title': 'Test Room',
+        'description': 'A test room',
+        'price': 5000,
+        'location': 'Kathmandu',
+        'room_type': 'Single',
+        'owner_name': 'Owner',
+        'contact_number': '9800000000',
+        'available_from': datetime.date(2026, 1, 1),
+    }
+    fields.update(kwargs)
+    return Room.objects.create(**fields)
+
+
+def model_fields(room):
+    return {
+        field.attname: getattr(room, field.attname)
+        for field in Room._meta.concrete_fields if not field.primary_key
+    }
+
+
+class DashboardChartTests(TestCase):
+
+    def setUp(self):
+        charts.chart_cache().clear()
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_room(self.admin)
+
+    def chart_url(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response.context['type_chart_url']
+
+    def test_chart_is_rendered_once_and_served_with_etag(self):
+        url = self.chart_url()
+
+        with mock.patch.object(charts, 'render_chart', wraps=charts.render_chart) as render:
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'1 (100.0%)', first.content)
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(first['ETag'])
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_room_change_gives_new_chart_url(self):
+        old_url = self.chart_url()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_room(self.admin, room_type='Double')
+
+        new_url = self.chart_url()
+        self.assertNotEqual(old_url, new_url)
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(new_url).status_code, 200)
+
+    def test_bulk_changes_give_a_working_chart_url(self):
+        self.assertEqual(self.client.get(self.chart_url()).status_code, 200)
+
+        # No signals: only the stats are rebuilt, as after an import
+        Room.objects.bulk_create([Room(**{**model_fields(Room.objects.get()), 'room_type': 'Double'})])
+        call_command('rebuild_room_stats', stdout=io.StringIO())
+
+        response = self.client.get(self.chart_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'1 (50.0%)', response.content)
+
+    def test_import_gives_a_working_chart_url(self):
+        self.assertEqual(self.client.get(self.chart_url()).status_code, 200)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = pathlib.Path(folder) / 'rooms.csv'
+            fields = {**model_fields(Room.objects.get()), 'room_type': 'Double'}
+            with path.open('w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=IMPORT_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerow(fields)
+            call_command('import_rooms', str(path), owner='admin', stdout=io.StringIO())
+
+        response = self.client.get(self.chart_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'1 (50.0%)', response.content)
+
+
+class BookingListQueryTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        for i in range(5):
+            customer = User.objects.create_user(f'customer{i}', password='pass12345')
+            Booking.objects.create(room=make_room(self.owner, title=f'Room {i}'), user=customer)
+
+    def test_owner_and_staff_stay_within_budget(self):
+        self.client.force_login(self.owner)
+        response = self.assertQueryBudget(reverse('booking_list'))
+        self.assertContains(response, 'customer4')
 
-# Create your tests here.
+        admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(admin)
+        self.assertQueryBudget(reverse('booking_list'))
@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),  # main landing page
     path('bookings/', views.booking_list, name='booking_list'),
+    path('charts/<str:kind>/<str:fingerprint>.svg', views.chart_image, name='dashboard_chart'),
 ]
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+# Read-mostly view of the queue for checking failed jobs
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('key',)
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
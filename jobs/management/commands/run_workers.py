@@ -0,0 +1,90 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection, connections
+
+from jobs.queue import requeue_stale_jobs, run_pending
+
+logger = logging.getLogger(__name__)
+
+
+def work(stop, poll_interval, once):
+    """
+    Run jobs until `stop` is set (or the queue is empty, with once=True)
+    """
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                requeue_stale_jobs()
+                ran = run_pending(limit=100)
+            except DatabaseError:
+                # e.g. a lost connection or "database is locked": try again later
+                logger.exception("Job worker could not reach the database")
+                connection.close()
+                stop.wait(poll_interval)
+                continue
+
+            if not ran and once:
+                return
+            if not ran:
+                stop.wait(poll_interval)
+    finally:
+        connection.close()
+
+
+def work_in_process(stop, poll_interval, once):
+    # Ctrl+C goes to the whole process group; let the parent stop us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers. Each worker claims due jobs from the "
+        "Job table, runs them and sleeps when the queue is empty."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of workers')
+        parser.add_argument(
+            '--mode', choices=['thread', 'process'], default='thread',
+            help='Run the workers as threads (I/O bound jobs) or processes (CPU bound jobs)',
+        )
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Stop when no job is due')
+
+    def handle(self, *args, **options):
+        workers, mode = options['workers'], options['mode']
+        args = (options['poll_interval'], options['once'])
+
+        if mode == 'process':
+            # Children must not share the parent's database connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            pool = [context.Process(target=work_in_process, args=(stop,) + args) for _ in range(workers)]
+        else:
+            stop = threading.Event()
+            pool = [threading.Thread(target=work, args=(stop,) + args) for _ in range(workers)]
+
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        self.stdout.write(f"Starting {workers} {mode} worker(s).")
+        for worker in pool:
+            worker.start()
+
+        try:
+            while any(worker.is_alive() for worker in pool):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping workers after their current job...")
+            stop.set()
+
+        for worker in pool:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
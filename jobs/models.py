@@ -0,0 +1,58 @@
+from django.db import models
+from django.utils import timezone
+
+
+# A Job is one piece of background work (e.g. "upload the images of
+# room 12"). Workers (manage.py run_workers) pick up queued jobs whose
+# run_after time has passed and run the handler registered for `kind`.
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Name of the handler that runs the job (see jobs/queue.py)
+    kind = models.CharField(max_length=100)
+
+    # Arguments for the handler (must be JSON serialisable)
+    payload = models.JSONField(default=dict, blank=True)
+
+    # Optional idempotency key: enqueueing the same key twice gives the same job
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+
+    # Attempts made so far and how many are allowed before giving up
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+
+    # Not picked up before this time (used for retries with backoff)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    # Which worker is running the job and since when
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    # Traceback of the last failed attempt
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers look for the oldest due job in the queue
+            models.Index(fields=['status', 'run_after', 'id'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,298 @@
+import datetime
+import logging
+import os
+import socket
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# DATABASE BACKED JOB QUEUE
+# =========================================================
+#
+#   enqueue('rooms.add_images', {'room_id': 12, ...}, key='...')
+#
+# Jobs are rows in the Job table, so a job enqueued inside a transaction
+# only becomes visible to the workers when that transaction commits (and
+# disappears if it rolls back).
+#
+# Workers claim one due job at a time. On Postgres the candidate row is
+# read with SELECT ... FOR UPDATE SKIP LOCKED so workers do not queue up
+# behind each other; the claim itself is a conditional UPDATE, which also
+# keeps SQLite (no row locks) from running a job twice.
+#
+# A handler and the "done" update commit together. Handlers that wait on
+# other services (uploads, ...) are registered with atomic=False: they
+# open their own transaction for the database part and must cope with
+# running again if the worker dies between that commit and "done".
+#
+# A failed attempt is retried after an exponentially growing delay until
+# max_attempts; then the kind's failure handler (if any) cleans up.
+#
+# While a job runs, its worker refreshes locked_at every
+# JOBS_HEARTBEAT_SECONDS. A job silent for JOBS_STALE_SECONDS lost its
+# worker and is put back in the queue. Every outcome is only recorded
+# while the job is still locked by the worker that ran it, so a worker
+# that was presumed dead cannot overwrite the outcome of the rerun.
+
+# kind -> handler function(payload)
+HANDLERS = {}
+
+# kinds whose handler opens its own transaction
+NON_ATOMIC = set()
+
+# kind -> function(payload) called when a job failed for good
+FAILURE_HANDLERS = {}
+
+
+class LostJob(Exception):
+    """
+    The job was requeued (and maybe claimed by another worker) meanwhile
+    """
+
+
+def handler(kind, atomic=True):
+    """
+    Register a function as the handler for jobs of `kind`:
+
+        @handler('rooms.add_images')
+        def add_images(payload): ...
+    """
+    def register(func):
+        HANDLERS[kind] = func
+        if not atomic:
+            NON_ATOMIC.add(kind)
+        return func
+    return register
+
+
+def failure_handler(kind):
+    """
+    Register a function called with the payload of a `kind` job that
+    failed for good (e.g. to delete its staged files)
+    """
+    def register(func):
+        FAILURE_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, key=None, delay=None, max_attempts=None):
+    """
+    Add a job and return it. If a job with the same `key` exists already,
+    that job is returned instead and nothing is added; if it had failed
+    for good, it is queued again with a fresh set of attempts.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'No job handler registered for {kind!r}')
+
+    fields = {
+        'kind': kind,
+        'payload': payload or {},
+        'run_after': timezone.now() + (delay or datetime.timedelta()),
+        'max_attempts': max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    }
+    if key is None:
+        return Job.objects.create(**fields)
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(key=key, **fields)
+    except IntegrityError:
+        pass
+
+    with transaction.atomic():
+        job = Job.objects.select_for_update().get(key=key)
+        if job.status == Job.FAILED:
+            # The same work was asked for again: a dead job would
+            # otherwise swallow every later request for it
+            job.status = Job.QUEUED
+            job.attempts = 0
+            job.locked_by, job.locked_at, job.finished_at = '', None, None
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.save(update_fields=[
+                'status', 'attempts', 'locked_by', 'locked_at', 'finished_at', *fields,
+            ])
+        return job
+
+
+def backoff(attempts):
+    """
+    Delay before retry number `attempts`: base, 2 x base, 4 x base, ... (capped)
+    """
+    seconds = settings.JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(seconds, settings.JOBS_BACKOFF_MAX_SECONDS))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+# ---------------------------------------------
+# Claiming and running
+# ---------------------------------------------
+
+def claim_job(worker=None):
+    """
+    Mark the oldest due job as running for this worker and return it,
+    or None if nothing is due.
+    """
+    worker = worker or worker_name()
+    now = timezone.now()
+
+    for _attempt in range(5):
+        with transaction.atomic():
+            candidate = (
+                Job.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=Job.QUEUED, run_after__lte=now)
+                .order_by('run_after', 'id')
+                .values_list('id', flat=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+
+            claimed = Job.objects.filter(pk=candidate, status=Job.QUEUED).update(
+                status=Job.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+        if claimed:
+            return Job.objects.get(pk=candidate)
+        # Another worker took it between the read and the update: try again
+
+    return None
+
+
+def locked(job):
+    # The job's row, as long as the worker that claimed it still holds it
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+
+
+def mark_done(job):
+    if not locked(job).update(status=Job.DONE, finished_at=timezone.now(), last_error=''):
+        raise LostJob(f'Job {job} was requeued while it ran')
+
+
+def fail_job(job, error):
+    """
+    Give up on a running job and let its failure handler clean up
+    """
+    failed = locked(job).update(status=Job.FAILED, finished_at=timezone.now(), last_error=error)
+    cleanup = FAILURE_HANDLERS.get(job.kind)
+    if failed and cleanup is not None:
+        try:
+            cleanup(job.payload)
+        except Exception:
+            logger.exception("Cleaning up after job %s failed", job)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Refresh locked_at of a running job until stopped, so
+    requeue_stale_jobs() leaves it alone
+    """
+
+    def __init__(self, job, interval):
+        super().__init__(daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    locked(self.job).update(locked_at=timezone.now())
+                except DatabaseError:
+                    logger.warning("Heartbeat of job %s failed", self.job, exc_info=True)
+        finally:
+            # The thread's own connection
+            connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job):
+    """
+    Run one claimed job and record the outcome. Returns True on success.
+    """
+    func = HANDLERS.get(job.kind)
+
+    try:
+        if func is None:
+            raise LookupError(f'No job handler registered for {job.kind!r}')
+        with Heartbeat(job, settings.JOBS_HEARTBEAT_SECONDS):
+            if job.kind in NON_ATOMIC:
+                func(job.payload)
+                mark_done(job)
+            else:
+                with transaction.atomic():
+                    func(job.payload)
+                    mark_done(job)
+    except LostJob:
+        logger.warning("Job %s was requeued while it ran, leaving it to the rerun", job)
+        return False
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts or func is None:
+            logger.error("Job %s failed for good:\n%s", job, error)
+            fail_job(job, error)
+        else:
+            logger.warning("Job %s failed, retrying:\n%s", job, error)
+            locked(job).update(
+                status=Job.QUEUED, run_after=timezone.now() + backoff(job.attempts),
+                last_error=error,
+            )
+        return False
+
+    return True
+
+
+def run_pending(limit=None, worker=None):
+    """
+    Run due jobs until none are left (or `limit` were run).
+    Returns the number of jobs run.
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale_jobs(timeout=None):
+    """
+    Put jobs back in the queue whose worker died while running them (no
+    heartbeat for `timeout`), or fail them if they are out of attempts.
+    Returns how many were requeued.
+    """
+    timeout = timeout or datetime.timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=timezone.now() - timeout)
+
+    for job in stale.filter(attempts__gte=F('max_attempts')):
+        fail_job(job, 'Worker stopped while running the job.')
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, locked_by='', locked_at=None,
+    )
@@ -0,0 +1,38 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import storages
+
+
+# =========================================================
+# STAGING AREA FOR BACKGROUND JOBS
+# =========================================================
+#
+# Uploaded files only live as long as the request. Files a job still
+# needs (e.g. room images waiting to be resized and uploaded) are copied
+# to the staging storage first and the job gets their names.
+#
+# The storage is settings.STORAGES[JOBS_STAGING_STORAGE]; it must be
+# reachable by every worker (a shared disk, or S3-like storage).
+
+
+def staging_storage():
+    return storages[settings.JOBS_STAGING_STORAGE]
+
+
+def stage_file(file, folder='uploads'):
+    """
+    Save an uploaded file to the staging storage and return its name
+    """
+    name = f'{folder}/{uuid.uuid4().hex}/{file.name}'
+    return staging_storage().save(name, file)
+
+
+def open_staged(name):
+    return staging_storage().open(name, 'rb')
+
+
+def discard_staged(names):
+    storage = staging_storage()
+    for name in names:
+        storage.delete(name)
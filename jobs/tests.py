@@ -0,0 +1,186 @@
+import datetime
+import io
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+# Handlers used by the tests below
+calls = []
+calls_lock = threading.Lock()
+
+
+@queue.handler('tests.record')
+def record(payload):
+    with calls_lock:
+        calls.append(payload['n'])
+
+
+@queue.handler('tests.fail')
+def fail(payload):
+    # Anything written before the error must be rolled back
+    User.objects.create_user(f"written-before-error-{payload['n']}")
+    raise RuntimeError('boom')
+
+
+@queue.failure_handler('tests.fail')
+def record_failure(payload):
+    with calls_lock:
+        calls.append(-payload['n'])
+
+
+@queue.handler('tests.requeued', atomic=False)
+def requeued(payload):
+    # Another worker takes over the job while this one is still running
+    Job.objects.filter(kind='tests.requeued').update(locked_by='other-worker')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_BACKOFF_SECONDS=10, JOBS_BACKOFF_MAX_SECONDS=25)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_same_key_gives_same_job(self):
+        first = queue.enqueue('tests.record', {'n': 1}, key='only-once')
+        second = queue.enqueue('tests.record', {'n': 2}, key='only-once')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_same_key_after_failing_for_good_queues_it_again(self):
+        job = queue.enqueue('tests.fail', {'n': 3}, key='retry-me', max_attempts=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            queue.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+        again = queue.enqueue('tests.fail', {'n': 4}, key='retry-me', max_attempts=1)
+        self.assertEqual(again.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.payload), (Job.QUEUED, 0, {'n': 4}))
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [-3, -4])
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            queue.enqueue('tests.missing')
+
+    def test_only_due_jobs_run_in_order(self):
+        queue.enqueue('tests.record', {'n': 1})
+        queue.enqueue('tests.record', {'n': 2}, delay=datetime.timedelta(minutes=5))
+        queue.enqueue('tests.record', {'n': 3})
+
+        self.assertEqual(queue.run_pending(), 2)
+        self.assertEqual(calls, [1, 3])
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        job = queue.enqueue('tests.fail', {'n': 1})
+        delays = []
+
+        for _attempt in range(3):
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            before = timezone.now()
+            with self.assertLogs('jobs.queue', 'WARNING'):
+                self.assertEqual(queue.run_pending(), 1)
+            job.refresh_from_db()
+            delays.append(round((job.run_after - before).total_seconds()))
+
+        self.assertEqual(delays[:2], [10, 20])
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertFalse(User.objects.filter(username__startswith='written-before-error').exists())
+        # The failure handler ran once, after the last attempt
+        self.assertEqual(calls, [-1])
+
+    def test_worker_that_lost_its_job_records_nothing(self):
+        job = queue.enqueue('tests.requeued', {'n': 1})
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(queue.run_job(queue.claim_job('worker-a')))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.RUNNING, 'other-worker'))
+
+    def test_claimed_job_is_not_claimed_again(self):
+        queue.enqueue('tests.record', {'n': 1})
+        self.assertIsNotNone(queue.claim_job('worker-a'))
+        self.assertIsNone(queue.claim_job('worker-b'))
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = queue.enqueue('tests.record', {'n': 1})
+        queue.claim_job('crashed-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(hours=1))
+
+        self.assertEqual(queue.requeue_stale_jobs(), 1)
+        self.assertEqual(queue.run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_stale_jobs_out_of_attempts_fail_for_good(self):
+        job = queue.enqueue('tests.fail', {'n': 2}, max_attempts=1)
+        queue.claim_job('crashed-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(hours=1))
+
+        self.assertEqual(queue.requeue_stale_jobs(), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+        self.assertEqual(calls, [-2])
+
+
+class HeartbeatTests(TransactionTestCase):
+
+    def test_running_job_keeps_its_lock_fresh(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('threads sharing an in-memory database get "table is locked" errors')
+        job = queue.enqueue('tests.record', {'n': 1})
+        job = queue.claim_job('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(hours=1))
+
+        with queue.Heartbeat(job, 0.05):
+            time.sleep(0.3)
+
+        self.assertEqual(queue.requeue_stale_jobs(datetime.timedelta(minutes=1)), 0)
+
+
+class RunWorkersCommandTests(TransactionTestCase):
+    """
+    Several workers draining the same queue run every job exactly once
+    """
+
+    JOBS = 30
+
+    def setUp(self):
+        calls.clear()
+        for n in range(self.JOBS):
+            queue.enqueue('tests.record', {'n': n})
+
+    def in_memory_sqlite(self):
+        return connection.vendor == 'sqlite' and connection.is_in_memory_db()
+
+    def run_workers(self, mode, workers=4):
+        call_command(
+            'run_workers', workers=workers, mode=mode, once=True, poll_interval=0.01,
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), self.JOBS)
+        self.assertEqual(Job.objects.filter(attempts=1).count(), self.JOBS)
+
+    def test_thread_workers(self):
+        # Threads sharing an in-memory SQLite database get "table is locked"
+        # errors instead of waiting for each other, so use one worker there
+        self.run_workers('thread', workers=1 if self.in_memory_sqlite() else 4)
+        self.assertEqual(sorted(calls), list(range(self.JOBS)))
+
+    def test_process_workers(self):
+        if self.in_memory_sqlite():
+            self.skipTest('an in-memory database cannot be shared with other processes')
+        self.run_workers('process')
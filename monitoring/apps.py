@@ -0,0 +1,71 @@
+import functools
+import time
+
+from django.apps import AppConfig
+
+
+def measure_template_rendering():
+    """
+    Wrap Template.render so the current request's metrics get the time
+    spent rendering templates (outermost render only, see metrics.py)
+    """
+    from django.template.base import Template
+
+    from .metrics import current_metrics
+
+    render = Template.render
+    if getattr(render, 'measured', False):
+        return
+
+    @functools.wraps(render)
+    def measured_render(self, context):
+        metrics = current_metrics()
+        if metrics is None:
+            return render(self, context)
+
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    measured_render.measured = True
+    Template.render = measured_render
+
+
+def measure_database_connections():
+    """
+    Wrap BaseDatabaseWrapper.connect to time new database connections
+    """
+    from django.db.backends.base.base import BaseDatabaseWrapper
+
+    from .prometheus import Histogram
+
+    connect = BaseDatabaseWrapper.connect
+    if getattr(connect, 'measured', False):
+        return
+
+    seconds = Histogram(
+        'roomfinder_db_connect_seconds', 'Time to open a database connection, by alias', ['alias'],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+
+    @functools.wraps(connect)
+    def measured_connect(self):
+        with seconds.time(self.alias):
+            return connect(self)
+
+    measured_connect.measured = True
+    BaseDatabaseWrapper.connect = measured_connect
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        measure_template_rendering()
+        measure_database_connections()
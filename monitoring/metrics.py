@@ -0,0 +1,188 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from collections import Counter
+
+
+# =========================================================
+# PER-REQUEST METRICS
+# =========================================================
+#
+# RequestMetricsMiddleware (middleware.py) creates one RequestMetrics per
+# request and makes it the "current" one while the view runs:
+#
+#   - every SQL statement (all database aliases) adds to the query count
+#     and SQL time, and to the count of its fingerprint (below)
+#   - template rendering time is added by the Template.render wrapper
+#     installed in apps.py (outermost template only: includes and
+#     {% extends %} parents are part of their parent's time)
+#
+# Finished requests go into VIEW_STATS: a few histograms per view.
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def current_metrics():
+    """
+    RequestMetrics of the request being handled, or None
+    """
+    return _current.get()
+
+
+# ---------------------------------------------
+# SQL fingerprints
+# ---------------------------------------------
+
+# "IN (%s, %s, %s)" and "VALUES (%s, %s), (%s, %s)" -> "(...)", so the same
+# query with a different number of values has the same fingerprint
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,?)+\)(?:\s*,\s*\((?:\s*%s\s*,?)+\))*')
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    The SQL of a statement without its values: statements that differ
+    only in their parameters (the "N" in N+1) have the same fingerprint
+    """
+    return WHITESPACE.sub(' ', PLACEHOLDER_LIST.sub('(...)', sql)).strip()
+
+
+class RequestMetrics:
+    """
+    What one request cost. Times are in milliseconds.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.latency_ms = None
+        self.fingerprints = Counter()
+        # Nesting depth of Template.render calls (see apps.py)
+        self.template_depth = 0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.sql_ms += duration * 1000
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """
+        {fingerprint: count} of the statements run more than once
+        """
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+    def finish(self):
+        self.latency_ms = (time.perf_counter() - self.started) * 1000
+
+    def activate(self):
+        """
+        Make this the current request's metrics; returns a token for deactivate()
+        """
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(sql, time.perf_counter() - start)
+
+
+# ---------------------------------------------
+# Per-view histograms
+# ---------------------------------------------
+
+# Upper bounds of the histogram buckets (the last bucket is "more")
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Count of observations per bucket, plus their count and sum
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-th quantile (None when empty;
+        inf when it falls past the last bound)
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'buckets': {str(bound): count for bound, count in zip(self.bounds + ('inf',), self.counts)},
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class ViewStats:
+    """
+    Histograms of latency, query count, SQL and template time per view,
+    for the requests handled by this process
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, metrics):
+        with self.lock:
+            histograms = self.views.get(view)
+            if histograms is None:
+                histograms = self.views[view] = {
+                    'latency_ms': Histogram(LATENCY_BUCKETS_MS),
+                    'sql_ms': Histogram(LATENCY_BUCKETS_MS),
+                    'template_ms': Histogram(LATENCY_BUCKETS_MS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                }
+            histograms['latency_ms'].observe(metrics.latency_ms)
+            histograms['sql_ms'].observe(metrics.sql_ms)
+            histograms['template_ms'].observe(metrics.template_ms)
+            histograms['queries'].observe(metrics.queries)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {name: histogram.as_dict() for name, histogram in histograms.items()}
+                for view, histograms in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+VIEW_STATS = ViewStats()
@@ -0,0 +1,101 @@
+import contextlib
+import json
+import logging
+
+from django.conf import settings
+from django.db import connections
+
+from . import prometheus
+from .metrics import QUERY_BUCKETS, VIEW_STATS, RequestMetrics
+
+logger = logging.getLogger('monitoring.requests')
+
+REQUESTS = prometheus.Counter(
+    'roomfinder_http_requests_total', 'Requests by view, method and status', ['view', 'method', 'status'],
+)
+REQUEST_SECONDS = prometheus.Histogram(
+    'roomfinder_http_request_duration_seconds', 'Request latency by view', ['view'],
+)
+REQUEST_DB_SECONDS = prometheus.Histogram(
+    'roomfinder_http_request_db_seconds', 'Time spent running SQL per request, by view', ['view'],
+)
+REQUEST_QUERIES = prometheus.Histogram(
+    'roomfinder_http_request_queries', 'SQL statements per request, by view', ['view'],
+    buckets=QUERY_BUCKETS,
+)
+
+# Any other method is counted as "other" (clients may send anything)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# Duplicated statements listed in a request's log line
+MAX_LOGGED_DUPLICATES = 5
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request: queries, SQL time, duplicated statements,
+    template time and latency (see metrics.py).
+
+    Each request is logged as one JSON object on the "monitoring.requests"
+    logger: INFO normally, WARNING when the view went over its query
+    budget (settings.QUERY_BUDGETS) or took longer than REQUEST_SLOW_MS.
+    The metrics are also left on the response as `response.metrics`
+    (used by monitoring.testing) and added to the /metrics histograms.
+
+    A streaming response is measured up to the moment it is returned;
+    the rows it reads while streaming are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            RequestMetrics.deactivate(token)
+            metrics.finish()
+
+        view = view_name(request)
+        VIEW_STATS.record(view, metrics)
+        REQUESTS.inc(view, request.method if request.method in METHODS else 'other', response.status_code)
+        REQUEST_SECONDS.observe(metrics.latency_ms / 1000, view)
+        REQUEST_DB_SECONDS.observe(metrics.sql_ms / 1000, view)
+        REQUEST_QUERIES.observe(metrics.queries, view)
+        self.log(request, response, view, metrics)
+        response.metrics = metrics
+        return response
+
+    def log(self, request, response, view, metrics):
+        budget = settings.QUERY_BUDGETS.get(view)
+        over_budget = budget is not None and metrics.queries > budget
+        slow = metrics.latency_ms > settings.REQUEST_SLOW_MS
+
+        level = logging.WARNING if over_budget or slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        duplicates = list(metrics.duplicates().items())[:MAX_LOGGED_DUPLICATES]
+        logger.log(level, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'latency_ms': round(metrics.latency_ms, 2),
+            'queries': metrics.queries,
+            'query_budget': budget,
+            'over_budget': over_budget,
+            'sql_ms': round(metrics.sql_ms, 2),
+            'template_ms': round(metrics.template_ms, 2),
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates],
+        }))
@@ -0,0 +1,272 @@
+import atexit
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from .metrics import Histogram as Buckets
+
+
+# =========================================================
+# PROMETHEUS METRICS
+# =========================================================
+#
+#   GET /metrics   (text exposition format 0.0.4)
+#
+# Counters and histograms are declared once, at import time:
+#
+#   BOOKINGS = Counter('roomfinder_bookings_total', 'Booking events', ['event'])
+#   BOOKINGS.inc('approved')
+#
+# Updating one is a dict update under a lock, in the process's memory.
+#
+# Several processes (gunicorn workers, job workers): each one writes its
+# values to its own file in settings.METRICS_DIR, at most once every
+# METRICS_FLUSH_SECONDS and from a timer thread, never on the request
+# path. /metrics adds up the files of all processes. Files are replaced
+# atomically (write, then rename), so a reader never sees half of one.
+#
+# Files of processes that have exited are kept, so counters never go
+# down when a worker is restarted; empty METRICS_DIR when deploying.
+# Without METRICS_DIR the values stay in memory and /metrics shows the
+# process that answered only (fine for runserver or a single worker).
+
+# Default histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Registry:
+    """
+    Declared metrics and this process's values:
+    {(metric name, label values): number or Buckets}
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.reset()
+
+    def reset(self):
+        # Also runs in a forked child: it starts from zero, with its own file
+        self.lock = threading.Lock()
+        self.values = {}
+        self.file_name = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        self.timer = None
+        self.dirty = False
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is declared twice')
+        self.metrics[metric.name] = metric
+
+    # ---------------------------------------------
+    # Updating (hot path)
+    # ---------------------------------------------
+
+    def add(self, key, amount):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+            self.changed()
+
+    def observe(self, key, bounds, value):
+        with self.lock:
+            buckets = self.values.get(key)
+            if buckets is None:
+                buckets = self.values[key] = Buckets(bounds)
+            buckets.observe(value)
+            self.changed()
+
+    def changed(self):
+        # Called with the lock held
+        self.dirty = True
+        if self.timer is None and settings.METRICS_DIR:
+            self.timer = threading.Timer(settings.METRICS_FLUSH_SECONDS, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    # ---------------------------------------------
+    # Sharing between processes
+    # ---------------------------------------------
+
+    def rows(self):
+        """
+        This process's values as JSON-able [name, labels, value] rows
+        """
+        with self.lock:
+            return [
+                [name, list(labels), value if not isinstance(value, Buckets) else {
+                    'counts': list(value.counts), 'sum': value.sum, 'count': value.count,
+                }]
+                for (name, labels), value in self.values.items()
+            ]
+
+    def flush(self):
+        """
+        Write this process's values to its file in METRICS_DIR
+        """
+        with self.lock:
+            self.timer = None
+            self.dirty = False
+
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.file_name)
+        # The timer and atexit may both be writing
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.rows(), file)
+        os.replace(temporary, path)
+
+    def flush_if_dirty(self):
+        if self.dirty:
+            self.flush()
+
+    def collect(self):
+        """
+        {(name, labels): number or {'counts', 'sum', 'count'}} added up over
+        all processes (this one's values are read from memory, not its file)
+        """
+        rows = []
+        if settings.METRICS_DIR:
+            for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+                if os.path.basename(path) == self.file_name:
+                    continue
+                try:
+                    with open(path) as file:
+                        rows.extend(json.load(file))
+                except (OSError, ValueError):
+                    # Removed (or emptied by hand) while we were reading
+                    continue
+
+        rows.extend(self.rows())
+
+        totals = {}
+        for name, labels, value in rows:
+            if name not in self.metrics:
+                continue
+            key = (name, tuple(labels))
+            if isinstance(value, dict):
+                total = totals.setdefault(key, {'counts': [0] * len(value['counts']), 'sum': 0.0, 'count': 0})
+                if len(total['counts']) != len(value['counts']):
+                    # Written with other buckets (an older deploy)
+                    continue
+                total['counts'] = [a + b for a, b in zip(total['counts'], value['counts'])]
+                total['sum'] += value['sum']
+                total['count'] += value['count']
+            else:
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    # ---------------------------------------------
+    # Text format
+    # ---------------------------------------------
+
+    def render(self):
+        samples = {}
+        for (name, labels), value in self.collect().items():
+            samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, value in sorted(samples.get(name, [])):
+                lines.extend(metric.sample_lines(labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Forked workers must not report their parent's values as their own
+os.register_at_fork(after_in_child=REGISTRY.reset)
+atexit.register(REGISTRY.flush_if_dirty)
+
+
+# ---------------------------------------------
+# Metric types
+# ---------------------------------------------
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {labels}')
+        return (self.name, tuple(map(str, labels)))
+
+
+class Counter(Metric):
+    """
+    A number that only goes up: counter.inc('approved'), counter.inc(amount=3)
+    """
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self.registry.add(self.key(labels), amount)
+
+    def sample_lines(self, labels, value):
+        return [f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}']
+
+
+class Histogram(Metric):
+    """
+    Observations counted in buckets: histogram.observe(0.25, 'room_list')
+    """
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        self.registry.observe(self.key(labels), self.buckets, value)
+
+    @contextlib.contextmanager
+    def time(self, *labels):
+        """
+        Observe how long the block took, in seconds
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def sample_lines(self, labels, value):
+        names = self.labelnames + ('le',)
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), value['counts']):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{format_labels(names, labels + (format_value(bound),))} {cumulative}')
+        lines.append(f'{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(value["sum"])}')
+        lines.append(f'{self.name}_count{format_labels(self.labelnames, labels)} {value["count"]}')
+        return lines
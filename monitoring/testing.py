@@ -0,0 +1,34 @@
+from django.conf import settings
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin checking views against their query budget:
+
+        class RoomPageTests(QueryBudgetMixin, TestCase):
+            def test_room_list(self):
+                self.assertQueryBudget(reverse('room_list'))
+
+    The budget is settings.QUERY_BUDGETS[<view name>] unless one is given.
+    Needs RequestMetricsMiddleware (it counts the queries of the request).
+    """
+
+    def assertQueryBudget(self, url, budget=None, method='get', data=None, **extra):
+        response = getattr(self.client, method)(url, data, **extra)
+
+        metrics = getattr(response, 'metrics', None)
+        if metrics is None:
+            self.fail('No request metrics: is RequestMetricsMiddleware in MIDDLEWARE?')
+
+        view = response.resolver_match.view_name
+        if budget is None:
+            budget = settings.QUERY_BUDGETS.get(view)
+            if budget is None:
+                self.fail(f'No query budget for {view!r} in settings.QUERY_BUDGETS')
+
+        if metrics.queries > budget:
+            statements = '\n'.join(
+                f'  {count} x {sql}' for sql, count in metrics.fingerprints.most_common()
+            )
+            self.fail(f'{view} ran {metrics.queries} queries, its budget is {budget}:\n{statements}')
+        return response
@@ -0,0 +1,212 @@
+import datetime
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rooms.models import Room
+from rooms.page_cache import page_cache
+
+from . import prometheus
+from .metrics import VIEW_STATS, Histogram, RequestMetrics, fingerprint
+from .middleware import REQUESTS
+from .testing import QueryBudgetMixin
+
+
+class FingerprintTests(TestCase):
+
+    def test_values_are_not_part_of_the_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT *\n  FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (...)',
+        )
+
+    def test_duplicates(self):
+        metrics = RequestMetrics()
+        for room_id in range(3):
+            metrics.record_query('SELECT * FROM "rooms_room" WHERE "id" = %s', 0.001)
+        metrics.record_query('SELECT COUNT(*) FROM "rooms_booking"', 0.001)
+
+        self.assertEqual(metrics.queries, 4)
+        self.assertAlmostEqual(metrics.sql_ms, 4.0)
+        self.assertEqual(metrics.duplicates(), {'SELECT * FROM "rooms_room" WHERE "id" = %s': 3})
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram((10, 100))
+        for value in (1, 2, 3, 50, 500):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [3, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 10)
+        self.assertEqual(histogram.quantile(0.8), 100)
+        self.assertEqual(histogram.quantile(0.99), float('inf'))
+        self.assertIsNone(Histogram((10,)).quantile(0.5))
+
+
+class RequestMetricsMiddlewareTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        VIEW_STATS.reset()
+        owner = User.objects.create_user('owner', password='pass12345')
+        Room.objects.create(
+            owner=owner, title='Test Room', description='A test room', price=5000,
+            location='Kathmandu', room_type='Single', owner_name='Owner',
+            contact_number='9800000000', available_from=datetime.date(2026, 1, 1),
+        )
+
+    def test_request_is_measured_and_logged(self):
+        with CaptureQueriesContext(connection) as ctx, self.assertLogs('monitoring.requests', 'INFO') as logs:
+            response = self.client.get(reverse('room_list'))
+
+        metrics = response.metrics
+        self.assertEqual(metrics.queries, len(ctx))
+        self.assertGreater(metrics.template_ms, 0)
+        self.assertGreaterEqual(metrics.latency_ms, metrics.sql_ms + metrics.template_ms)
+
+        [line] = logs.records
+        self.assertEqual(line.levelname, 'INFO')
+        logged = json.loads(line.getMessage())
+        self.assertEqual(logged['view'], 'room_list')
+        self.assertEqual(logged['status'], 200)
+        self.assertEqual(logged['queries'], metrics.queries)
+        self.assertFalse(logged['over_budget'])
+
+    @override_settings(QUERY_BUDGETS={'room_list': 0})
+    def test_over_budget_is_a_warning(self):
+        with self.assertLogs('monitoring.requests', 'INFO') as logs:
+            self.client.get(reverse('room_list'))
+
+        [line] = logs.records
+        self.assertEqual(line.levelname, 'WARNING')
+        self.assertTrue(json.loads(line.getMessage())['over_budget'])
+
+    def test_budget_helper_fails_over_budget(self):
+        with self.assertRaisesMessage(AssertionError, 'room_list ran'):
+            self.assertQueryBudget(reverse('room_list'), budget=0)
+
+    def test_histograms_per_view(self):
+        self.client.get(reverse('room_list'))
+        self.client.get(reverse('room_list'))
+        self.client.get(reverse('room_detail', args=[Room.objects.get().id]))
+
+        self.assertEqual(self.client.get(reverse('request_stats')).status_code, 302)
+
+        admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(admin)
+        views = self.client.get(reverse('request_stats')).json()['views']
+
+        self.assertEqual(views['room_list']['latency_ms']['count'], 2)
+        self.assertEqual(views['room_detail']['queries']['count'], 1)
+        self.assertEqual(sum(views['room_list']['queries']['buckets'].values()), 2)
+
+
+def count_in_child(labels, amount):
+    # Runs in a forked process: it starts with no values of its own
+    REQUESTS.inc(*labels, amount=amount)
+    prometheus.REGISTRY.flush()
+
+
+class PrometheusFormatTests(TestCase):
+
+    def setUp(self):
+        self.registry = prometheus.Registry()
+
+    def test_counter_and_histogram_lines(self):
+        counter = prometheus.Counter('test_events_total', 'Events', ['kind'], registry=self.registry)
+        histogram = prometheus.Histogram('test_seconds', 'Durations', buckets=(0.1, 1), registry=self.registry)
+        counter.inc('a "quoted"\nkind')
+        counter.inc('b', amount=2)
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        self.assertEqual(self.registry.render().splitlines(), [
+            '# HELP test_events_total Events',
+            '# TYPE test_events_total counter',
+            'test_events_total{kind="a \\"quoted\\"\\nkind"} 1.0',
+            'test_events_total{kind="b"} 2.0',
+            '# HELP test_seconds Durations',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1.0"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            'test_seconds_sum 5.55',
+            'test_seconds_count 3',
+        ])
+
+    def test_labels_must_match(self):
+        counter = prometheus.Counter('test_total', 'Events', ['kind'], registry=self.registry)
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            prometheus.Counter('test_total', 'Again', registry=self.registry)
+
+
+class PrometheusMultiprocessTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def value(self, labels):
+        return prometheus.REGISTRY.collect().get(('roomfinder_http_requests_total', labels), 0)
+
+    def files(self):
+        return [name for name in os.listdir(self.directory.name) if name.endswith('.json')]
+
+    def test_values_of_all_processes_are_added_up(self):
+        labels = ('test', 'GET', '200')
+        with override_settings(METRICS_DIR=self.directory.name, METRICS_FLUSH_SECONDS=0.05):
+            REQUESTS.inc(*labels, amount=3)
+            # Written a moment later by the timer, not by inc()
+            self.assertEqual(self.files(), [])
+            deadline = time.monotonic() + 5
+            while not self.files() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(self.files()), 1)
+
+            before = self.value(labels)
+            child = multiprocessing.get_context('fork').Process(target=count_in_child, args=(labels, 2))
+            child.start()
+            child.join(timeout=30)
+            self.assertEqual(child.exitcode, 0)
+
+            # The child counted 2, not its parent's values plus 2
+            self.assertEqual(len(self.files()), 2)
+            self.assertEqual(self.value(labels), before + 2)
+
+
+class MetricsEndpointTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+
+    def test_staff_or_token_only(self):
+        self.client.get(reverse('room_list'))
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertContains(response, 'roomfinder_http_requests_total{view="room_list",method="GET",status="200"}')
+        self.assertContains(response, 'roomfinder_http_request_duration_seconds_bucket{view="room_list",le="+Inf"}')
+        self.assertContains(response, '# TYPE roomfinder_bookings_total counter')
+
+        self.client.logout()
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
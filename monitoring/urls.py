@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('requests/', views.request_stats, name='request_stats'),
+]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from .metrics import VIEW_STATS
+from .prometheus import REGISTRY
+
+
+@require_GET
+@staff_member_required
+def request_stats(request):
+    """
+    Latency / query / SQL / template histograms per view, for the
+    requests this process has handled since it started
+    """
+    return JsonResponse({'views': VIEW_STATS.snapshot()})
+
+
+@require_GET
+def metrics(request):
+    """
+    All counters and histograms (every worker process) in the Prometheus
+    text format. The scraper sends "Authorization: Bearer <METRICS_TOKEN>";
+    without a token configured only staff users may look.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
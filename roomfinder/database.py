@@ -0,0 +1,121 @@
+import os
+
+
+# =========================================================
+# DATABASE CONNECTIONS (settings.DATABASES from DB_* variables)
+# =========================================================
+#
+# Opening a connection to Neon costs a TCP + TLS handshake and the login,
+# often more than the queries of a whole request. Two ways to keep them:
+#
+#   persistent (default)   each worker process keeps its connection for
+#                          DB_CONN_MAX_AGE seconds (0 = close after every
+#                          request, the old behaviour)
+#   pool (DB_POOL=True)    a psycopg_pool in each worker process, sized by
+#                          DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE. Connections
+#                          go back to the pool after every request.
+#
+# Sizes are per worker process: gunicorn workers x DB_POOL_MAX_SIZE (plus
+# job workers) must stay under what the server or Neon's pooler allows.
+# A sync gunicorn worker handles one request at a time and needs one
+# connection; raise the size for threaded workers.
+#
+# Read replicas (see routers.py): DB_REPLICA_HOSTS, comma separated, gives
+# one database per host ("replica_1", ...) with the primary's settings;
+# DB_REPLICA_NAME if the replicas' database has another name (e.g. two
+# databases on one local server). Tests use the primary for them.
+#
+# DB_STATEMENT_TIMEOUT_MS cancels a query running longer (default 0 = no
+# limit). It is sent as a startup option, which PgBouncer endpoints (Neon's
+# "-pooler" hosts) reject: there, use "ALTER ROLE ... SET statement_timeout"
+# instead, and only set it here for a direct connection.
+#
+# DB_DISABLE_SERVER_SIDE_CURSORS: QuerySet.iterator() normally reads
+# through a server-side cursor, which does not survive PgBouncer's
+# transaction pooling. On by default for "-pooler" hosts.
+
+DEFAULTS = {
+    'DB_NAME': 'neondb',
+    'DB_USER': 'neondb_owner',
+    'DB_HOST': 'ep-icy-sea-ahntmauj-pooler.c-3.us-east-1.aws.neon.tech',
+    'DB_PORT': '5432',
+    'DB_SSLMODE': 'require',  # Neon requires SSL
+    'DB_CONN_MAX_AGE': '60',
+    'DB_CONN_HEALTH_CHECKS': 'True',
+    'DB_POOL': 'False',
+    'DB_POOL_MIN_SIZE': '1',
+    'DB_POOL_MAX_SIZE': '4',
+    'DB_POOL_TIMEOUT': '10',
+    'DB_POOL_MAX_IDLE': '300',
+    'DB_POOL_MAX_LIFETIME': '1800',
+    'DB_STATEMENT_TIMEOUT_MS': '0',
+}
+
+
+def behind_pooler(host):
+    return '-pooler' in (host or '')
+
+
+def disable_server_side_cursors(env, host):
+    setting = env.get('DB_DISABLE_SERVER_SIDE_CURSORS')
+    if setting:
+        return setting == 'True'
+    return behind_pooler(host)
+
+
+def database_settings(env=os.environ):
+    """
+    The "default" database of settings.DATABASES, from `env`
+    """
+    def get(name):
+        return env.get(name) or DEFAULTS.get(name)
+
+    pooled = get('DB_POOL') == 'True'
+    options = {'sslmode': get('DB_SSLMODE')}
+
+    statement_timeout = int(get('DB_STATEMENT_TIMEOUT_MS'))
+    if statement_timeout:
+        options['options'] = f'-c statement_timeout={statement_timeout}'
+
+    if pooled:
+        options['pool'] = {
+            'min_size': int(get('DB_POOL_MIN_SIZE')),
+            'max_size': int(get('DB_POOL_MAX_SIZE')),
+            'timeout': float(get('DB_POOL_TIMEOUT')),  # waiting for a free connection
+            'max_idle': float(get('DB_POOL_MAX_IDLE')),
+            'max_lifetime': float(get('DB_POOL_MAX_LIFETIME')),
+        }
+
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': get('DB_NAME'),
+        'USER': get('DB_USER'),
+        'PASSWORD': env.get('DB_PASSWORD'),
+        'HOST': get('DB_HOST'),
+        'PORT': get('DB_PORT'),
+        # The pool keeps the connections itself: Django must not
+        'CONN_MAX_AGE': 0 if pooled else int(get('DB_CONN_MAX_AGE')),
+        # A kept connection is checked before a request uses it (the pool
+        # checks before handing one out)
+        'CONN_HEALTH_CHECKS': get('DB_CONN_HEALTH_CHECKS') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': disable_server_side_cursors(env, get('DB_HOST')),
+        'OPTIONS': options,
+    }
+
+
+def replica_settings(env=os.environ):
+    """
+    settings.DATABASES entries of the read replicas in `env`
+    """
+    primary = database_settings(env)
+    hosts = [host.strip() for host in (env.get('DB_REPLICA_HOSTS') or '').split(',') if host.strip()]
+    return {
+        f'replica_{number}': {
+            **primary,
+            'NAME': env.get('DB_REPLICA_NAME') or primary['NAME'],
+            'HOST': host,
+            'DISABLE_SERVER_SIDE_CURSORS': disable_server_side_cursors(env, host),
+            'TEST': {'MIRROR': 'default'},
+        }
+        for number, host in enumerate(hosts, 1)
+    }
@@ -0,0 +1,194 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from monitoring.prometheus import Counter
+
+
+# =========================================================
+# READ REPLICAS (settings.DATABASE_REPLICAS)
+# =========================================================
+#
+# Reads of a request go to one of the replicas (picked per request), so
+# room_list, room_detail, the dashboards and exports do not load the
+# primary. Everything else reads from the primary:
+#
+#   - writes, and every read after a write in the same request
+#   - reads inside transaction.atomic() (select_for_update, checks
+#     before a write)
+#   - POST / PUT / PATCH / DELETE requests
+#   - views marked @use_primary() (GET views that write: book_room, ...)
+#   - sessions: a lagging replica would log a user out, or bring back
+#     a message already shown
+#   - pages rendered to fill the page cache: a lagging replica would
+#     store the old page under the new version (see rooms/page_cache.py)
+#   - anything outside a request: jobs, management commands, the shell
+#
+# A streaming response reads its rows after the view returned; views wrap
+# its content in keep_routing() so those reads follow the request too.
+#
+# Replicas lag behind the primary. After a user writes, the response sets
+# a short-lived cookie (REPLICA_PIN_SECONDS) and their requests read from
+# the primary until it expires, so they see their own booking or room.
+#
+# With no replicas configured the router stays out of the way.
+
+PIN_COOKIE = 'db_primary'
+
+# Apps whose rows are always read from the primary
+PRIMARY_APPS = {'sessions'}
+
+# Statements that make a request a write (router.db_for_write is no sign:
+# Django also asks it when a related object is merely assigned)
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+ROUTED_REQUESTS = Counter(
+    'roomfinder_db_routed_requests_total', 'Requests by where their reads went', ['target'],
+)
+
+_current = contextvars.ContextVar('read_routing', default=None)
+
+
+class ReadRouting:
+    """
+    Where the reads of the request being handled go
+    """
+
+    def __init__(self, replica, pinned=False):
+        self.replica = replica
+        self.pinned = pinned  # primary for the rest of the request
+        self.primary = False  # inside use_primary()
+        self.wrote = False
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook, on the primary
+        if not self.wrote and sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+            self.wrote = self.pinned = True
+        return execute(sql, params, many, context)
+
+    def read_alias(self):
+        if self.pinned or self.primary or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return self.replica
+
+
+@contextlib.contextmanager
+def use_primary():
+    """
+    Read from the primary inside this block (or view, as a decorator:
+    @use_primary())
+    """
+    routing = _current.get()
+    if routing is None:
+        yield
+        return
+
+    outer = routing.primary
+    routing.primary = True
+    try:
+        yield
+    finally:
+        routing.primary = outer
+
+
+def keep_routing(iterable):
+    """
+    Iterate `iterable` (the content of a StreamingHttpResponse) with the
+    read routing of the current request
+    """
+    routing = _current.get()
+    if routing is None:
+        return iterable
+    return _routed(routing, iter(iterable))
+
+
+def _routed(routing, iterator):
+    # Active only while a chunk is made: between chunks the server's
+    # context must not be left routed
+    while True:
+        token = routing.activate()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            ReadRouting.deactivate(token)
+        yield chunk
+
+
+class ReplicaRouter:
+    """
+    Reads to the request's replica, writes and migrations to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        # Always an alias, not None: Django would read the related rows
+        # of an instance (and, below, save it) where it was loaded from
+        routing = _current.get()
+        if routing is None or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return routing.read_alias()
+
+    def db_for_write(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their tables (and rows) from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pick the replica for this request, or pin it to the primary (unsafe
+    method, or the pin cookie of a recent write); set the cookie when the
+    request writes
+    """
+
+    SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return self.get_response(request)
+
+        pinned = request.method not in self.SAFE_METHODS or PIN_COOKIE in request.COOKIES
+        routing = ReadRouting(random.choice(replicas), pinned=pinned)
+        ROUTED_REQUESTS.inc('primary' if pinned else 'replica')
+        token = routing.activate()
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(routing):
+                response = self.get_response(request)
+        finally:
+            ReadRouting.deactivate(token)
+
+        if routing.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
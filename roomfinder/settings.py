@@ -12,8 +12,11 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import tempfile
 load_dotenv()
 
+from roomfinder.database import database_settings, replica_settings
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
     'rooms',
     'accounts',
     'dashboard',
+    'jobs',
+    'monitoring',
     'cloudinary',
     'cloudinary_storage',
 ]
@@ -49,6 +54,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Queries, SQL / template time and latency of every request (static
+    # files served by WhiteNoise above are not measured)
+    'monitoring.middleware.RequestMetricsMiddleware',
+    # Replica or primary for the request's reads; before the session
+    # middleware so the session saved after a login counts as a write
+    'roomfinder.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,20 +101,47 @@ WSGI_APPLICATION = 'roomfinder.wsgi.application'
 # Debug mode (optional: read from .env)
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
+# Connection keeping, pool sizes, timeouts and replicas: see roomfinder/database.py
 DATABASES = {
+    "default": database_settings(),
+    **replica_settings(),
+}
+
+# Reads of requests go to the replicas, if any (see roomfinder/routers.py)
+DATABASE_ROUTERS = ["roomfinder.routers.ReplicaRouter"]
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# How long a user reads from the primary after they wrote something
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "10"))
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME", "neondb"),
-        "USER": os.getenv("DB_USER", "neondb_owner"),
-        "PASSWORD": os.getenv("DB_PASSWORD"),
-        "HOST": os.getenv("DB_HOST", "ep-icy-sea-ahntmauj-pooler.c-3.us-east-1.aws.neon.tech"),
-        "PORT": os.getenv("DB_PORT", "5432"),
-        "OPTIONS": {
-            "sslmode": "require",  # Neon requires SSL
-        },
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Whole pages for anonymous visitors. Every process that changes rooms
+    # (gunicorn workers, run_workers, import_rooms) must see the same
+    # version keys (see rooms/page_cache.py), so the default is a folder
+    # shared by the processes of one machine. Several machines need a
+    # shared server instead, e.g. Redis:
+    # PAGE_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+    # PAGE_CACHE_LOCATION=redis://cache:6379/1
+    "pages": {
+        "BACKEND": os.getenv("PAGE_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("PAGE_CACHE_LOCATION", os.path.join(tempfile.gettempdir(), "roomfinder-pages")),
+        "TIMEOUT": int(os.getenv("PAGE_CACHE_TIMEOUT", "600")),
+        # The file cache drops a third of its entries when it is full
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))},
+    },
 }
 
+# Cache alias that stores the rendered dashboard charts
+DASHBOARD_CHART_CACHE = "default"
+
+# Cache alias that stores room_list / room_detail pages for anonymous visitors
+ROOM_PAGE_CACHE = "pages"
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -168,6 +206,81 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
+    # Files waiting for a background job (must be shared by all workers)
+    "staging": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": os.getenv("JOB_STAGING_ROOT", os.path.join(BASE_DIR, "staging"))},
+    },
+    # Room photos when ROOM_IMAGE_BACKEND is rooms.images.StorageImageBackend
+    "room_images": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": MEDIA_ROOT, "base_url": MEDIA_URL},
+    },
+}
+
+# Background jobs (see jobs/queue.py)
+JOBS_STAGING_STORAGE = "staging"
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+# First retry after this many seconds, then doubling up to the maximum
+JOBS_BACKOFF_SECONDS = int(os.getenv("JOBS_BACKOFF_SECONDS", "10"))
+JOBS_BACKOFF_MAX_SECONDS = int(os.getenv("JOBS_BACKOFF_MAX_SECONDS", "3600"))
+# A running job's worker refreshes its lock this often; a job silent for
+# JOBS_STALE_SECONDS (several heartbeats) lost its worker and is run again
+JOBS_HEARTBEAT_SECONDS = int(os.getenv("JOBS_HEARTBEAT_SECONDS", "60"))
+JOBS_STALE_SECONDS = int(os.getenv("JOBS_STALE_SECONDS", "900"))
+
+# Where room images are uploaded (see rooms/images.py) and how many
+# uploads of one request run at the same time
+ROOM_IMAGE_BACKEND = os.getenv("ROOM_IMAGE_BACKEND", "rooms.images.CloudinaryImageBackend")
+ROOM_IMAGE_UPLOAD_WORKERS = int(os.getenv("ROOM_IMAGE_UPLOAD_WORKERS", "4"))
+# Longest side (px) of an uploaded room photo after resizing
+ROOM_IMAGE_MAX_SIZE = int(os.getenv("ROOM_IMAGE_MAX_SIZE", "1600"))
+# Smaller copies stored next to it ("full" is the resized photo itself)
+ROOM_IMAGE_DERIVATIVES = {"thumb": 320, "card": 640}
+ROOM_IMAGE_STORAGE = "room_images"
+
+# Request monitoring (see monitoring/middleware.py)
+# Most queries a view may run (session and user lookups included). A
+# request over budget is logged as a warning, and the view's tests fail
+# (monitoring.testing.QueryBudgetMixin).
+QUERY_BUDGETS = {
+    "room_list": 4,
+    "room_detail": 6,
+    "my_bookings": 3,
+    "booking_list": 3,
+    "manage_bookings": 3,
+    "manage_rooms": 3,
+}
+# Requests slower than this (ms) are logged as warnings
+REQUEST_SLOW_MS = int(os.getenv("REQUEST_SLOW_MS", "1000"))
+
+# /metrics (see monitoring/prometheus.py). With several worker processes
+# METRICS_DIR must be a directory they all share (emptied on deploy);
+# each process writes its values there every METRICS_FLUSH_SECONDS.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+# Bearer token of the scraper; without one only staff users see /metrics
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+# One JSON line per request on "monitoring.requests". Only slow or
+# over-budget requests (WARNING) by default; REQUEST_LOG_LEVEL=INFO logs
+# every request.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "requests": {"class": "logging.StreamHandler", "formatter": "message"},
+    },
+    "loggers": {
+        "monitoring.requests": {
+            "handlers": ["requests"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
 import cloudinary
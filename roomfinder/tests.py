@@ -0,0 +1,194 @@
+import datetime
+
+import cloudinary
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rooms.models import Booking, Room, RoomImage
+from rooms.page_cache import page_cache
+
+from . import routers
+from .database import database_settings, replica_settings
+
+# Image URLs are built from the Cloudinary config, which needs a cloud name
+if not cloudinary.config().cloud_name:
+    cloudinary.config(cloud_name='roomfinder-test')
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+
+    def test_persistent_connections_by_default(self):
+        database = database_settings({'DB_PASSWORD': 'secret'})
+
+        self.assertEqual(database['HOST'], 'ep-icy-sea-ahntmauj-pooler.c-3.us-east-1.aws.neon.tech')
+        self.assertEqual(database['PASSWORD'], 'secret')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        # Neon's pooler takes no startup options and no server-side cursors
+        self.assertEqual(database['OPTIONS'], {'sslmode': 'require'})
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_direct_connection(self):
+        database = database_settings({
+            'DB_HOST': 'ep-icy-sea-ahntmauj.c-3.us-east-1.aws.neon.tech',
+            'DB_STATEMENT_TIMEOUT_MS': '30000',
+        })
+
+        self.assertEqual(database['OPTIONS']['options'], '-c statement_timeout=30000')
+        self.assertFalse(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+        database = database_settings({'DB_HOST': 'localhost', 'DB_DISABLE_SERVER_SIDE_CURSORS': 'True'})
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_pool(self):
+        database = database_settings({
+            'DB_POOL': 'True',
+            'DB_CONN_MAX_AGE': '600',
+            'DB_POOL_MAX_SIZE': '8',
+        })
+
+        # Django refuses persistent connections together with a pool
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertNotIn('options', database['OPTIONS'])
+        pool = database['OPTIONS']['pool']
+        self.assertEqual((pool['min_size'], pool['max_size']), (1, 8))
+        self.assertEqual(pool['timeout'], 10.0)
+
+    def test_replicas(self):
+        self.assertEqual(replica_settings({}), {})
+
+        replicas = replica_settings({'DB_REPLICA_HOSTS': 'replica-a.example, replica-b.example', 'DB_POOL': 'True'})
+        self.assertEqual(list(replicas), ['replica_1', 'replica_2'])
+        self.assertEqual(replicas['replica_2']['HOST'], 'replica-b.example')
+        self.assertEqual(replicas['replica_2']['NAME'], 'neondb')
+        self.assertIn('pool', replicas['replica_2']['OPTIONS'])
+        self.assertEqual(replicas['replica_2']['TEST'], {'MIRROR': 'default'})
+        # Decided per host: the primary is a pooler, the replicas are not
+        self.assertFalse(replicas['replica_2']['DISABLE_SERVER_SIDE_CURSORS'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    "replica" is a second connection to the test database: which of the
+    two connections ran a query shows where it was routed
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Added after the test runner's checks, which only know settings.DATABASES
+        default = connections['default'].settings_dict
+        connections.settings['replica'] = {**default, 'TEST': {**default['TEST'], 'MIRROR': 'default'}}
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.databases = {'default'}
+        super().tearDownClass()
+
+    def setUp(self):
+        page_cache().clear()
+        self.admin = admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.customer = User.objects.create_user('customer', password='pass12345')
+        self.room = Room.objects.create(
+            owner=admin, title='Test Room', description='A test room', price=5000,
+            location='Kathmandu', room_type='Single', owner_name='Owner',
+            contact_number='9800000000', available_from=datetime.date(2026, 1, 1),
+        )
+        RoomImage.objects.create(room=self.room, image='image/upload/v1/a.jpg')
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+            if response.streaming:
+                # Read the rows, as the server does after the view returned
+                response.content_bytes = b''.join(response.streaming_content)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        # Logged in, so the session is read (from the primary), and the
+        # room list is not served from the page cache
+        self.client.force_login(self.customer)
+        response, primary, replica = self.get(reverse('room_list'))
+
+        self.assertContains(response, 'Test Room')
+        self.assertEqual(primary, 1)
+        self.assertGreater(replica, 0)
+        # Room.cover builds a RoomImage for its room, which makes Django
+        # ask db_for_write: not a write
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_a_write_pins_the_user_to_the_primary(self):
+        self.client.force_login(self.customer)
+        self.assertEqual(self.get(reverse('my_bookings'))[1], 1)
+
+        response, primary, replica = self.get(reverse('book_room', args=[self.room.id]))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.filter(user=self.customer).count(), 1)
+        # Decorated with use_primary(): only the user, read before the
+        # view, comes from the replica
+        self.assertEqual(replica, 1)
+        self.assertEqual(response.cookies[routers.PIN_COOKIE]['max-age'], 10)
+
+        # Their next requests read their own booking from the primary
+        response, primary, replica = self.get(reverse('my_bookings'))
+        self.assertContains(response, 'Test Room')
+        self.assertEqual(replica, 0)
+
+        self.client.cookies.pop(routers.PIN_COOKIE)
+        self.assertEqual(self.get(reverse('my_bookings'))[1], 1)
+
+    def test_page_cache_is_filled_from_the_primary(self):
+        # A lagging replica would store the old page under the new version
+        response, primary, replica = self.get(reverse('room_detail', args=[self.room.id]))
+        self.assertContains(response, 'Test Room')
+        self.assertEqual(replica, 1)  # the conditional GET check only
+        self.assertGreater(primary, 0)
+
+        # Served from the cache
+        self.assertEqual(self.get(reverse('room_detail', args=[self.room.id]))[1:], (0, 1))
+
+    def test_streamed_exports_read_from_the_replica(self):
+        self.client.force_login(self.admin)
+        for url in (reverse('export_data', args=['rooms']), reverse('api_room_export')):
+            with self.subTest(url=url):
+                response, primary, replica = self.get(url)
+                self.assertIn(b'Test Room', response.content_bytes)
+                # At most the session (the API has none)
+                self.assertLessEqual(primary, 1)
+                self.assertGreater(replica, 0)
+
+    def test_primary_inside_transactions_and_use_primary(self):
+        routing = routers.ReadRouting('replica')
+        token = routing.activate()
+        try:
+            self.assertEqual(Room.objects.all().db, 'replica')
+            with transaction.atomic():
+                self.assertEqual(Room.objects.all().db, 'default')
+            with routers.use_primary():
+                self.assertEqual(Room.objects.all().db, 'default')
+            self.assertEqual(Room.objects.all().db, 'replica')
+
+            # Saving a room read from the replica writes to the primary,
+            # and reads after it come from the primary too
+            room = Room.objects.get(id=self.room.id)
+            self.assertEqual(room._state.db, 'replica')
+            room.title = 'Renamed'
+            with connections['default'].execute_wrapper(routing):
+                room.save()
+            self.assertEqual(Room.objects.get(id=room.id).title, 'Renamed')
+            self.assertTrue(routing.wrote)
+            self.assertEqual(Room.objects.all().db, 'default')
+        finally:
+            routers.ReadRouting.deactivate(token)
+
+        # Outside requests everything is read from the primary
+        self.assertEqual(Room.objects.all().db, 'default')
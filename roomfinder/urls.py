@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 # For built-in login/logout views
 from django.contrib.auth import views as auth_views
+from monitoring import views as monitoring_views
 
 urlpatterns = [
     # Admin site
@@ -32,6 +33,12 @@ urlpatterns = [
     # e.g., http://127.0.0.1:8000/rooms/  
     path('', include('rooms.urls')),
 
+    # Request metrics per view (staff only)
+    path('monitoring/', include('monitoring.urls')),
+
+    # Prometheus scrape endpoint (see monitoring/prometheus.py)
+    path('metrics', monitoring_views.metrics, name='metrics'),
+
     # Accounts app URLs (register, login, logout)
     path('accounts/', include('accounts.urls')),
     # This makes URLs like:
@@ -10,6 +10,7 @@ from .models import Room, RoomImage, Booking
 class RoomImageInline(admin.TabularInline):
     model = RoomImage   # Specify which model this inline is for
     extra = 1           # Number of extra empty forms to show for adding new images. Shows one blank image form by default; you can add more.
+    exclude = ('derivatives',)  # Smaller copies are made by a background job
 
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('room', 'user', 'booked_at', 'status')  # Columns to display in the admin list view
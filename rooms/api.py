@@ -0,0 +1,221 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from roomfinder.routers import keep_routing
+
+from .exports import rows_by_id
+from .filters import parse_room_filters, parse_sort, sort_ordering
+from .freshness import conditional_page, room_detail_freshness, room_list_freshness
+from .models import Room, RoomImage
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_rooms
+
+
+# =========================================================
+# READ-ONLY JSON API
+# =========================================================
+#
+#   GET /api/rooms/?location=Pokhara&sort=cheapest&fields=id,title,price
+#   GET /api/rooms/<id>/?fields=id,title,images
+#   GET /api/rooms/export/?room_type=Single
+#
+# The list accepts the same filters, search (?q=) and sorting as room_list
+# (see filters.py) and pages with a cursor: follow "next" until it is null.
+#
+# Rows are read with .values() and turned into dicts directly, no Room
+# objects are built. Only the columns behind the requested ?fields= are
+# selected. The export streams every matching room as one JSON array,
+# reading the rows in chunks, so memory use does not grow with the table.
+
+# Rooms per page: ?limit= can ask for fewer or more, up to MAX_PAGE_SIZE
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Rows read per database round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+
+# ---------------------------------------------
+# Fields
+# ---------------------------------------------
+
+def image_urls(image, derivatives):
+    """
+    {size: {"url", "width", "height"}} for a photo; the original only
+    ("full") if it has no derivatives yet.
+    """
+    if derivatives:
+        return {
+            size: {'url': copy['url'], 'width': copy.get('width'), 'height': copy.get('height')}
+            for size, copy in derivatives.items()
+        }
+    if isinstance(image, str):
+        image = RoomImage._meta.get_field('image').to_python(image)
+    return {'full': {'url': image.url, 'width': None, 'height': None}}
+
+
+def cover_urls(row):
+    cover = row['cover_image']
+    return image_urls(cover['image'], cover['derivatives']) if cover else None
+
+
+def column(name):
+    return (name,), lambda row: row[name]
+
+
+# API field -> (Room columns it needs, function(row) -> value)
+# "images" is filled in separately (one extra query), on the detail only.
+ROOM_FIELDS = {
+    'id': column('id'),
+    'title': column('title'),
+    'description': column('description'),
+    'price': column('price'),
+    'location': column('location'),
+    'room_type': column('room_type'),
+    'owner_name': column('owner_name'),
+    'contact_number': column('contact_number'),
+    'available_from': column('available_from'),
+    'created_at': column('created_at'),
+    'updated_at': column('updated_at'),
+    'image_count': column('image_count'),
+    'cover': (('cover_image',), cover_urls),
+}
+
+LIST_FIELDS = ('id', 'title', 'price', 'location', 'room_type', 'available_from', 'image_count', 'cover')
+DETAIL_FIELDS = tuple(ROOM_FIELDS) + ('images',)
+
+
+class FieldError(ValueError):
+    """
+    ?fields= names a field the API does not have
+    """
+
+
+def parse_fields(params, default, allowed):
+    """
+    The requested field names (in request order), or `default`
+    """
+    value = params.get('fields', '')
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    if not fields:
+        return list(default)
+
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise FieldError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def room_values(queryset, fields, extra_columns=()):
+    """
+    queryset.values() with just the columns behind `fields` (plus
+    `extra_columns`, e.g. the pagination ordering)
+    """
+    columns = [column for name in fields if name in ROOM_FIELDS for column in ROOM_FIELDS[name][0]]
+    return queryset.values(*dict.fromkeys(columns + list(extra_columns)))
+
+
+def serialize_room(row, fields):
+    return {name: ROOM_FIELDS[name][1](row) for name in fields if name in ROOM_FIELDS}
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+# ---------------------------------------------
+# Views
+# ---------------------------------------------
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def parse_limit(params):
+    try:
+        limit = int(params.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+@require_GET
+@conditional_page(room_list_freshness)
+def room_list_api(request):
+    try:
+        fields = parse_fields(request.GET, LIST_FIELDS, ROOM_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+
+    rooms = Room.objects.filter_by(**parse_room_filters(request.GET))
+    ordering = sort_ordering(parse_sort(request.GET))
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        rooms = search_rooms(rooms, query)
+        ordering = ('-search_rank',) + ordering
+
+    # The ordering columns are read too: the cursor is built from them
+    rows = room_values(rooms, fields, extra_columns=[name.lstrip('-') for name in ordering])
+    paginator = KeysetPaginator(rows, ordering=ordering, per_page=parse_limit(request.GET))
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return error('Invalid page cursor.', 400)
+
+    return JsonResponse({
+        'results': [serialize_room(row, fields) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+@require_GET
+@conditional_page(room_detail_freshness)
+def room_detail_api(request, id):
+    try:
+        fields = parse_fields(request.GET, DETAIL_FIELDS, DETAIL_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+
+    row = room_values(Room.objects.filter(pk=id), fields).first()
+    if row is None:
+        return error('No room found.', 404)
+
+    data = serialize_room(row, fields)
+    if 'images' in fields:
+        data['images'] = [
+            image_urls(image['image'], image['derivatives'])
+            for image in RoomImage.objects.filter(room=id).order_by('id').values('image', 'derivatives')
+        ]
+    return JsonResponse(data)
+
+
+def stream_json_array(rows, fields):
+    """
+    Yield a JSON array of serialized rows a piece at a time
+    """
+    encoder = DjangoJSONEncoder()
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',' if index else '') + encoder.encode(serialize_room(row, fields))
+    yield ']'
+
+
+@require_GET
+def room_export_api(request):
+    try:
+        fields = parse_fields(request.GET, LIST_FIELDS, ROOM_FIELDS)
+    except FieldError as exc:
+        return error(str(exc), 400)
+
+    rooms = Room.objects.filter_by(**parse_room_filters(request.GET))
+    # Chunks by id, with or without server-side cursors (see exports.py)
+    rows = rows_by_id(room_values(rooms, fields, extra_columns=['id']), chunk_size=EXPORT_CHUNK_SIZE)
+
+    return StreamingHttpResponse(keep_routing(stream_json_array(rows, fields)), content_type='application/json')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class RoomsConfig(AppConfig):
     name = 'rooms'
+
+    def ready(self):
+        # Connect the signal handlers that keep RoomStat up to date
+        from . import signals  # noqa: F401
@@ -0,0 +1,30 @@
+import statistics
+import time
+
+
+# =========================================================
+# HELPERS SHARED BY THE BENCHMARK COMMANDS
+# =========================================================
+
+def percentiles(timings):
+    """
+    p50 / p95 / p99 of a list of timings
+    """
+    if len(timings) < 2:
+        value = timings[0] if timings else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {'p50': statistics.median(timings), 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def time_queryset(queryset, runs):
+    """
+    Evaluate `queryset` `runs` times and return the timings in milliseconds
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        list(queryset.all())  # .all() makes a fresh, un-cached copy
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
@@ -0,0 +1,244 @@
+import functools
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from . import metrics, page_cache, stats
+from .models import Booking, Room
+
+
+# =========================================================
+# BOOKING RULES
+# =========================================================
+#
+# Every booking decision is made in a single query and guarded by the
+# database, so two requests arriving at the same time cannot both win:
+#
+#   - a user can request a room only once      -> unique (room, user)
+#   - a room can have only one approved booking -> partial unique constraint
+#
+# Approving also locks the booking and room rows (SELECT ... FOR UPDATE on
+# Postgres), so approvals for the same room run one after the other.
+# The check in that query may still miss an approval committed while it
+# waited for the lock (and SQLite has no row locks); the partial unique
+# constraint then rejects the second approval and it is reported as refused.
+
+
+class BookingRefused(Exception):
+    """
+    The booking cannot be made or changed. `message` is shown to the user.
+    """
+
+    def __init__(self, message, level='error'):
+        super().__init__(message)
+        self.message = message
+        self.level = level
+
+
+def approved_booking_exists():
+    return Exists(Booking.objects.filter(room=OuterRef('room'), status='Approved'))
+
+
+def request_booking(room_id, user):
+    """
+    Create a pending booking of a room for `user` and return it.
+
+    Raises Room.DoesNotExist or BookingRefused.
+    """
+    # Owner, "already booked" and "already requested" in one query
+    room = (
+        Room.objects
+        .filter(pk=room_id)
+        .annotate(
+            is_booked=Exists(Booking.objects.filter(room=OuterRef('pk'), status='Approved')),
+            already_requested=Exists(Booking.objects.filter(room=OuterRef('pk'), user=user)),
+        )
+        .values('owner_id', 'is_booked', 'already_requested')
+        .first()
+    )
+
+    if room is None:
+        raise Room.DoesNotExist(room_id)
+    if room['owner_id'] == user.pk:
+        raise BookingRefused("You cannot book your own room.")
+    if room['is_booked']:
+        raise BookingRefused("This room is already booked.")
+    if room['already_requested']:
+        raise BookingRefused("You already requested this room.", level='warning')
+
+    try:
+        return Booking.objects.create(room_id=room_id, user=user, status='Pending')
+    except IntegrityError:
+        # Another request from the same user got in first
+        raise BookingRefused("You already requested this room.", level='warning')
+
+
+def approve_booking(booking_id):
+    """
+    Approve a booking unless its room already has an approved booking.
+
+    Raises Booking.DoesNotExist or BookingRefused.
+    """
+    try:
+        with transaction.atomic():
+            # Lock the booking and its room, and check the room in the same query
+            booking = (
+                Booking.objects
+                .select_for_update(of=('self', 'room'))
+                .select_related('room')
+                .annotate(room_is_booked=approved_booking_exists())
+                .get(pk=booking_id)
+            )
+
+            if booking.status == 'Approved':
+                return booking
+            if booking.room_is_booked:
+                raise BookingRefused("Room already approved for another booking.")
+
+            booking.status = 'Approved'
+            booking.save()
+    except IntegrityError:
+        # A concurrent approval committed first (one_approved_booking_per_room)
+        raise BookingRefused("Room already approved for another booking.")
+
+    return booking
+
+
+def reject_booking(booking_id):
+    """
+    Reject a booking. Raises Booking.DoesNotExist.
+    """
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().get(pk=booking_id)
+        if booking.status != 'Rejected':
+            booking.status = 'Rejected'
+            booking.save()
+    return booking
+
+
+# =========================================================
+# BULK DECISIONS (manage_bookings)
+# =========================================================
+#
+# Many bookings are approved or rejected in one transaction with a few
+# set-based UPDATEs instead of one request per booking. Approving a
+# booking also rejects the other pending requests for that room.
+#
+# queryset.update() sends no signals, so the RoomStat counters, the
+# rooms' updated_at and the cached pages are updated here.
+
+# Result of each booking in decide_bookings()
+APPROVED = 'approved'
+REJECTED = 'rejected'
+AUTO_REJECTED = 'auto-rejected'
+ROOM_TAKEN = 'room already booked'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not found'
+
+
+def decide_bookings(booking_ids, action):
+    """
+    Approve (action='approve') or reject (action='reject') many bookings.
+
+    Returns {booking_id: result} for the requested bookings plus the
+    bookings rejected automatically because their room was approved.
+    Raises BookingRefused if a concurrent approval got in first.
+    """
+    if action not in ('approve', 'reject'):
+        raise ValueError(f'Unknown booking action: {action}')
+
+    try:
+        return _decide_bookings(sorted(set(booking_ids)), action)
+    except IntegrityError:
+        # one_approved_booking_per_room: nothing was changed
+        raise BookingRefused(
+            "Another approval for one of these rooms was saved at the same time. "
+            "Nothing was changed, please try again."
+        )
+
+
+def _decide_bookings(booking_ids, action):
+    with transaction.atomic():
+        # Lock the bookings and their rooms, and see which rooms are taken
+        selected = list(
+            Booking.objects
+            .select_for_update(of=('self', 'room'))
+            .select_related('room')
+            .only('id', 'status', 'room__location', 'room__room_type')
+            .filter(pk__in=booking_ids)
+            .annotate(room_is_booked=approved_booking_exists())
+            .order_by('id')
+        )
+
+        results = {booking_id: NOT_FOUND for booking_id in booking_ids}
+        changes = []  # (booking, new status)
+
+        if action == 'reject':
+            for booking in selected:
+                if booking.status == 'Rejected':
+                    results[booking.id] = UNCHANGED
+                else:
+                    results[booking.id] = REJECTED
+                    changes.append((booking, 'Rejected'))
+        else:
+            taken_rooms = {booking.room_id for booking in selected if booking.room_is_booked}
+            for booking in selected:
+                if booking.status == 'Approved':
+                    results[booking.id] = UNCHANGED
+                elif booking.room_id in taken_rooms:
+                    results[booking.id] = ROOM_TAKEN
+                else:
+                    # The first (oldest) selected booking of a room wins
+                    taken_rooms.add(booking.room_id)
+                    results[booking.id] = APPROVED
+                    changes.append((booking, 'Approved'))
+
+            # Competing pending requests for the newly approved rooms
+            # (including selected bookings that lost to an older one)
+            approved = [booking for booking, _status in changes]
+            competing = (
+                Booking.objects
+                .select_for_update(of=('self',))
+                .select_related('room')
+                .only('id', 'status', 'room__location', 'room__room_type')
+                .filter(room__in=[booking.room_id for booking in approved], status='Pending')
+                .exclude(pk__in=[booking.id for booking in approved])
+            )
+            for booking in competing:
+                results[booking.id] = AUTO_REJECTED
+                changes.append((booking, 'Rejected'))
+
+        apply_decisions(changes)
+
+    return results
+
+
+def apply_decisions(changes):
+    """
+    Write [(booking, new status)] with one UPDATE per status and do the
+    bookkeeping the signals would have done.
+    """
+    by_status = {}
+    deltas = {}
+    for booking, status in changes:
+        by_status.setdefault(status, []).append(booking.id)
+        category = (booking.room.location, booking.room.room_type)
+        deltas[category + (booking.status,)] = deltas.get(category + (booking.status,), 0) - 1
+        deltas[category + (status,)] = deltas.get(category + (status,), 0) + 1
+
+    for status, ids in by_status.items():
+        Booking.objects.filter(pk__in=ids).update(status=status)
+        metrics.bookings_changed(status, len(ids))
+
+    for (location, room_type, status), delta in deltas.items():
+        stats.record_bookings(location, room_type, status, delta)
+
+    # Only approvals (won or lost) are shown on the room pages
+    shown_rooms = {
+        booking.room_id for booking, status in changes
+        if 'Approved' in (booking.status, status)
+    }
+    if shown_rooms:
+        Room.objects.filter(pk__in=shown_rooms).touch()
+        for room_id in shown_rooms:
+            transaction.on_commit(functools.partial(page_cache.invalidate_room_pages, room_id))
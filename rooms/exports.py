@@ -0,0 +1,209 @@
+import csv
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Booking, Room
+
+
+# =========================================================
+# STREAMING DATA EXPORTS
+# =========================================================
+#
+#   /manage-bookings/export/bookings/?format=csv&from=2026-01-01&to=2026-01-31&status=Approved
+#   manage.py export_data rooms --format ndjson --status booked > rooms.ndjson
+#
+# Rows are read with .values() in chunks of CHUNK_SIZE rows by id (each
+# chunk starts after the last id of the one before) and written out one
+# line at a time, so exporting a million bookings needs no more memory
+# than exporting ten. Unlike .iterator(), this does not depend on
+# server-side cursors, which are off behind PgBouncer (see
+# roomfinder/database.py): without them psycopg loads the whole result.
+#
+# Filters:
+#   from / to   first and last day (inclusive) of booked_at / created_at
+#   status      bookings: Pending, Approved or Rejected
+#               rooms: "booked" (has an approved booking) or "available"
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched from the database per round trip
+CHUNK_SIZE = 2000
+
+
+class ExportError(ValueError):
+    """
+    Unknown export, format or filter value
+    """
+
+
+# Export name -> column name -> values() path (or annotation name)
+EXPORTS = {
+    'bookings': {
+        'id': 'id',
+        'status': 'status',
+        'booked_at': 'booked_at',
+        'room_id': 'room_id',
+        'room_title': 'room__title',
+        'room_location': 'room__location',
+        'room_type': 'room__room_type',
+        'room_price': 'room__price',
+        'user_id': 'user_id',
+        'username': 'user__username',
+        'user_email': 'user__email',
+    },
+    'rooms': {
+        'id': 'id',
+        'title': 'title',
+        'location': 'location',
+        'room_type': 'room_type',
+        'price': 'price',
+        'available_from': 'available_from',
+        'owner': 'owner__username',
+        'owner_name': 'owner_name',
+        'contact_number': 'contact_number',
+        'image_count': 'image_count',
+        'is_booked': 'is_booked',
+        'created_at': 'created_at',
+    },
+}
+
+STATUSES = {
+    'bookings': {choice for choice, _label in Booking.STATUS_CHOICES},
+    'rooms': {'booked', 'available'},
+}
+
+
+# ---------------------------------------------
+# Filters
+# ---------------------------------------------
+
+def parse_day(value, name):
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ExportError(f'{name} must be a date like 2026-01-31')
+    return day
+
+
+def parse_export_filters(kind, params):
+    """
+    Clean the from / to / status filters of `kind` from a dict or QueryDict.
+    Unlike the room_list filters, bad values are errors: an export that
+    silently ignored a filter would look complete.
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f'Unknown export {kind!r}')
+
+    status = params.get('status') or None
+    if status is not None and status not in STATUSES[kind]:
+        raise ExportError(f"status must be one of {', '.join(sorted(STATUSES[kind]))}")
+
+    return {
+        'start': parse_day(params.get('from'), 'from'),
+        'end': parse_day(params.get('to'), 'to'),
+        'status': status,
+    }
+
+
+def day_range(field, start, end):
+    """
+    Filter kwargs for `field` (a DateTimeField) between two dates, both
+    inclusive, in the current time zone. Plain comparisons (not __date)
+    so the column's index can be used.
+    """
+    lookups = {}
+    if start:
+        lookups[f'{field}__gte'] = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+    if end:
+        next_day = end + datetime.timedelta(days=1)
+        lookups[f'{field}__lt'] = timezone.make_aware(datetime.datetime.combine(next_day, datetime.time.min))
+    return lookups
+
+
+def export_queryset(kind, start=None, end=None, status=None):
+    """
+    values() queryset of an export, one dict per row, ordered by id
+    """
+    if kind == 'bookings':
+        rows = Booking.objects.filter(**day_range('booked_at', start, end))
+        if status:
+            rows = rows.filter(status=status)
+    else:
+        rows = Room.objects.filter(**day_range('created_at', start, end)).annotate(
+            is_booked=Exists(Booking.objects.filter(room=OuterRef('pk'), status='Approved')),
+        )
+        if status:
+            rows = rows.filter(is_booked=(status == 'booked'))
+
+    return rows.order_by('id').values(*EXPORTS[kind].values())
+
+
+def rows_by_id(queryset, chunk_size=None):
+    """
+    Yield the rows of a values() queryset (which must include 'id') in id
+    order, reading `chunk_size` (default CHUNK_SIZE) rows per query
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk.order_by('id')[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]['id']
+
+
+# ---------------------------------------------
+# Writers
+# ---------------------------------------------
+
+class Echo:
+    """
+    File-like object whose write() returns the line instead of storing it
+    (lets csv.writer produce one line at a time)
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(columns))
+    for row in rows:
+        yield writer.writerow([row[path] for path in columns.values()])
+
+
+def ndjson_lines(rows, columns):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({name: row[path] for name, path in columns.items()}) + '\n'
+
+
+def export_lines(kind, format, filters):
+    """
+    Iterator over the lines of an export (nothing is read before the
+    first line is asked for)
+    """
+    if format not in FORMATS:
+        raise ExportError(f"format must be one of {', '.join(FORMATS)}")
+
+    rows = rows_by_id(export_queryset(kind, **filters))
+    writer = csv_lines if format == 'csv' else ndjson_lines
+    return writer(rows, EXPORTS[kind])
+
+
+def export_filename(kind, format):
+    return f'{kind}-{timezone.localdate().isoformat()}.{format}'
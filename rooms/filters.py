@@ -0,0 +1,67 @@
+from django.utils.dateparse import parse_date
+
+
+# =========================================================
+# ROOM LIST FILTERS AND SORTING
+# =========================================================
+#
+# Shared by every view that lists rooms, so the HTML page and any JSON
+# endpoint accept exactly the same query parameters:
+#
+#   ?location=Pokhara&room_type=Single
+#   &min_price=5000&max_price=15000
+#   &available_by=2026-05-01
+#   &sort=cheapest
+
+# Sort options: name -> (label shown to users, keyset ordering)
+# Each ordering ends in "id" so it is unique (needed for paging) and
+# matches one of the Room indexes, so no separate sort step is needed.
+SORT_OPTIONS = {
+    'newest': ('Newest first', ('-created_at', '-id')),
+    'cheapest': ('Cheapest first', ('price', 'id')),
+}
+
+DEFAULT_SORT = 'newest'
+
+
+def parse_price(value):
+    """
+    A non-negative whole number, or None for empty / invalid input
+    """
+    try:
+        price = int(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+
+def parse_room_filters(params):
+    """
+    Clean filter values from a QueryDict (request.GET).
+    Missing or invalid values become None, which means "no filter".
+    """
+    available_by = params.get('available_by')
+    try:
+        available_by = parse_date(available_by) if available_by else None
+    except ValueError:
+        available_by = None
+
+    return {
+        'location': params.get('location') or None,
+        'room_type': params.get('room_type') or None,
+        'min_price': parse_price(params.get('min_price')),
+        'max_price': parse_price(params.get('max_price')),
+        'available_by': available_by,
+    }
+
+
+def parse_sort(params):
+    """
+    The requested sort option name (falls back to DEFAULT_SORT)
+    """
+    sort = params.get('sort')
+    return sort if sort in SORT_OPTIONS else DEFAULT_SORT
+
+
+def sort_ordering(sort):
+    return SORT_OPTIONS[sort][1]
@@ -0,0 +1,121 @@
+import functools
+import hashlib
+
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import page_cache
+from .filters import parse_room_filters
+from .models import Room
+
+
+# =========================================================
+# CONDITIONAL GET (ETag / Last-Modified)
+# =========================================================
+#
+# Browsers and CDNs send back the ETag / Last-Modified of the copy they
+# already have. A small "freshness" check tells whether the page has
+# changed since; if not, a bare 304 Not Modified is returned before the
+# page cache, the room queries or the template are touched.
+#
+#   - detail page: the room's updated_at (one query)
+#   - listing page: the listing version of the page cache and the time
+#     it was last increased (no query). Any room change gives every
+#     listing a new ETag, the same way it drops every cached listing.
+#     Only with a shared page cache: a per-process cache never sees the
+#     changes made in other processes, so there the newest updated_at and
+#     number of the matching rooms are queried instead (the count
+#     notices deleted rooms).
+#
+# The ETag also contains the user, because logged in users see their own
+# links and buttons, and responses carry "Vary: Cookie".
+
+# Increase when the templates change so old copies are not reused
+PAGE_VERSION = 1
+
+
+def has_pending_messages(request):
+    # A flash message must be shown, so the page has to be sent again
+    return CookieStorage.cookie_name in request.COOKIES
+
+
+# ---------------------------------------------
+# Freshness checks
+# ---------------------------------------------
+
+def room_detail_freshness(request, id):
+    """
+    (last modified, extra ETag data) for a room_detail page, or None
+    """
+    updated_at = Room.objects.filter(pk=id).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return updated_at, id
+
+
+def room_list_freshness(request):
+    """
+    (last modified, extra ETag data) for a room_list page, or None
+    """
+    if page_cache.is_shared():
+        return page_cache.listing_freshness()
+
+    # A search (?q=) only matches rooms whose text changed, which also
+    # changes their updated_at: the filters are enough
+    rooms = Room.objects.filter_by(**parse_room_filters(request.GET))
+    summary = rooms.aggregate(latest=Max('updated_at'), count=Count('id'))
+    if summary['latest'] is None:
+        return None
+    return summary['latest'], summary['count']
+
+
+# ---------------------------------------------
+# View decorator
+# ---------------------------------------------
+
+def conditional_page(freshness_func):
+    """
+    Answer conditional GETs for the decorated view from
+    `freshness_func(request, *args, **kwargs)`.
+    """
+    def get_freshness(request, *args, **kwargs):
+        # ETag and Last-Modified share one check per request
+        if not hasattr(request, '_page_freshness'):
+            request._page_freshness = (
+                None if has_pending_messages(request)
+                else freshness_func(request, *args, **kwargs)
+            )
+        return request._page_freshness
+
+    def etag(request, *args, **kwargs):
+        freshness = get_freshness(request, *args, **kwargs)
+        if freshness is None:
+            return None
+        last_modified, extra = freshness
+        user = request.user.pk if request.user.is_authenticated else 'anonymous'
+        data = f'{PAGE_VERSION}:{user}:{last_modified.isoformat()}:{extra}'
+        return hashlib.sha1(data.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        freshness = get_freshness(request, *args, **kwargs)
+        return freshness[0] if freshness else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            # Keep a copy but always ask whether it is still fresh
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+            else:
+                patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,323 @@
+import contextlib
+import functools
+import io
+import logging
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import cloudinary.uploader
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+from . import metrics, page_cache
+from .models import Room, RoomImage
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# ROOM IMAGE UPLOADS
+# =========================================================
+#
+# Saving RoomImage(image=<uploaded file>) uploads the file to Cloudinary
+# while the row is saved, one file after the other. Instead, all photos
+# added to a room together are uploaded in parallel on a small thread
+# pool first, and the rows are then inserted with one bulk_create.
+# This runs in a background job (see tasks.py), not in the request.
+#
+# If any upload fails, the files that did upload are deleted again, so
+# nothing is left behind in the storage.
+#
+# Every photo is stored in several sizes (settings.ROOM_IMAGE_DERIVATIVES
+# plus "full", at most ROOM_IMAGE_MAX_SIZE), listed in RoomImage.derivatives.
+# Templates pick one with {% responsive_image %} (templatetags/room_images.py),
+# so a listing card downloads a 640px copy instead of the original.
+#
+# Where the files go is decided by settings.ROOM_IMAGE_BACKEND, a class
+# with these methods:
+#
+#   upload(file) -> value stored in RoomImage.image ("image/upload/v1/x.jpg")
+#   delete(value)
+#   url(value)   -> public URL of an uploaded file
+#   open(value)  -> readable file (to make derivatives of older photos)
+
+
+class ImageUploadError(Exception):
+    """
+    One or more images could not be uploaded (none were kept)
+    """
+
+
+class CloudinaryImageBackend:
+    """
+    Uploads to Cloudinary, like CloudinaryField does on save
+    """
+
+    def upload(self, file):
+        if hasattr(file, 'seekable') and file.seekable():
+            file.seek(0)
+        resource = cloudinary.uploader.upload_resource(file, type='upload', resource_type='image')
+        return resource.get_prep_value()
+
+    def delete(self, value):
+        resource = self.resource(value)
+        cloudinary.uploader.destroy(resource.public_id, type=resource.type, resource_type=resource.resource_type)
+
+    def url(self, value):
+        return self.resource(value).build_url(secure=True)
+
+    def open(self, value):
+        with urllib.request.urlopen(self.url(value), timeout=30) as response:
+            return ContentFile(response.read(), name=value.rsplit('/', 1)[-1])
+
+    def resource(self, value):
+        return RoomImage._meta.get_field('image').parse_cloudinary_resource(value)
+
+
+class StorageImageBackend:
+    """
+    Saves to a Django storage, settings.STORAGES[ROOM_IMAGE_STORAGE]
+    (the local media folder by default: for development and tests)
+    """
+
+    def __init__(self):
+        self.storage = storages[settings.ROOM_IMAGE_STORAGE]
+
+    def upload(self, file):
+        return self.storage.save(f'room-images/{file.name}', file)
+
+    def delete(self, value):
+        self.storage.delete(self.name(value))
+
+    def url(self, value):
+        return self.storage.url(self.name(value))
+
+    def open(self, value):
+        return self.storage.open(self.name(value), 'rb')
+
+    def name(self, value):
+        # RoomImage.image (a CloudinaryField) reads a stored "room-images/x.jpg"
+        # back as "image/upload/room-images/x.jpg"
+        resource = RoomImage._meta.get_field('image').parse_cloudinary_resource(value)
+        return f'{resource.public_id}.{resource.format}' if resource.format else resource.public_id
+
+
+def get_image_backend():
+    return import_string(settings.ROOM_IMAGE_BACKEND)()
+
+
+# ---------------------------------------------
+# Uploading
+# ---------------------------------------------
+
+def discard_uploads(values, backend=None):
+    """
+    Delete already uploaded files (best effort, failures are only logged)
+    """
+    backend = backend or get_image_backend()
+    for value in values:
+        try:
+            backend.delete(value)
+        except Exception:
+            logger.exception("Could not delete uploaded image %s", value)
+
+
+def upload_files(files, backend=None, max_workers=None):
+    """
+    Upload `files` in parallel and return their stored values in the same
+    order. Raises ImageUploadError (after deleting the successful uploads)
+    if any upload fails.
+    """
+    files = list(files)
+    if not files:
+        return []
+
+    backend = backend or get_image_backend()
+    max_workers = min(max_workers or settings.ROOM_IMAGE_UPLOAD_WORKERS, len(files))
+
+    def upload(file):
+        with metrics.IMAGE_UPLOAD_SECONDS.time():
+            return backend.upload(file)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='room-image') as pool:
+        futures = [pool.submit(upload, file) for file in files]
+
+    values, errors = [], []
+    for file, future in zip(files, futures):
+        try:
+            values.append(future.result())
+        except Exception as exc:
+            errors.append((getattr(file, 'name', file), exc))
+
+    if errors:
+        discard_uploads(values, backend)
+        names = ', '.join(str(name) for name, _exc in errors)
+        raise ImageUploadError(f"Could not upload: {names}") from errors[0][1]
+
+    return values
+
+
+@contextlib.contextmanager
+def uploaded_images(files, backend=None):
+    """
+    Upload `files` and yield their values. If the block fails (e.g. the
+    room could not be saved) the uploads are deleted again.
+
+        with uploaded_images(request.FILES.getlist("images")) as values:
+            with transaction.atomic():
+                room = Room.objects.create(...)
+                attach_images(room, values)
+    """
+    backend = backend or get_image_backend()
+    values = upload_files(files, backend)
+    try:
+        yield values
+    except BaseException:
+        discard_uploads(values, backend)
+        raise
+
+
+# ---------------------------------------------
+# Resizing
+# ---------------------------------------------
+
+class Rendition(NamedTuple):
+    file: ContentFile
+    width: int | None
+    height: int | None
+
+
+def image_sizes():
+    """
+    Derivative name -> longest side in px, largest first
+    """
+    sizes = {'full': settings.ROOM_IMAGE_MAX_SIZE, **settings.ROOM_IMAGE_DERIVATIVES}
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+def render_derivatives(file, sizes=None):
+    """
+    Return {name: Rendition} with a JPEG copy of `file` for every size in
+    `sizes` (default image_sizes()), EXIF rotation applied and EXIF data
+    dropped. Images are never enlarged.
+
+    Files Pillow cannot read only get a "full" copy, unchanged.
+    """
+    sizes = sizes or image_sizes()
+    stem = file.name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    try:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    except (UnidentifiedImageError, OSError):
+        file.seek(0)
+        return {'full': Rendition(ContentFile(file.read(), name=file.name.rsplit('/', 1)[-1]), None, None)}
+
+    renditions = {}
+    for name, max_size in sizes.items():
+        # Each size is made from the previous (larger) one
+        image.thumbnail((max_size, max_size))
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=85, optimize=True)
+        filename = f'{stem}.jpg' if name == 'full' else f'{stem}-{name}.jpg'
+        renditions[name] = Rendition(ContentFile(output.getvalue(), name=filename), *image.size)
+    return renditions
+
+
+def shrink_image(file, max_size=None):
+    """
+    Return an in-memory JPEG copy of `file` no larger than
+    max_size x max_size (settings.ROOM_IMAGE_MAX_SIZE)
+    """
+    max_size = max_size or settings.ROOM_IMAGE_MAX_SIZE
+    return render_derivatives(file, {'full': max_size})['full'].file
+
+
+@contextlib.contextmanager
+def uploaded_derivatives(photos, backend=None):
+    """
+    Upload all renditions of `photos` (a list of render_derivatives()
+    results) in one parallel batch and yield a RoomImage.derivatives dict
+    per photo. Like uploaded_images(), the uploads are deleted again if
+    the block fails.
+    """
+    backend = backend or get_image_backend()
+    names = [(index, name) for index, photo in enumerate(photos) for name in photo]
+    files = [photos[index][name].file for index, name in names]
+
+    with uploaded_images(files, backend) as values:
+        derivatives = [{} for _photo in photos]
+        for (index, name), value in zip(names, values):
+            rendition = photos[index][name]
+            derivatives[index][name] = {
+                'value': value,
+                'url': backend.url(value),
+                'width': rendition.width,
+                'height': rendition.height,
+            }
+        yield derivatives
+
+
+# ---------------------------------------------
+# Saving the rows
+# ---------------------------------------------
+
+def attach_images(room, values, derivatives=None):
+    """
+    Insert RoomImage rows for uploaded `values` (and their `derivatives`,
+    one dict per value) with one bulk_create.
+
+    bulk_create sends no signals, so the room's updated_at and its cached
+    pages are updated here.
+    """
+    if not values:
+        return []
+
+    derivatives = derivatives or [{} for _value in values]
+    images = RoomImage.objects.bulk_create(
+        RoomImage(room=room, image=value, derivatives=sizes)
+        for value, sizes in zip(values, derivatives)
+    )
+
+    images_added(room.pk, images)
+    Room.objects.filter(pk=room.pk).touch()
+    transaction.on_commit(functools.partial(page_cache.invalidate_room_pages, room.pk))
+    transaction.on_commit(page_cache.invalidate_listing_pages)
+    return images
+
+
+# ---------------------------------------------
+# Room cover and photo count
+# ---------------------------------------------
+#
+# Room.cover_image (a copy of the first photo) and Room.image_count are
+# updated in place with UPDATE ... SET image_count = image_count + n, so
+# two jobs adding photos to the same room at once do not lose a count.
+# Single saves and deletes call these from signals.py; bulk_create /
+# bulk_update callers call them themselves.
+
+def images_added(room_id, images):
+    Room.objects.filter(pk=room_id).update(image_count=F('image_count') + len(images))
+    # New photos come after the existing ones: only a room without a
+    # cover takes the first of them
+    first = min(images, key=lambda image: image.pk)
+    Room.objects.filter(pk=room_id, cover_image__isnull=True).update(cover_image=first.as_cover())
+
+
+def images_changed(images):
+    # e.g. new derivatives: refresh the copy if one of them is the cover
+    for image in images:
+        Room.objects.filter(pk=image.room_id, cover_image__id=image.pk).update(cover_image=image.as_cover())
+
+
+def images_removed(room_id, image_ids):
+    Room.objects.filter(pk=room_id).update(image_count=Greatest(F('image_count') - len(image_ids), 0))
+    if Room.objects.filter(pk=room_id, cover_image__id__in=image_ids).exists():
+        first = RoomImage.objects.filter(room=room_id).exclude(pk__in=image_ids).order_by('id').first()
+        Room.objects.filter(pk=room_id).update(cover_image=first.as_cover() if first else None)
@@ -0,0 +1,290 @@
+import csv
+import functools
+import json
+import math
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.utils.dateparse import parse_date
+
+from . import bulk, metrics, page_cache, search, stats, tasks
+from .models import Room
+
+
+# =========================================================
+# BULK ROOM IMPORT
+# =========================================================
+#
+#   manage.py import_rooms rooms.csv --owner landlord --images-dir photos/
+#
+# Rows are read one at a time from CSV (header row) or NDJSON (one JSON
+# object per line), checked against the Room fields (choices, lengths,
+# numbers, dates) and inserted in batches, one transaction per batch
+# (COPY on PostgreSQL, bulk_create elsewhere: see bulk.py). A batch that
+# was inserted stays inserted if a later one fails.
+#
+# Bulk inserts send no signals, so each batch also adds its RoomStat
+# totals, search terms (not on PostgreSQL, which fills the rooms'
+# search_document column itself) and /metrics count, and drops the
+# cached listing pages.
+#
+# On PostgreSQL most of a batch's time is the COPY itself: the server
+# maintains the room indexes and computes search_document with its GIN
+# index (roughly a quarter of the import time).
+#
+# Rows with errors are skipped and reported (line number, field, message);
+# the other rows are still imported.
+
+# Columns of an import file; "images" is optional
+IMPORT_FIELDS = (
+    'title', 'description', 'price', 'location', 'room_type',
+    'owner_name', 'contact_number', 'available_from',
+)
+
+# Separator between file names in the CSV "images" column
+IMAGE_SEPARATOR = ';'
+
+
+class RowError(Exception):
+    """
+    One input row is invalid. `errors` is a list of (field, message).
+    """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+# ---------------------------------------------
+# Reading
+# ---------------------------------------------
+
+def read_csv(file):
+    """
+    Yield (line number, row dict) from a CSV file with a header row
+    """
+    reader = csv.DictReader(file)
+    for row in reader:
+        # line_num is the last line read (a quoted value may span lines)
+        yield reader.line_num, row
+
+
+def read_ndjson(file):
+    """
+    Yield (line number, row dict or RowError) from an NDJSON file
+    """
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowError([('', f'Invalid JSON: {exc}')])
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError([('', 'Expected a JSON object')])
+            continue
+        yield line_number, row
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+def detect_format(path):
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+# ---------------------------------------------
+# Validation
+# ---------------------------------------------
+
+def normalize_choice(value, choices):
+    # "pokhara" -> "Pokhara"; unknown values are left for the choices check
+    for choice, _label in choices:
+        if choice.lower() == value.lower():
+            return choice
+    return value
+
+
+@functools.cache
+def field_rules(name):
+    """
+    (field, allowed choices, max length, integer range) of a Room field
+    """
+    field = Room._meta.get_field(name)
+    choices = frozenset(choice for choice, _label in field.choices) if field.choices else None
+    limits = None
+    if isinstance(field, models.IntegerField):
+        limits = (
+            max((v.limit_value for v in field.validators if isinstance(v, MinValueValidator)), default=-math.inf),
+            min((v.limit_value for v in field.validators if isinstance(v, MaxValueValidator)), default=math.inf),
+        )
+    return field, choices, field.max_length, limits
+
+
+def clean_value(name, value):
+    """
+    Clean one value like Room.<name>.clean() would, raising ValidationError.
+
+    The common checks are done inline (clean() per value is the slowest
+    part of a large import); anything that fails them is passed to the
+    field's clean(), which gives the usual error message.
+    """
+    field, choices, max_length, limits = field_rules(name)
+
+    if limits is not None:
+        try:
+            number = int(value)
+        except ValueError:
+            pass
+        else:
+            if limits[0] <= number <= limits[1]:
+                return number
+    elif isinstance(field, models.DateField):
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is not None:
+            return day
+    elif value and (max_length is None or len(value) <= max_length) and (choices is None or value in choices):
+        return value
+
+    return field.clean(value, None)
+
+
+def clean_row(row, images_dir=None):
+    """
+    Return (Room field values, image paths) for a valid row, or raise RowError.
+
+    Values are checked against the Room model fields (the same checks as
+    full_clean, without building the model first).
+    """
+    errors, values = [], {}
+
+    for name in IMPORT_FIELDS:
+        value = row.get(name)
+        value = '' if value is None else str(value).strip()
+
+        if name == 'location':
+            value = normalize_choice(value, Room.LOCATION_CHOICES)
+        elif name == 'room_type':
+            value = normalize_choice(value, Room.ROOM_TYPE)
+
+        try:
+            values[name] = clean_value(name, value)
+        except ValidationError as exc:
+            errors.extend((name, message) for message in exc.messages)
+
+    images = row.get('images') or []
+    if isinstance(images, str):
+        images = [name.strip() for name in images.split(IMAGE_SEPARATOR) if name.strip()]
+
+    paths = []
+    if not isinstance(images, list) or not all(isinstance(name, str) for name in images):
+        # NDJSON can hold anything here
+        errors.append(('images', 'Expected a list of file names'))
+    elif images and images_dir is None:
+        errors.append(('images', 'Images given but no --images-dir'))
+    elif images:
+        root = os.path.realpath(images_dir)
+        for name in images:
+            path = os.path.realpath(os.path.join(root, name))
+            # No escaping the images folder ("../../etc/passwd")
+            if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+                errors.append(('images', f'No such image file: {name}'))
+            else:
+                paths.append(path)
+
+    if errors:
+        raise RowError(errors)
+    return values, paths
+
+
+# ---------------------------------------------
+# Importing
+# ---------------------------------------------
+
+class ImportResult:
+    """
+    Counts of an import run
+    """
+
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.images = 0
+
+    @property
+    def rows(self):
+        return self.imported + self.failed
+
+
+def insert_batch(batch, owner):
+    """
+    Insert one batch of (values, image paths) in a transaction.
+    Returns the number of photos queued.
+    """
+    rooms = [Room(owner=owner, **values) for values, _paths in batch]
+
+    with transaction.atomic():
+        bulk.insert_objects(rooms)
+        stats.record_rooms_added(rooms)
+        search.index_new_rooms(rooms)
+        metrics.rooms_added(len(rooms))
+
+        queued = 0
+        for room, (_values, paths) in zip(rooms, batch):
+            if paths:
+                # Resized and uploaded by the rooms.add_images job
+                files = [File(open(path, 'rb'), name=os.path.basename(path)) for path in paths]
+                try:
+                    tasks.queue_room_images(room, files)
+                finally:
+                    for file in files:
+                        file.close()
+                queued += len(paths)
+
+        transaction.on_commit(page_cache.invalidate_listing_pages)
+
+    return queued
+
+
+def import_rooms(rows, owner, batch_size=1000, images_dir=None, dry_run=False, on_error=None):
+    """
+    Validate and insert rows from read_csv() / read_ndjson().
+
+    on_error(line_number, errors) is called for every rejected row.
+    With dry_run=True nothing is written. Returns an ImportResult.
+    """
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            result.images += insert_batch(batch, owner)
+        result.imported += len(batch)
+        batch.clear()
+
+    for line_number, row in rows:
+        try:
+            if isinstance(row, RowError):
+                raise row
+            batch.append(clean_row(row, images_dir))
+        except RowError as exc:
+            result.failed += 1
+            if on_error:
+                on_error(line_number, exc.errors)
+            continue
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return result
@@ -0,0 +1,281 @@
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from .benchmarking import percentiles
+from .filters import SORT_OPTIONS
+from .models import Booking, Room
+from .seeding import BENCHMARK_ADMIN, BENCHMARK_PASSWORD, seeded_customers
+
+
+# =========================================================
+# USER JOURNEYS (manage.py benchmark_journeys)
+# =========================================================
+#
+# A journey is what one kind of visitor does, as a few requests:
+#
+#   browse     anonymous: room list, then a filtered / searched / sorted list
+#   detail     anonymous: one room's page
+#   book       customer:  room page, then "Book" (a new pending booking)
+#   approve    admin:     approve one pending booking
+#   dashboard  admin:     the dashboard
+#
+# Journeys run through a Session: the Django test client in this process
+# (InProcessSession) or real HTTP requests to a running server
+# (HttpSession, e.g. a local gunicorn). Every request is timed; a journey
+# result has its throughput and p50 / p95 / p99 latency per request.
+#
+# They run against data made by seed_benchmark_data and change it (new
+# bookings, approvals): use a database made for benchmarking.
+
+# Responses a step may answer with; anything else is an error
+OK_STATUSES = {200, 302, 304}
+
+# Room ids the journeys pick from
+ROOM_SAMPLE_SIZE = 5000
+
+
+# ---------------------------------------------
+# Sessions
+# ---------------------------------------------
+
+class InProcessSession:
+    """
+    Requests through the Django test client (no network, no server)
+    """
+
+    def __init__(self, user=None):
+        self.client = Client()
+        if user is not None:
+            self.client.force_login(user)
+
+    def get(self, path):
+        return self.client.get(path).status_code
+
+    def close(self):
+        # A worker thread's own database connections
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+class HttpSession:
+    """
+    Real HTTP requests to `base_url`, logged in through the login form
+    """
+
+    def __init__(self, base_url, user=None):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.http = requests.Session()
+        if user is not None:
+            self.login(user)
+
+    def login(self, user):
+        url = self.base_url + reverse('login')
+        self.http.get(url)
+        response = self.http.post(url, data={
+            'username': user.username,
+            'password': BENCHMARK_PASSWORD,
+            'role': 'admin' if user.is_staff else 'customer',
+            'csrfmiddlewaretoken': self.http.cookies.get('csrftoken', ''),
+        }, headers={'Referer': url}, allow_redirects=False)
+        if response.status_code != 302:
+            raise RuntimeError(f'Could not log in as {user.username} ({response.status_code})')
+
+    def get(self, path):
+        return self.http.get(self.base_url + path, allow_redirects=False).status_code
+
+    def close(self):
+        self.http.close()
+
+
+# ---------------------------------------------
+# Journeys
+# ---------------------------------------------
+
+class JourneyData:
+    """
+    What the journeys pick from: room ids, pending bookings, users
+    """
+
+    def __init__(self, seed=42):
+        rng = random.Random(seed)
+        room_ids = list(Room.objects.values_list('id', flat=True))
+        self.room_ids = rng.sample(room_ids, min(ROOM_SAMPLE_SIZE, len(room_ids)))
+        self.customers = list(seeded_customers().order_by('id'))
+        self.admin = User.objects.filter(username=BENCHMARK_ADMIN).first()
+        if not self.room_ids or not self.customers or self.admin is None:
+            raise ValueError('No benchmark data: run manage.py seed_benchmark_data first.')
+
+        # Each pending booking can be approved once
+        self.lock = threading.Lock()
+        self.pending = list(
+            Booking.objects.filter(status='Pending', user__in=self.customers)
+            .values_list('id', flat=True)[:100000]
+        )
+        rng.shuffle(self.pending)
+
+    def take_pending_booking(self):
+        with self.lock:
+            return self.pending.pop() if self.pending else None
+
+
+def browse(data, rng):
+    yield 'room_list', reverse('room_list')
+    params = {
+        'location': rng.choice(Room.LOCATION_CHOICES)[0],
+        'room_type': rng.choice(Room.ROOM_TYPE)[0],
+    }
+    if rng.random() < 0.5:
+        params['q'] = rng.choice(['balcony', 'wifi', 'mountain view', 'parking'])
+    else:
+        params['sort'] = rng.choice(list(SORT_OPTIONS))
+    yield 'room_list filtered', reverse('room_list') + '?' + urllib.parse.urlencode(params)
+
+
+def detail(data, rng):
+    yield 'room_detail', reverse('room_detail', args=[rng.choice(data.room_ids)])
+
+
+def book(data, rng):
+    room_id = rng.choice(data.room_ids)
+    yield 'room_detail', reverse('room_detail', args=[room_id])
+    yield 'book_room', reverse('book_room', args=[room_id])
+
+
+def approve(data, rng):
+    booking_id = data.take_pending_booking()
+    if booking_id is not None:
+        yield 'approve_booking', reverse('approve_booking', args=[booking_id])
+
+
+def dashboard(data, rng):
+    yield 'dashboard', '/dashboard/'
+
+
+# name -> (who runs it, steps)
+JOURNEYS = {
+    'browse': ('anonymous', browse),
+    'detail': ('anonymous', detail),
+    'book': ('customer', book),
+    'approve': ('admin', approve),
+    'dashboard': ('admin', dashboard),
+}
+
+
+# ---------------------------------------------
+# Running
+# ---------------------------------------------
+
+def session_user(role, data, worker):
+    if role == 'admin':
+        return data.admin
+    if role == 'customer':
+        return data.customers[worker % len(data.customers)]
+    return None
+
+
+def run_journey(name, make_session, data, iterations, concurrency=1, seed=42):
+    """
+    Run journey `name` `iterations` times, spread over `concurrency`
+    threads (one session each). Returns its result dict.
+    """
+    role, steps = JOURNEYS[name]
+    timings = {}  # step -> [ms]
+    errors = {}   # step -> count
+    lock = threading.Lock()
+
+    def work(worker, count):
+        rng = random.Random(f'{seed}-{name}-{worker}')
+        session = make_session(session_user(role, data, worker))
+        try:
+            for _ in range(count):
+                for step, path in steps(data, rng):
+                    start = time.perf_counter()
+                    status = session.get(path)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        timings.setdefault(step, []).append(elapsed)
+                        if status not in OK_STATUSES:
+                            errors[step] = errors.get(step, 0) + 1
+        finally:
+            session.close()
+
+    shares = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+    threads = [threading.Thread(target=work, args=(i, share)) for i, share in enumerate(shares) if share]
+    started = time.perf_counter()
+    if len(threads) == 1:
+        # In this thread: the in-process client then shares its connection
+        # (and its transaction, in tests)
+        threads[0].run()
+    else:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    seconds = time.perf_counter() - started
+
+    all_timings = [ms for step_timings in timings.values() for ms in step_timings]
+    return {
+        'requests': len(all_timings),
+        'errors': sum(errors.values()),
+        'seconds': round(seconds, 3),
+        'throughput': round(len(all_timings) / seconds, 2) if seconds else 0.0,
+        **rounded(percentiles(all_timings)),
+        'steps': {
+            step: {'requests': len(step_timings), 'errors': errors.get(step, 0), **rounded(percentiles(step_timings))}
+            for step, step_timings in timings.items()
+        },
+    }
+
+
+def rounded(values):
+    return {name: round(value, 2) for name, value in values.items()}
+
+
+@contextlib.contextmanager
+def local_gunicorn(workers, timeout=30, env=None):
+    """
+    Start gunicorn with `workers` processes on a free local port (same
+    settings as this process, plus environment variables `env`) and yield
+    its base URL
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    url = f'http://127.0.0.1:{port}'
+
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'roomfinder.wsgi',
+         '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(url + reverse('login'), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=timeout)
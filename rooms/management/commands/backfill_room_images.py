@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = "Fill Room.cover_image and Room.image_count from the RoomImage rows (for rooms added before they existed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rooms per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        room_ids = list(Room.objects.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(room_ids), batch_size):
+            with transaction.atomic():
+                Room.objects.filter(pk__in=room_ids[start:start + batch_size]).refresh_image_fields()
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {len(room_ids)} rooms."))
@@ -0,0 +1,98 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from rooms import journeys
+
+
+# Connection mode -> environment of the gunicorn it runs in (see
+# roomfinder/database.py)
+MODES = {
+    'new': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the same journeys against a local gunicorn once per database "
+        "connection mode (a new connection per request, persistent "
+        "connections, a psycopg pool) and print requests per second. "
+        "The settings must build DATABASES with database_settings(), "
+        "so the DB_* variables of each mode reach the workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma separated modes (default: all)')
+        parser.add_argument(
+            '--journeys', default='browse,detail,dashboard',
+            help='Comma separated journeys to run (default: the read-only ones)',
+        )
+        parser.add_argument('--iterations', type=int, default=200, help='Runs of each journey per mode')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--concurrency', type=int, help='Sessions at the same time (default: --workers)')
+        parser.add_argument('--output', help='Also save the results as JSON here')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Connection modes only apply to PostgreSQL.')
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        names = [name.strip() for name in options['journeys'].split(',') if name.strip()]
+        unknown = [mode for mode in modes if mode not in MODES] + [name for name in names if name not in journeys.JOURNEYS]
+        if unknown:
+            raise CommandError(f"Unknown mode(s) or journey(s): {', '.join(unknown)}")
+
+        try:
+            data = journeys.JourneyData()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        concurrency = options['concurrency'] or options['workers']
+        results = {}  # mode -> journey -> result
+        for mode in modes:
+            self.stdout.write(f"Mode {mode}: gunicorn with {options['workers']} worker(s)...")
+            with journeys.local_gunicorn(options['workers'], env=MODES[mode]) as url:
+                make_session = lambda user: journeys.HttpSession(url, user)  # noqa: E731
+                # Not timed: lets every worker start (and import) first
+                journeys.run_journey(names[0], make_session, data, concurrency, concurrency=concurrency)
+                results[mode] = {
+                    name: journeys.run_journey(
+                        name, make_session, data, options['iterations'], concurrency=concurrency,
+                    )
+                    for name in names
+                }
+
+        self.print_results(names, results)
+
+        if options['output']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'database_host': settings.DATABASES['default'].get('HOST'),
+                    'workers': options['workers'],
+                    'concurrency': concurrency,
+                    'iterations': options['iterations'],
+                    'modes': {mode: MODES[mode] for mode in modes},
+                    'results': results,
+                }, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    def print_results(self, names, results):
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== REQUESTS PER SECOND (p95 ms) ==="))
+        self.stdout.write(f"{'journey':<12}" + ''.join(f"{mode:>22}" for mode in results))
+        for name in names:
+            cells = ''.join(
+                f"{result[name]['throughput']:>12.1f} ({result[name]['p95']:>6.1f})"
+                for result in results.values()
+            )
+            self.stdout.write(f"{name:<12}{cells}")
+        errors = sum(result[name]['errors'] for result in results.values() for name in names)
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{errors} request(s) failed"))
@@ -0,0 +1,144 @@
+import contextlib
+import json
+import os
+import subprocess
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from rooms import journeys
+from rooms.models import Booking, Room, RoomImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the user journeys (browse, detail, book, approve, dashboard) "
+        "in this process or against a server, print throughput and "
+        "p50/p95/p99 per journey and save the results as JSON. "
+        "Needs data from seed_benchmark_data; bookings are added and approved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journeys', default=','.join(journeys.JOURNEYS),
+            help='Comma separated journeys to run (default: all)',
+        )
+        parser.add_argument('--iterations', type=int, default=200, help='Runs of each journey')
+        parser.add_argument('--concurrency', type=int, default=1, help='Sessions running at the same time')
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--url', help='Base URL of a running server (default: in this process)')
+        target.add_argument('--gunicorn', type=int, metavar='WORKERS', help='Start a local gunicorn with WORKERS processes')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--output', help='Results file (default: benchmark-results/<time>-<target>.json)')
+        parser.add_argument('--compare', help='Earlier results file to compare with')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['journeys'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in journeys.JOURNEYS]
+        if unknown:
+            raise CommandError(f"Unknown journey(s): {', '.join(unknown)}")
+
+        try:
+            data = journeys.JourneyData(seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        target = 'gunicorn' if options['gunicorn'] else 'http' if options['url'] else 'in-process'
+        with self.server(options) as url:
+            if url:
+                make_session = lambda user: journeys.HttpSession(url, user)  # noqa: E731
+            else:
+                make_session = journeys.InProcessSession
+
+            results = {}
+            for name in names:
+                self.stdout.write(f"Running {name} x {options['iterations']}...")
+                results[name] = journeys.run_journey(
+                    name, make_session, data, options['iterations'],
+                    concurrency=options['concurrency'], seed=options['seed'],
+                )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'target': target,
+            'url': options['url'],
+            'gunicorn_workers': options['gunicorn'],
+            'concurrency': options['concurrency'],
+            'iterations': options['iterations'],
+            'database': connection.vendor,
+            'data': {
+                'rooms': Room.objects.count(),
+                'images': RoomImage.objects.count(),
+                'users': User.objects.count(),
+                'bookings': Booking.objects.count(),
+            },
+            'journeys': results,
+        }
+
+        self.print_results(results)
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.print_comparison(json.load(file), report)
+
+        path = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmark-results', f"{timezone.now():%Y%m%d-%H%M%S}-{target}.json",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results saved to {path}"))
+
+    def server(self, options):
+        if options['gunicorn']:
+            self.stdout.write(f"Starting gunicorn with {options['gunicorn']} worker(s)...")
+            return journeys.local_gunicorn(options['gunicorn'])
+        return contextlib.nullcontext(options['url'])
+
+    # ---------------------------------------------
+    # Output
+    # ---------------------------------------------
+
+    def print_results(self, results):
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== JOURNEYS (latency per request, ms) ==="))
+        self.stdout.write(
+            f"{'journey':<12} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12} {result['requests']:>9} {result['errors']:>7} {result['throughput']:>8.1f} "
+                f"{result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f}"
+            )
+
+    def print_comparison(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== COMPARED WITH {before.get('created_at', '?')} ({before.get('revision') or 'unknown revision'}) ==="
+        ))
+        self.stdout.write(f"{'journey':<12} {'req/s':>18} {'p95 ms':>20}")
+        for name, result in after['journeys'].items():
+            old = before.get('journeys', {}).get(name)
+            if old is None:
+                continue
+            self.stdout.write(
+                f"{name:<12} {old['throughput']:>7.1f} -> {result['throughput']:>7.1f} "
+                f"{old['p95']:>8.2f} -> {result['p95']:>8.2f} ({change(old['p95'], result['p95'])})"
+            )
+
+
+def change(old, new):
+    if not old:
+        return 'n/a'
+    return f'{(new - old) / old * 100:+.0f}%'
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
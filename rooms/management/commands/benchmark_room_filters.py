@@ -0,0 +1,106 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rooms.benchmarking import percentiles, time_queryset
+from rooms.models import Room
+from rooms.seeding import seed_rooms
+
+
+# Indexes that are dropped for the "before" run
+TRIGRAM_INDEX = 'room_location_trgm_idx'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N rooms and compare room filter queries without and with the "
+        "search indexes (EXPLAIN plan and p50/p95 latency). "
+        "Everything is rolled back at the end unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10000, help='Number of rooms to seed')
+        parser.add_argument('--runs', type=int, default=50, help='Timed runs per query')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rooms')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rooms']} rooms...")
+            seed_rooms(options['rooms'])
+            self.analyze()
+
+            # "Before": drop the indexes inside a savepoint, then roll back
+            with transaction.atomic():
+                self.drop_indexes()
+                self.analyze()
+                self.stdout.write(self.style.MIGRATE_HEADING("\n=== WITHOUT INDEXES ==="))
+                before = self.run_queries(options['runs'])
+                transaction.set_rollback(True)
+
+            self.analyze()
+            self.stdout.write(self.style.MIGRATE_HEADING("\n=== WITH INDEXES ==="))
+            after = self.run_queries(options['runs'])
+
+            self.print_summary(before, after)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    # ---------------------------------------------
+    # Queries that mirror real room_list usage
+    # ---------------------------------------------
+
+    def queries(self):
+        newest = ('-created_at', '-id')
+        return {
+            'location + type, newest first': (
+                Room.objects.filter_by(location='Pokhara', room_type='Double').order_by(*newest)[:12]
+            ),
+            'location contains (case-insensitive)': (
+                Room.objects.filter(location__icontains='okha').order_by(*newest)[:12]
+            ),
+            'location + type, price band, cheapest': (
+                Room.objects.filter(location='Kathmandu', room_type='Single', price__range=(5000, 15000))
+                .order_by('price')[:12]
+            ),
+            'available by date': (
+                Room.objects.filter(available_from__lte=datetime.date(2026, 1, 15)).order_by('available_from')[:12]
+            ),
+            'newest page': Room.objects.order_by(*newest)[:12],
+        }
+
+    def run_queries(self, runs):
+        results = {}
+        for name, queryset in self.queries().items():
+            self.stdout.write(self.style.SQL_KEYWORD(f"\n-- {name}"))
+            self.stdout.write(queryset.explain())
+
+            results[name] = percentiles(time_queryset(queryset, runs))
+        return results
+
+    def print_summary(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING("\n=== LATENCY (ms) ==="))
+        self.stdout.write(f"{'query':<42} {'p50 before':>11} {'p95 before':>11} {'p50 after':>10} {'p95 after':>10}")
+        for name in before:
+            b, a = before[name], after[name]
+            self.stdout.write(f"{name:<42} {b['p50']:>11.2f} {b['p95']:>11.2f} {a['p50']:>10.2f} {a['p95']:>10.2f}")
+
+    # ---------------------------------------------
+    # Helpers
+    # ---------------------------------------------
+
+    def drop_indexes(self):
+        names = [index.name for index in Room._meta.indexes]
+        if connection.vendor == 'postgresql':
+            names.append(TRIGRAM_INDEX)
+
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+
+    def analyze(self):
+        # Refresh planner statistics so EXPLAIN reflects the seeded data
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Room._meta.db_table}")
+
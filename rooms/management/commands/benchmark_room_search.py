@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from rooms.benchmarking import percentiles, time_queryset
+from rooms.models import Room
+from rooms.search import search_rooms, tokenize
+from rooms.seeding import seed_rooms
+
+
+# Searches a tenant might type: common words, a prefix ("bal") and a rare
+# word (seeded titles end in "#<number>", so "4242" matches a single room)
+SEARCHES = ['balcony', 'mountain view', 'wifi parking', 'Cozy Single', 'bal', '4242']
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N rooms and compare ranked index search with a plain "
+        "title/description icontains scan (p50/p95 latency). "
+        "Everything is rolled back at the end unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=100000, help='Number of rooms to seed')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per search')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rooms')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding and indexing {options['rooms']} rooms...")
+            seed_rooms(options['rooms'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            self.stdout.write(
+                f"\n{'search':<16} {'matches':>8} {'scan p50':>9} {'scan p95':>9} "
+                f"{'index p50':>10} {'index p95':>10}"
+            )
+            for text in SEARCHES:
+                scan = self.scan_queryset(text).order_by('-created_at', '-id')[:12]
+                indexed = search_rooms(Room.objects.all(), text).order_by('-search_rank', '-created_at', '-id')[:12]
+                matches = search_rooms(Room.objects.all(), text).count()
+
+                before = percentiles(time_queryset(scan, options['runs']))
+                after = percentiles(time_queryset(indexed, options['runs']))
+                self.stdout.write(
+                    f"{text:<16} {matches:>8} {before['p50']:>9.2f} {before['p95']:>9.2f} "
+                    f"{after['p50']:>10.2f} {after['p95']:>10.2f}"
+                )
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def scan_queryset(self, text):
+        # What a search without the index would do: LIKE '%word%' on every row
+        rooms = Room.objects.all()
+        for word in tokenize(text):
+            rooms = rooms.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        return rooms
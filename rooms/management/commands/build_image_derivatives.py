@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from rooms.models import RoomImage
+from rooms.tasks import queue_derivatives
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue jobs that make the thumb/card/full copies of room photos "
+        "uploaded before they existed (run_workers does the work)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Photos per job')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        image_ids = list(
+            RoomImage.objects.filter(derivatives={}).order_by('id').values_list('id', flat=True)
+        )
+
+        for start in range(0, len(image_ids), batch_size):
+            queue_derivatives(image_ids[start:start + batch_size])
+
+        jobs = -(-len(image_ids) // batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Queued {len(image_ids)} photos in {jobs} jobs."))
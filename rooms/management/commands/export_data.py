@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms import exports
+
+
+class Command(BaseCommand):
+    help = "Stream bookings or rooms as CSV or NDJSON to a file or stdout (constant memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--from', dest='from', help='First day (YYYY-MM-DD) of booked_at / created_at')
+        parser.add_argument('--to', dest='to', help='Last day (YYYY-MM-DD), inclusive')
+        parser.add_argument('--status', help='Bookings: Pending/Approved/Rejected. Rooms: booked/available')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        kind, format = options['kind'], options['format']
+        try:
+            filters = exports.parse_export_filters(kind, options)
+            lines = exports.export_lines(kind, format, filters)
+        except exports.ExportError as exc:
+            raise CommandError(str(exc))
+
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        # newline='' keeps the CSV writer's \r\n line endings as they are
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            count = 0
+            for line in lines:
+                output.write(line)
+                count += 1
+
+        rows = count - 1 if format == 'csv' else count
+        self.stderr.write(f"Wrote {rows} {kind} to {options['output']}.")
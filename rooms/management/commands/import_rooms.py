@@ -0,0 +1,70 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms import importing
+
+
+class Command(BaseCommand):
+    help = (
+        "Import rooms from a CSV (with header row) or NDJSON file for one owner. "
+        "Invalid rows are skipped and listed in the error report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file')
+        parser.add_argument('--owner', required=True, help='Username of the landlord the rooms belong to')
+        parser.add_argument('--format', choices=sorted(importing.READERS), help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rooms per INSERT / transaction')
+        parser.add_argument('--images-dir', help='Folder with the files named in the "images" column')
+        parser.add_argument('--report', help='Write rejected rows (line, field, error) to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate, write nothing')
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['owner']!r}")
+
+        format = options['format'] or importing.detect_format(options['path'])
+        report = open(options['report'], 'w', newline='', encoding='utf-8') if options['report'] else None
+        report_writer = csv.writer(report) if report else None
+        if report_writer:
+            report_writer.writerow(['line', 'field', 'error'])
+
+        def on_error(line_number, errors):
+            for field, message in errors:
+                if report_writer:
+                    report_writer.writerow([line_number, field, message])
+                else:
+                    self.stderr.write(f"line {line_number}: {field or 'row'}: {message}")
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                result = importing.import_rooms(
+                    importing.READERS[format](file),
+                    owner,
+                    batch_size=options['batch_size'],
+                    images_dir=options['images_dir'],
+                    dry_run=options['dry_run'],
+                    on_error=on_error,
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as exc:
+            # Not a row error: the rest of the file cannot be read.
+            # Batches before this point are already committed.
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+        finally:
+            if report:
+                report.close()
+        elapsed = time.perf_counter() - started
+
+        verb = 'Checked' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.imported} rooms, rejected {result.failed} rows "
+            f"({result.rows / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+        if result.images:
+            self.stdout.write(f"Queued {result.images} photos; run_workers will upload them.")
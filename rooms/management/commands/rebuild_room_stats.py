@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from rooms.stats import rebuild_room_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the RoomStat table from the Room and Booking tables."
+
+    def handle(self, *args, **options):
+        categories = rebuild_room_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt room stats for {categories} categories."))
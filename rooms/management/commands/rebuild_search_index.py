@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from rooms.search import rebuild_search_index, uses_search_terms
+
+
+class Command(BaseCommand):
+    help = "Rebuild the room search index (RoomSearchTerm) from every room's title and description."
+
+    def handle(self, *args, **options):
+        rooms = rebuild_search_index()
+        if not uses_search_terms():
+            self.stdout.write(self.style.SUCCESS(
+                "PostgreSQL searches the rooms' search_document column; no terms to build."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Indexed {rooms} rooms."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms.seeding import SCALES, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty (benchmark) database with rooms, photos, users and "
+        "bookings at one of a few scales, for benchmark_journeys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Size of the data set')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding the {options['scale']} data set: {SCALES[options['scale']]}")
+        try:
+            counts = seed_benchmark_data(options['scale'], seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
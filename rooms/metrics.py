@@ -0,0 +1,44 @@
+import functools
+
+from django.db import transaction
+
+from monitoring.prometheus import Counter, Histogram
+
+
+# =========================================================
+# ROOM AND BOOKING METRICS (/metrics)
+# =========================================================
+#
+# Counted when the change commits, so a rolled back booking or import
+# batch is not counted. Single saves are counted from signals.py, bulk
+# changes where they are made (booking_service.py, importing.py).
+
+BOOKINGS = Counter('roomfinder_bookings_total', 'Bookings created, approved and rejected', ['event'])
+ROOMS_ADDED = Counter('roomfinder_rooms_added_total', 'Rooms added (one by one or imported)')
+IMAGE_UPLOAD_SECONDS = Histogram(
+    'roomfinder_image_upload_seconds', 'Time to upload one room photo file',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# Booking status -> event counted when a booking changes to it
+STATUS_EVENTS = {
+    'Approved': 'approved',
+    'Rejected': 'rejected',
+}
+
+
+def count_on_commit(counter, *labels, amount=1):
+    transaction.on_commit(functools.partial(counter.inc, *labels, amount=amount))
+
+
+def bookings_created(count=1):
+    count_on_commit(BOOKINGS, 'created', amount=count)
+
+
+def bookings_changed(status, count=1):
+    if status in STATUS_EVENTS:
+        count_on_commit(BOOKINGS, STATUS_EVENTS[status], amount=count)
+
+
+def rooms_added(count=1):
+    count_on_commit(ROOMS_ADDED, amount=count)
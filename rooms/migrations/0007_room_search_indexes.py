@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Trigram index for case-insensitive "contains" search on location.
+# Django's location__icontains compiles to UPPER("location"::text) LIKE ...
+# on Postgres, so the index is built on exactly that expression.
+# Other databases, and servers without the pg_trgm extension, skip it.
+def create_location_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS room_location_trgm_idx ON rooms_room '
+        'USING gin (UPPER("location"::text) gin_trgm_ops)'
+    )
+
+
+def drop_location_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS room_location_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_alter_room_image_alter_roomimage_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['location', 'room_type', 'price'], name='room_loc_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['available_from'], name='room_available_from_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['-created_at', '-id'], name='room_created_id_idx'),
+        ),
+        migrations.RunPython(create_location_trigram_index, drop_location_trigram_index),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:29
+
+from django.db import migrations, models
+
+
+# Frozen copy of rooms.stats.compute_stat_rows as it was when this
+# migration was written: later changes to the module must not change it
+BOOKING_STATUS_FIELDS = {
+    'Pending': 'pending_bookings',
+    'Approved': 'approved_bookings',
+    'Rejected': 'rejected_bookings',
+}
+
+
+def compute_stat_rows(Room, Booking):
+    rows = {}
+
+    room_totals = (
+        Room.objects
+        .values_list('location', 'room_type')
+        .annotate(
+            count=models.Count('id'), total=models.Sum('price'),
+            low=models.Min('price'), high=models.Max('price'),
+        )
+        .order_by()
+    )
+    for location, room_type, count, total, low, high in room_totals:
+        rows[(location, room_type)] = {
+            'room_count': count,
+            'price_sum': total or 0,
+            'price_min': low,
+            'price_max': high,
+        }
+
+    booking_counts = {
+        field: models.Count('id', filter=models.Q(status=status))
+        for status, field in BOOKING_STATUS_FIELDS.items()
+    }
+    booking_totals = (
+        Booking.objects
+        .values('room__location', 'room__room_type')
+        .annotate(**booking_counts)
+        .order_by()
+    )
+    for row in booking_totals:
+        key = (row['room__location'], row['room__room_type'])
+        fields = rows.setdefault(key, {'room_count': 0, 'price_sum': 0})
+        for field in BOOKING_STATUS_FIELDS.values():
+            fields[field] = row[field]
+
+    return rows
+
+
+# Fill the new table from the existing rooms and bookings
+def build_room_stats(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    Booking = apps.get_model('rooms', 'Booking')
+    RoomStat = apps.get_model('rooms', 'RoomStat')
+
+    rows = compute_stat_rows(Room, Booking)
+    RoomStat.objects.bulk_create(
+        RoomStat(location=location, room_type=room_type, **fields)
+        for (location, room_type), fields in rows.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0007_room_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=50)),
+                ('room_type', models.CharField(max_length=20)),
+                ('room_count', models.PositiveIntegerField(default=0)),
+                ('pending_bookings', models.PositiveIntegerField(default=0)),
+                ('approved_bookings', models.PositiveIntegerField(default=0)),
+                ('rejected_bookings', models.PositiveIntegerField(default=0)),
+                ('price_sum', models.BigIntegerField(default=0)),
+                ('price_min', models.PositiveIntegerField(blank=True, null=True)),
+                ('price_max', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location', 'room_type'), name='unique_room_stat_category')],
+            },
+        ),
+        migrations.RunPython(build_room_stats, migrations.RunPython.noop),
+    ]
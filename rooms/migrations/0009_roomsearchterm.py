@@ -0,0 +1,71 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:31
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the rooms.search tokenizer as it was when this migration
+# was written: later changes to the module must not change it
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+MAX_TERM_LENGTH = 50
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'at', 'for', 'in', 'is', 'it', 'near',
+    'of', 'on', 'or', 'the', 'to', 'with',
+}
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall((text or '').lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def room_terms(title, description):
+    weights = Counter()
+    for word in tokenize(title):
+        weights[word] += TITLE_WEIGHT
+    for word in tokenize(description):
+        weights[word] += DESCRIPTION_WEIGHT
+    return weights
+
+
+# Index the rooms that already exist
+def index_existing_rooms(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomSearchTerm = apps.get_model('rooms', 'RoomSearchTerm')
+
+    for room in Room.objects.only('id', 'title', 'description').iterator():
+        RoomSearchTerm.objects.bulk_create(
+            RoomSearchTerm(room_id=room.pk, term=term, weight=min(weight, 32767))
+            for term, weight in room_terms(room.title, room.description).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_roomstat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=50)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='rooms.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'term'), name='unique_room_search_term')],
+            },
+        ),
+        migrations.RunPython(index_existing_rooms, migrations.RunPython.noop),
+    ]
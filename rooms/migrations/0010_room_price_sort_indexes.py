@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0009_roomsearchterm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='room',
+            name='room_loc_type_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['location', 'room_type', 'price', 'id'], name='room_loc_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['location', 'room_type', '-created_at', '-id'], name='room_loc_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['price', 'id'], name='room_price_id_idx'),
+        ),
+    ]
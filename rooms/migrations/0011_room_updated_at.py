@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+# Existing rooms have not changed since they were created
+def copy_created_at(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    Room.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0010_room_price_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of rooms.stats.compute_stat_rows as it was when this
+# migration was written: later changes to the module must not change it
+BOOKING_STATUS_FIELDS = {
+    'Pending': 'pending_bookings',
+    'Approved': 'approved_bookings',
+    'Rejected': 'rejected_bookings',
+}
+
+
+def compute_stat_rows(Room, Booking):
+    rows = {}
+
+    room_totals = (
+        Room.objects
+        .values_list('location', 'room_type')
+        .annotate(
+            count=models.Count('id'), total=models.Sum('price'),
+            low=models.Min('price'), high=models.Max('price'),
+        )
+        .order_by()
+    )
+    for location, room_type, count, total, low, high in room_totals:
+        rows[(location, room_type)] = {
+            'room_count': count,
+            'price_sum': total or 0,
+            'price_min': low,
+            'price_max': high,
+        }
+
+    booking_counts = {
+        field: models.Count('id', filter=models.Q(status=status))
+        for status, field in BOOKING_STATUS_FIELDS.items()
+    }
+    booking_totals = (
+        Booking.objects
+        .values('room__location', 'room__room_type')
+        .annotate(**booking_counts)
+        .order_by()
+    )
+    for row in booking_totals:
+        key = (row['room__location'], row['room__room_type'])
+        fields = rows.setdefault(key, {'room_count': 0, 'price_sum': 0})
+        for field in BOOKING_STATUS_FIELDS.values():
+            fields[field] = row[field]
+
+    return rows
+
+
+# Existing data may break the new constraints (the old checks were racy):
+#   - duplicate requests of a user for a room: keep the approved one,
+#     otherwise the oldest, and delete the rest
+#   - several approved bookings for a room: keep the oldest, reject the rest
+# RoomStat is rebuilt afterwards because migrations send no signals.
+def remove_duplicate_bookings(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    Booking = apps.get_model('rooms', 'Booking')
+    RoomStat = apps.get_model('rooms', 'RoomStat')
+
+    changed = False
+
+    seen = set()
+    duplicates = []
+    bookings = (
+        Booking.objects
+        .order_by('room_id', 'user_id', models.Case(
+            models.When(status='Approved', then=0), default=1,
+        ), 'id')
+        .values_list('id', 'room_id', 'user_id')
+    )
+    for booking_id, room_id, user_id in bookings.iterator():
+        if (room_id, user_id) in seen:
+            duplicates.append(booking_id)
+        seen.add((room_id, user_id))
+    if duplicates:
+        Booking.objects.filter(id__in=duplicates).delete()
+        changed = True
+
+    approved_rooms = set()
+    extra_approvals = []
+    approved = Booking.objects.filter(status='Approved').order_by('room_id', 'id')
+    for booking_id, room_id in approved.values_list('id', 'room_id').iterator():
+        if room_id in approved_rooms:
+            extra_approvals.append(booking_id)
+        approved_rooms.add(room_id)
+    if extra_approvals:
+        Booking.objects.filter(id__in=extra_approvals).update(status='Rejected')
+        changed = True
+
+    if changed:
+        RoomStat.objects.all().delete()
+        RoomStat.objects.bulk_create(
+            RoomStat(location=location, room_type=room_type, **fields)
+            for (location, room_type), fields in compute_stat_rows(Room, Booking).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0011_room_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('room', 'user'), name='unique_booking_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Approved')), fields=('room',), name='one_approved_booking_per_room'),
+        ),
+    ]
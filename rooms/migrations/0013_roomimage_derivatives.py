@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0012_booking_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
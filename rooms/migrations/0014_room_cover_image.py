@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0013_roomimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='cover_image',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+# PostgreSQL only: a stored, generated tsvector of title (weight A) and
+# description (weight D) with a GIN index, used by rooms.search. It is
+# not a model field: the database keeps it up to date on every write, and
+# Django never reads or writes it. Other databases search RoomSearchTerm.
+def add_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE rooms_room ADD COLUMN search_document tsvector GENERATED ALWAYS AS ('
+        "setweight(to_tsvector('simple'::regconfig, COALESCE(title, '')), 'A') || "
+        "setweight(to_tsvector('simple'::regconfig, COALESCE(description, '')), 'D')"
+        ') STORED'
+    )
+    schema_editor.execute('CREATE INDEX room_search_document_idx ON rooms_room USING gin (search_document)')
+
+
+def remove_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE rooms_room DROP COLUMN IF EXISTS search_document')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0015_booking_booked_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_document, remove_search_document),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0016_room_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['location', 'price', 'id'], name='room_loc_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['location', '-created_at', '-id'], name='room_loc_created_idx'),
+        ),
+    ]
@@ -1,10 +1,94 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 # User model is used for authentication (login/register users)
 
 # Room model represents a room listing in the database
 from cloudinary.models import CloudinaryField
 
+
+# Custom queryset with reusable query paths for Room
+class RoomQuerySet(models.QuerySet):
+
+    def for_listing(self):
+        """
+        Rooms ready to be shown as listing cards.
+
+        - Loads the owner in the same query (select_related)
+        - The cover photo is stored on the room itself (room.cover), so the
+          images table is not read at all
+
+        The number of queries stays the same however many rooms are listed.
+        """
+        return self.select_related('owner')
+
+    def filter_by(self, location=None, room_type=None, min_price=None,
+                  max_price=None, available_by=None):
+        """
+        Apply the room_list search filters (empty values are ignored)
+
+        - min_price / max_price: monthly price band (inclusive)
+        - available_by: only rooms available on or before this date
+        """
+        rooms = self
+
+        if location:
+            # The dropdown sends an exact choice, which can use the
+            # (location, room_type, ...) indexes; free text falls back to
+            # a case-insensitive "contains" search (trigram index on Postgres)
+            choice = Room.match_location(location)
+            if choice:
+                rooms = rooms.filter(location=choice)
+            else:
+                rooms = rooms.filter(location__icontains=location)
+
+        if room_type:
+            rooms = rooms.filter(room_type=room_type)
+
+        if min_price is not None:
+            rooms = rooms.filter(price__gte=min_price)
+
+        if max_price is not None:
+            rooms = rooms.filter(price__lte=max_price)
+
+        if available_by:
+            rooms = rooms.filter(available_from__lte=available_by)
+
+        return rooms
+
+    def refresh_image_fields(self):
+        """
+        Recompute cover_image and image_count of these rooms from their
+        RoomImage rows (manage.py backfill_room_images). Returns the number
+        of rooms. Uses bulk_update, so no signals are sent.
+        """
+        rooms = list(self.only('pk'))
+        room_ids = [room.pk for room in rooms]
+        counts = dict(
+            RoomImage.objects.filter(room__in=room_ids)
+            .values_list('room').annotate(count=models.Count('id'))
+        )
+        first_ids = (
+            RoomImage.objects.filter(room__in=room_ids)
+            .values('room').annotate(first=models.Min('id')).values('first')
+        )
+        covers = {image.room_id: image for image in RoomImage.objects.filter(pk__in=first_ids)}
+
+        for room in rooms:
+            room.image_count = counts.get(room.pk, 0)
+            cover = covers.get(room.pk)
+            room.cover_image = cover.as_cover() if cover else None
+        self.model.objects.bulk_update(rooms, ['cover_image', 'image_count'])
+        return len(rooms)
+
+    def touch(self):
+        """
+        Mark the rooms as changed (updated_at = now) without saving them.
+        update() sends no signals, so RoomStat and the search index are untouched.
+        """
+        return self.update(updated_at=timezone.now())
+
+
 class Room(models.Model):
 
     # Choices for room type (used as dropdown in forms)
@@ -57,12 +141,76 @@ class Room(models.Model):
     # Date and time when the room listing was created automatically
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Date and time of the last change to the room, its images or its
+    # approved booking (used for ETag / Last-Modified, see freshness.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Copy of the first photo (RoomImage.as_cover()) and the number of
+    # photos, so listings need not read the images table. Kept up to date
+    # by signals and by the bulk image code in images.py.
+    cover_image = models.JSONField(null=True, blank=True, editable=False)
+    image_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Room.objects.for_listing() etc.
+    objects = RoomQuerySet.as_manager()
+
+    class Meta:
+        # Indexes matching how rooms are searched and sorted
+        # Every room_list sort order ends in id, so the indexes do too:
+        # rows come out of the index already sorted (no separate sort step)
+        indexes = [
+            # location + type filter, cheapest first (also price bands)
+            models.Index(fields=['location', 'room_type', 'price', 'id'], name='room_loc_type_price_idx'),
+            # location + type filter, newest first
+            models.Index(fields=['location', 'room_type', '-created_at', '-id'], name='room_loc_type_created_idx'),
+            # location filter without a type, cheapest first (also price bands)
+            models.Index(fields=['location', 'price', 'id'], name='room_loc_price_idx'),
+            # location filter without a type, newest first
+            models.Index(fields=['location', '-created_at', '-id'], name='room_loc_created_idx'),
+            # Cheapest first / price band without location filter
+            models.Index(fields=['price', 'id'], name='room_price_id_idx'),
+            # "available by" date filtering
+            models.Index(fields=['available_from'], name='room_available_from_idx'),
+            # Newest-first paging on room_list (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='room_created_id_idx'),
+        ]
+        # A trigram index for case-insensitive location search is created
+        # in migration 0007 (Postgres only)
+
+    @classmethod
+    def match_location(cls, value):
+        """
+        Return the LOCATION_CHOICES value equal to `value` ignoring case, or None
+        """
+        for choice, _label in cls.LOCATION_CHOICES:
+            if choice.lower() == value.strip().lower():
+                return choice
+        return None
+
     # String representation of the room object
     # This is shown in Django admin panel
 
     def __str__(self):
         return self.title
 
+    @property
+    def cover(self):
+        """
+        The cover photo as an (unsaved) RoomImage built from cover_image,
+        without a query. None if the room has no photos.
+        """
+        if not self.cover_image:
+            return None
+        image = RoomImage(pk=self.cover_image['id'], room=self, derivatives=self.cover_image['derivatives'])
+        image.image = RoomImage._meta.get_field('image').to_python(self.cover_image['image'])
+        return image
+
+    # Saving runs in a transaction so the RoomStat counters (updated by
+    # signals) are always committed together with the room
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 # RoomImage model to store multiple images for each room
 
 
@@ -71,9 +219,29 @@ class RoomImage(models.Model):
         Room, related_name='images', on_delete=models.CASCADE)
     image = CloudinaryField('image')  # changed here
 
+    # Smaller copies made when the photo is processed (see images.py):
+    # {"thumb": {"value": ..., "url": ..., "width": 320, "height": 240}, ...}
+    # Empty for photos that have not been processed yet.
+    derivatives = models.JSONField(default=dict, blank=True)
+
     def __str__(self):
         return f"Image for {self.room.title}"
 
+    def as_cover(self):
+        """
+        What Room.cover_image stores about this photo
+        """
+        return {
+            'id': self.pk,
+            'image': self._meta.get_field('image').get_prep_value(self.image),
+            'derivatives': self.derivatives,
+        }
+
+    # Saved in a transaction together with the room's cover and photo count
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 # Booking model to store room bookings made by users
 
 
@@ -122,3 +290,80 @@ class Booking(models.Model):
     # Useful for Django admin and debugging
     def __str__(self):
         return f"{self.user.username} → {self.room.title} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # Date-range exports (see exports.py)
+            models.Index(fields=['booked_at'], name='booking_booked_at_idx'),
+        ]
+        constraints = [
+            # One request per user per room
+            models.UniqueConstraint(fields=['room', 'user'], name='unique_booking_per_user'),
+            # At most one approved booking per room (see booking_service.py)
+            models.UniqueConstraint(
+                fields=['room'],
+                condition=models.Q(status='Approved'),
+                name='one_approved_booking_per_room',
+            ),
+        ]
+
+    # Saved in a transaction together with the RoomStat counters
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+# RoomSearchTerm is a small inverted index over room titles and descriptions
+# Each row says "this word appears in this room" with a weight
+# (title words count more than description words).
+# It is rebuilt for a room whenever the room is saved (see search.py).
+
+
+class RoomSearchTerm(models.Model):
+    room = models.ForeignKey(Room, related_name='search_terms', on_delete=models.CASCADE)
+
+    # Lower-cased word; db_index also gives Postgres a LIKE 'prefix%' index
+    term = models.CharField(max_length=50, db_index=True)
+
+    # How strongly the word describes the room (higher = better match)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'term'], name='unique_room_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → room {self.room_id}"
+
+
+# RoomStat stores pre-computed dashboard numbers per (location, room type)
+# It is kept up to date by signals (see signals.py), so the dashboard reads
+# a handful of rows instead of counting the whole rooms table.
+# "manage.py rebuild_room_stats" recomputes it from scratch.
+
+
+class RoomStat(models.Model):
+    location = models.CharField(max_length=50)
+    room_type = models.CharField(max_length=20)
+
+    # Number of rooms in this category
+    room_count = models.PositiveIntegerField(default=0)
+
+    # Number of bookings per status for rooms in this category
+    pending_bookings = models.PositiveIntegerField(default=0)
+    approved_bookings = models.PositiveIntegerField(default=0)
+    rejected_bookings = models.PositiveIntegerField(default=0)
+
+    # Price totals (min/max are empty when there are no rooms)
+    price_sum = models.BigIntegerField(default=0)
+    price_min = models.PositiveIntegerField(null=True, blank=True)
+    price_max = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'room_type'], name='unique_room_stat_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.location} / {self.room_type}: {self.room_count} rooms"
@@ -0,0 +1,187 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from roomfinder.routers import use_primary
+
+
+# =========================================================
+# CACHED PAGES FOR ANONYMOUS VISITORS
+# =========================================================
+#
+# Most room_list / room_detail hits come from visitors who are not logged
+# in, and they all see exactly the same HTML. Those responses are stored
+# in the cache named by settings.ROOM_PAGE_CACHE:
+#
+#   - detail pages are keyed per room
+#   - listing pages are keyed per filter / search / sort / cursor query
+#
+# Every key contains a version number. A change to a room (or its images
+# or bookings) only increases the version, so the old entries are never
+# read again and simply expire. The version is read before the page is
+# built, so a page rendered while a change is committed is stored under
+# the old version and never served. Pages for the cache are rendered
+# from the primary database: a read replica that has not caught up with
+# the change yet would store the old page under the new version.
+#
+# The listing version is stored with the time of the last change, so
+# conditional GETs of room_list (see freshness.py) are answered without
+# a query.
+#
+# The cache must be shared by every process that changes rooms (file
+# based, the default, or Redis, Memcached, ...). A version bump made in
+# a job worker or another gunicorn worker would otherwise never reach the
+# worker holding the page.
+
+KEY_PREFIX = 'room_pages'
+LISTING_VERSION_KEY = f'{KEY_PREFIX}:listing:version'
+LISTING_CHANGED_KEY = f'{KEY_PREFIX}:listing:changed_at'
+
+
+def page_cache():
+    return caches[settings.ROOM_PAGE_CACHE]
+
+
+def is_shared():
+    """
+    Whether every process sees the same version keys (not a per-process
+    or dummy cache)
+    """
+    return not isinstance(page_cache(), (LocMemCache, DummyCache))
+
+
+# ---------------------------------------------
+# Versions
+# ---------------------------------------------
+
+def room_version_key(room_id):
+    return f'{KEY_PREFIX}:room:{room_id}:version'
+
+
+def first_version():
+    # A version key can be evicted while its pages are still cached:
+    # starting again from the clock never reuses an old version
+    return time.time_ns()
+
+
+def get_version(key):
+    cache = page_cache()
+    # add() only writes when the key is missing, so two workers starting
+    # at the same time agree on the first version
+    cache.add(key, first_version(), timeout=None)
+    return cache.get(key) or first_version()
+
+
+def bump_version(key):
+    cache = page_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing (never read or evicted)
+        cache.set(key, first_version(), timeout=None)
+
+
+def invalidate_room_pages(room_id):
+    """
+    Drop the cached detail page of one room
+    """
+    bump_version(room_version_key(room_id))
+
+
+def invalidate_listing_pages():
+    """
+    Drop every cached room listing page
+    """
+    page_cache().set(LISTING_CHANGED_KEY, timezone.now(), timeout=None)
+    bump_version(LISTING_VERSION_KEY)
+
+
+def listing_freshness():
+    """
+    (time of the last listing change, listing version)
+    """
+    cache = page_cache()
+    # Missing (never changed or evicted): start counting from now, which
+    # only makes clients fetch their copy once more
+    cache.add(LISTING_CHANGED_KEY, timezone.now(), timeout=None)
+    version = get_version(LISTING_VERSION_KEY)
+    return cache.get(LISTING_CHANGED_KEY) or timezone.now(), version
+
+
+# ---------------------------------------------
+# Page keys
+# ---------------------------------------------
+
+def room_detail_key(request, id):
+    version = get_version(room_version_key(id))
+    return f'{KEY_PREFIX}:detail:{id}:v{version}'
+
+
+def room_list_key(request):
+    version = get_version(LISTING_VERSION_KEY)
+    # The same filters in another order are the same page
+    query = request.GET.urlencode()
+    query = '&'.join(sorted(query.split('&'))) if query else ''
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    return f'{KEY_PREFIX}:list:v{version}:{digest}'
+
+
+# ---------------------------------------------
+# View decorator
+# ---------------------------------------------
+
+def can_use_cache(request):
+    # Logged in users see their own links and buttons, and a pending
+    # flash message would be shown once and then baked into the page
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def can_store(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        # Anything that sets a cookie (a new session, a CSRF token, ...)
+        # belongs to this visitor only
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def cache_anonymous_page(key_func):
+    """
+    Serve the decorated view from the page cache for anonymous visitors.
+    `key_func(request, *args, **kwargs)` returns the (versioned) cache key.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not can_use_cache(request):
+                return view_func(request, *args, **kwargs)
+
+            cache = page_cache()
+            key = key_func(request, *args, **kwargs)
+
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            with use_primary():
+                response = view_func(request, *args, **kwargs)
+            if can_store(request, response):
+                cache.set(key, response)
+            return response
+
+        return wrapper
+
+    return decorator
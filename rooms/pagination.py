@@ -0,0 +1,190 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+# =========================================================
+# KEYSET (CURSOR) PAGINATION
+# =========================================================
+#
+# Instead of "skip N rows" (OFFSET), every page starts right after the last
+# row of the previous page: WHERE (created_at, id) < (last_created_at, last_id).
+# The database jumps straight to that spot in the index, so page 1000 is as
+# fast as page 1, and rows inserted meanwhile never shift or repeat items.
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a cursor token cannot be decoded
+    """
+
+
+class KeysetPage:
+    """
+    One page of results plus the tokens to move forwards and backwards
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by a unique ordering, e.g. ('-created_at', '-id').
+
+    The last field must be unique (normally 'id') so every row has exactly
+    one position. Works with model instances and with .values() rows.
+    """
+
+    def __init__(self, queryset, ordering=('-created_at', '-id'), per_page=12):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.model = queryset.model
+
+    # ---------------------------------------------
+    # Cursor tokens
+    # ---------------------------------------------
+
+    def encode_cursor(self, direction, row):
+        """
+        Turn the ordering values of a row into an opaque URL-safe token
+        """
+        values = []
+        for field_name in self._field_names():
+            value = row[field_name] if isinstance(row, dict) else getattr(row, field_name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+
+        data = json.dumps({'d': direction, 'k': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        """
+        Turn a token back into (direction, [values])
+        """
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = data['d'], data['k']
+            field_names = self._field_names()
+
+            if direction not in ('n', 'p') or len(raw_values) != len(field_names):
+                raise InvalidCursor(token)
+
+            values = [
+                self._to_python(name, value)
+                for name, value in zip(field_names, raw_values)
+            ]
+        except InvalidCursor:
+            raise
+        except Exception as exc:
+            raise InvalidCursor(token) from exc
+
+        return direction, values
+
+    # ---------------------------------------------
+    # Paging
+    # ---------------------------------------------
+
+    def page(self, cursor=None):
+        """
+        Return the page that starts after (or ends before) the given cursor
+        """
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return self._forward_page(rows, came_from_cursor=False)
+
+        direction, values = self.decode_cursor(cursor)
+
+        if direction == 'n':
+            queryset = self.queryset.filter(self._seek(values, forward=True))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return self._forward_page(rows, came_from_cursor=True)
+
+        queryset = self.queryset.filter(self._seek(values, forward=False))
+        rows = list(queryset.order_by(*self._reversed_ordering())[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        items = rows[:self.per_page][::-1]
+
+        return KeysetPage(
+            items,
+            next_cursor=self.encode_cursor('n', items[-1]) if items else None,
+            previous_cursor=self.encode_cursor('p', items[0]) if has_previous else None,
+        )
+
+    def _forward_page(self, rows, came_from_cursor):
+        has_next = len(rows) > self.per_page
+        items = rows[:self.per_page]
+
+        return KeysetPage(
+            items,
+            next_cursor=self.encode_cursor('n', items[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor('p', items[0]) if came_from_cursor and items else None
+            ),
+        )
+
+    # ---------------------------------------------
+    # Helpers
+    # ---------------------------------------------
+
+    def _to_python(self, name, value):
+        # Model fields convert the JSON value back (e.g. ISO text -> datetime);
+        # annotations such as a search rank are plain numbers already
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ]
+
+    def _seek(self, values, forward):
+        """
+        Build the "rows after this position" filter for any mix of asc/desc:
+        a >= x AND ((a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...)
+
+        The OR chain alone gives the database no range to seek to, so the
+        index would be read from its start on every page; the leading
+        a >= x bound lets it start reading at the cursor.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        bound = None
+
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            if bound is None:
+                bound = Q(**{f'{name}__{lookup}e': value})
+
+            condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+            equal_so_far &= Q(**{name: value})
+
+        return bound & condition if bound is not None else condition
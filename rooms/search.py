@@ -0,0 +1,208 @@
+import re
+from collections import Counter
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections, router, transaction
+from django.db.models import Count, IntegerField, Q, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from . import bulk
+from .models import Room, RoomSearchTerm
+
+
+# =========================================================
+# FULL-TEXT ROOM SEARCH
+# =========================================================
+#
+# Every room's title and description are split into words and stored in
+# the RoomSearchTerm table (an inverted index). A search looks the words up
+# in that indexed table instead of scanning every room's text:
+#
+#   - all search words must match (AND)
+#   - every word matches as a prefix ("bal" finds "balcony")
+#   - results are ranked by the summed weight of the matched words
+#   - the location / room type filters combine in the same query
+#
+# The index for a room is rebuilt whenever its title or description
+# changes (see signals.py).
+#
+# On PostgreSQL the search uses the database's own full-text search
+# instead: a stored tsvector column of title + description with a GIN
+# index (migration 0016), with the same AND / prefix rules and ts_rank
+# as rank. The database keeps that column up to date itself, so no
+# RoomSearchTerm rows are written there.
+
+# Weight of a word found in the title / description
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Longest word kept in the index (matches RoomSearchTerm.term)
+MAX_TERM_LENGTH = 50
+
+# Common words that would match almost every room
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'at', 'for', 'in', 'is', 'it', 'near',
+    'of', 'on', 'or', 'the', 'to', 'with',
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """
+    Lower-cased words of `text`, without stop words and one-letter words
+    """
+    return [
+        word[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall((text or '').lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def room_terms(title, description):
+    """
+    {term: weight} for one room
+    """
+    weights = Counter()
+    for word in tokenize(title):
+        weights[word] += TITLE_WEIGHT
+    for word in tokenize(description):
+        weights[word] += DESCRIPTION_WEIGHT
+    return weights
+
+
+def uses_search_terms():
+    """
+    Whether searches read RoomSearchTerm (everywhere but PostgreSQL)
+    """
+    return connections[router.db_for_write(Room)].vendor != 'postgresql'
+
+
+def build_terms(room):
+    return [
+        RoomSearchTerm(room_id=room.pk, term=term, weight=min(weight, 32767))
+        for term, weight in room_terms(room.title, room.description).items()
+    ]
+
+
+@transaction.atomic
+def index_room(room):
+    """
+    Replace the search terms of one room
+    """
+    if not uses_search_terms():
+        return
+    RoomSearchTerm.objects.filter(room_id=room.pk).delete()
+    RoomSearchTerm.objects.bulk_create(build_terms(room))
+
+
+def index_new_rooms(rooms, batch_size=2000):
+    """
+    Add the search terms of rooms that have none yet (after a bulk insert).
+    Rows are written as plain tuples (see bulk.py).
+    """
+    if not uses_search_terms():
+        return
+    rows = (
+        (room.pk, term, min(weight, 32767))
+        for room in rooms
+        for term, weight in room_terms(room.title, room.description).items()
+    )
+    bulk.insert_rows(RoomSearchTerm, ('room_id', 'term', 'weight'), rows, batch_size=batch_size)
+
+
+@transaction.atomic
+def rebuild_search_index(batch_size=2000):
+    """
+    Rebuild the whole index (after bulk imports). Returns the number of
+    rooms indexed (none on PostgreSQL, where only old terms are removed).
+    """
+    RoomSearchTerm.objects.all().delete()
+    if not uses_search_terms():
+        return 0
+
+    indexed = 0
+    batch = []
+    rooms = Room.objects.only('id', 'title', 'description').iterator(chunk_size=batch_size)
+    for room in rooms:
+        batch.extend(build_terms(room))
+        indexed += 1
+        if len(batch) >= batch_size:
+            RoomSearchTerm.objects.bulk_create(batch)
+            batch = []
+
+    RoomSearchTerm.objects.bulk_create(batch)
+    return indexed
+
+
+def term_prefix(word, prefix=''):
+    """
+    Q for terms starting with `word`, written as a range
+    (word <= term < next word) so any btree index on term can be used
+    """
+    upper = word[:-1] + chr(ord(word[-1]) + 1)
+    return Q(**{f'{prefix}term__gte': word, f'{prefix}term__lt': upper})
+
+
+# Migration 0016's generated column (PostgreSQL only, not a model field)
+SEARCH_DOCUMENT = RawSQL('"rooms_room"."search_document"', [], output_field=SearchVectorField())
+
+# ts_rank is a float; the rank is kept as an integer so keyset page
+# cursors compare it exactly
+RANK_SCALE = 1000000
+
+
+def search_rooms(queryset, text):
+    """
+    Filter `queryset` to rooms matching every word of `text` and annotate
+    each with `search_rank` (higher is better).
+
+    Returns the queryset unchanged (with search_rank = 0) if `text` has no
+    searchable words.
+    """
+    words = list(dict.fromkeys(tokenize(text)))
+    if not words:
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return search_documents(queryset, words)
+    return search_terms(queryset, words)
+
+
+def search_documents(queryset, words):
+    """
+    PostgreSQL: match and rank with the GIN-indexed tsvector column
+    """
+    query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+    return (
+        queryset
+        .alias(search_document=SEARCH_DOCUMENT)
+        .filter(search_document=query)
+        .annotate(search_rank=Cast(SearchRank(SEARCH_DOCUMENT, query) * RANK_SCALE, IntegerField()))
+    )
+
+
+def search_terms(queryset, words):
+    """
+    Any database: one join with the matching RoomSearchTerm rows, grouped
+    per room; the rank is their total weight, and every word must have
+    matched at least once
+    """
+    any_word = Q()
+    word_counts = {}
+    for index, word in enumerate(words):
+        matches_word = term_prefix(word, 'search_terms__')
+        any_word |= matches_word
+        word_counts[f'matches_{index}'] = Count('search_terms', filter=matches_word)
+
+    # Filtering before annotating makes the sums use the same (filtered)
+    # join. The OR alone would make it a LEFT JOIN; the weight condition
+    # (always true) keeps it an inner join, so the database can start
+    # from the term index instead of reading every room.
+    return (
+        queryset
+        .filter(any_word, search_terms__weight__gte=0)
+        .annotate(search_rank=Sum('search_terms__weight'), **word_counts)
+        .filter(**{f'{name}__gt': 0 for name in word_counts})
+    )
@@ -0,0 +1,169 @@
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Booking, Room, RoomImage
+from .search import rebuild_search_index
+from .stats import rebuild_room_stats
+
+
+# =========================================================
+# FAKE DATA FOR BENCHMARKS
+# =========================================================
+
+ADJECTIVES = ['Cozy', 'Bright', 'Spacious', 'Quiet', 'Modern', 'Sunny', 'Furnished', 'Affordable']
+FEATURES = [
+    'balcony', 'attached bathroom', 'mountain view', 'wifi', 'parking',
+    'kitchen access', 'hot water', 'near bus park', 'rooftop', 'garden',
+]
+
+
+def get_seed_owner(username='benchmark_owner'):
+    """
+    Return (or create) the user that owns all seeded rooms
+    """
+    owner, _created = User.objects.get_or_create(username=username)
+    return owner
+
+
+def build_rooms(count, owner, seed=42):
+    """
+    Yield `count` unsaved Room objects with random but realistic values.
+    The same seed always produces the same rooms.
+    """
+    rng = random.Random(seed)
+    locations = [choice for choice, _label in Room.LOCATION_CHOICES]
+    room_types = [choice for choice, _label in Room.ROOM_TYPE]
+    start = datetime.date(2026, 1, 1)
+
+    for i in range(count):
+        location = rng.choice(locations)
+        room_type = rng.choice(room_types)
+        features = rng.sample(FEATURES, 3)
+
+        yield Room(
+            owner=owner,
+            title=f"{rng.choice(ADJECTIVES)} {room_type} room in {location} #{i}",
+            description=f"{room_type} room with {', '.join(features)}.",
+            price=rng.randrange(2000, 40000, 500),
+            location=location,
+            room_type=room_type,
+            owner_name=f"Owner {i % 500}",
+            contact_number=f"98{rng.randrange(10**7, 10**8)}",
+            available_from=start + datetime.timedelta(days=rng.randrange(0, 365)),
+        )
+
+
+def seed_rooms(count, owner=None, batch_size=1000, seed=42):
+    """
+    Insert `count` random rooms with bulk_create and return how many were added.
+    bulk_create skips signals, so RoomStat and the search index are rebuilt
+    afterwards.
+    """
+    owner = owner or get_seed_owner()
+    Room.objects.bulk_create(build_rooms(count, owner, seed=seed), batch_size=batch_size)
+    rebuild_room_stats()
+    rebuild_search_index()
+    return count
+
+
+# =========================================================
+# BENCHMARK DATA SETS (manage.py seed_benchmark_data)
+# =========================================================
+#
+# A whole site at one of a few sizes: an owner with rooms and photos, an
+# admin, customers and their bookings. The same scale and seed always
+# give the same data, so benchmark runs can be compared.
+#
+# Everything is inserted with bulk_create (no signals), then RoomStat,
+# the search index and the rooms' cover / photo count are rebuilt.
+
+SCALES = {
+    'small': {'rooms': 500, 'images_per_room': 2, 'customers': 100, 'bookings_per_customer': 3},
+    'medium': {'rooms': 5000, 'images_per_room': 3, 'customers': 1000, 'bookings_per_customer': 3},
+    'large': {'rooms': 50000, 'images_per_room': 3, 'customers': 10000, 'bookings_per_customer': 5},
+}
+
+BENCHMARK_ADMIN = 'benchmark_admin'
+CUSTOMER_PREFIX = 'benchmark_customer_'
+# Password of every seeded user (the HTTP benchmark logs in with it)
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def seeded_customers():
+    return User.objects.filter(username__startswith=CUSTOMER_PREFIX, is_staff=False)
+
+
+def build_images(room_ids, per_room):
+    """
+    Yield unsaved RoomImage rows: `per_room` photos for every room
+    """
+    for room_id in room_ids:
+        for n in range(per_room):
+            yield RoomImage(room_id=room_id, image=f'image/upload/v1/benchmark/room_{room_id}_{n}.jpg')
+
+
+def build_bookings(room_ids, customer_ids, per_customer, seed=42):
+    """
+    Yield unsaved bookings: each customer asks for `per_customer` rooms.
+    Most stay pending; some are rejected and at most one per room approved.
+    """
+    rng = random.Random(seed)
+    approved_rooms = set()
+    for customer_id in customer_ids:
+        for room_id in rng.sample(room_ids, min(per_customer, len(room_ids))):
+            roll = rng.random()
+            if roll < 0.1 and room_id not in approved_rooms:
+                status = 'Approved'
+                approved_rooms.add(room_id)
+            elif roll < 0.3:
+                status = 'Rejected'
+            else:
+                status = 'Pending'
+            yield Booking(room_id=room_id, user_id=customer_id, status=status)
+
+
+def seed_benchmark_data(scale, seed=42, batch_size=1000):
+    """
+    Insert the data set of `scale` (a SCALES name or a dict like its
+    values) in one transaction and return the number of rows per kind.
+    Refuses to seed twice: use a fresh database for every scale.
+    """
+    sizes = SCALES[scale] if isinstance(scale, str) else scale
+    if User.objects.filter(username=BENCHMARK_ADMIN).exists():
+        raise ValueError('Benchmark data is already seeded in this database.')
+
+    password = make_password(BENCHMARK_PASSWORD)  # hashed once for everybody
+    with transaction.atomic():
+        owner = get_seed_owner()
+        User.objects.create(username=BENCHMARK_ADMIN, password=password, is_staff=True)
+        User.objects.bulk_create(
+            (User(username=f'{CUSTOMER_PREFIX}{i}', password=password) for i in range(sizes['customers'])),
+            batch_size=batch_size,
+        )
+
+        Room.objects.bulk_create(build_rooms(sizes['rooms'], owner, seed=seed), batch_size=batch_size)
+        room_ids = list(Room.objects.filter(owner=owner).order_by('id').values_list('id', flat=True))
+
+        RoomImage.objects.bulk_create(build_images(room_ids, sizes['images_per_room']), batch_size=batch_size)
+        for start in range(0, len(room_ids), batch_size):
+            Room.objects.filter(pk__in=room_ids[start:start + batch_size]).refresh_image_fields()
+
+        customer_ids = list(seeded_customers().order_by('id').values_list('id', flat=True))
+        Booking.objects.bulk_create(
+            build_bookings(room_ids, customer_ids, sizes['bookings_per_customer'], seed=seed),
+            batch_size=batch_size,
+        )
+
+        rebuild_room_stats()
+        rebuild_search_index()
+
+    return {
+        'rooms': len(room_ids),
+        'images': len(room_ids) * sizes['images_per_room'],
+        'customers': len(customer_ids),
+        'bookings': Booking.objects.filter(room__owner=owner).count(),
+    }
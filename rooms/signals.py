@@ -0,0 +1,281 @@
+import functools
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import images, metrics, page_cache, search, stats, tasks
+from .models import Booking, Room, RoomImage
+
+
+# =========================================================
+# ROOMSTAT AND SEARCH INDEX MAINTENANCE
+# =========================================================
+#
+# Room.save() and Booking.save() run in a transaction, and Django runs
+# delete signals inside the delete transaction, so the counters below are
+# committed (or rolled back) together with the change that caused them.
+#
+# Note: queryset.update() and bulk_create() do not send signals; code
+# using them must update the stats and search index itself (or run
+# rebuild_room_stats / rebuild_search_index).
+
+
+# ---------------------------------------------
+# Rooms
+# ---------------------------------------------
+
+@receiver(pre_save, sender=Room)
+def remember_room_values(sender, instance, **kwargs):
+    # Keep the values stored in the database before this save
+    instance._previous_values = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_values = (
+            Room.objects.filter(pk=instance.pk)
+            .values('location', 'room_type', 'price', 'title', 'description')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Room)
+def update_search_index_for_room(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_values', None)
+    if (
+        created
+        or previous is None
+        or previous['title'] != instance.title
+        or previous['description'] != instance.description
+    ):
+        search.index_room(instance)
+
+
+@receiver(post_save, sender=Room)
+def update_stats_for_room(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_values', None)
+
+    if created or previous is None:
+        stats.record_room_added(instance.location, instance.room_type, instance.price)
+        return
+
+    current = (instance.location, instance.room_type, int(instance.price))
+    if current == (previous['location'], previous['room_type'], previous['price']):
+        return
+
+    stats.record_room_removed(previous['location'], previous['room_type'], previous['price'])
+    stats.record_room_added(instance.location, instance.room_type, instance.price)
+
+    # Moving to another category moves its bookings too
+    if (previous['location'], previous['room_type']) != (instance.location, instance.room_type):
+        for status, count in booking_counts(instance):
+            stats.record_bookings(previous['location'], previous['room_type'], status, -count)
+            stats.record_bookings(instance.location, instance.room_type, status, count)
+
+
+@receiver(post_delete, sender=Room)
+def remove_room_from_stats(sender, instance, **kwargs):
+    # Its bookings were deleted just before (and counted down) by the cascade
+    stats.record_room_removed(instance.location, instance.room_type, instance.price)
+
+
+def booking_counts(room):
+    counts = {}
+    for status in Booking.objects.filter(room=room).values_list('status', flat=True):
+        counts[status] = counts.get(status, 0) + 1
+    return counts.items()
+
+
+# ---------------------------------------------
+# Bookings
+# ---------------------------------------------
+
+def room_category(room_id):
+    return (
+        Room.objects.filter(pk=room_id)
+        .values_list('location', 'room_type')
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    instance._stats_previous = None
+    if instance.pk and not instance._state.adding:
+        instance._stats_previous = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list('room_id', 'status')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def update_stats_for_booking(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, '_stats_previous', None)
+    current = (instance.room_id, instance.status)
+
+    if previous == current:
+        return
+
+    if previous is not None:
+        category = room_category(previous[0])
+        if category:
+            stats.record_bookings(*category, previous[1], -1)
+
+    category = room_category(instance.room_id)
+    if category:
+        stats.record_bookings(*category, instance.status, 1)
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking_from_stats(sender, instance, **kwargs):
+    category = room_category(instance.room_id)
+    if category:
+        stats.record_bookings(*category, instance.status, -1)
+
+
+# ---------------------------------------------
+# Room cover and photo count
+# ---------------------------------------------
+#
+# RoomImage.save() and deletes run in a transaction, like the counters above.
+
+@receiver(post_save, sender=RoomImage)
+def update_room_for_saved_image(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        images.images_added(instance.room_id, [instance])
+    else:
+        images.images_changed([instance])
+
+
+@receiver(post_delete, sender=RoomImage)
+def update_room_for_deleted_image(sender, instance, **kwargs):
+    images.images_removed(instance.room_id, [instance.pk])
+
+
+# =========================================================
+# ROOM FRESHNESS (updated_at)
+# =========================================================
+#
+# Room.updated_at drives the ETag / Last-Modified of the room pages
+# (see freshness.py). Saving a room sets it; the changes below are shown
+# on the room pages too, so they set it as well.
+
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+def touch_room_for_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Room.objects.filter(pk=instance.room_id).touch()
+
+
+@receiver(post_save, sender=Booking)
+def touch_room_for_booking(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Only the approved booking is shown ("Already booked")
+    previous = getattr(instance, '_stats_previous', None) or (None, None)
+    if previous != (instance.room_id, instance.status) and 'Approved' in (previous[1], instance.status):
+        Room.objects.filter(pk__in={previous[0], instance.room_id} - {None}).touch()
+
+
+@receiver(post_delete, sender=Booking)
+def touch_room_for_deleted_booking(sender, instance, **kwargs):
+    if instance.status == 'Approved':
+        Room.objects.filter(pk=instance.room_id).touch()
+
+
+# =========================================================
+# CACHED PAGES
+# =========================================================
+#
+# Cached anonymous pages (see page_cache.py) are dropped after the change
+# is committed, so a request running at the same time cannot store the
+# old version under the new key.
+#
+#   - rooms and their images appear on the detail page and the listings
+#   - bookings only change the room's own detail page ("already booked")
+
+def invalidate_pages(room_id, listings):
+    transaction.on_commit(functools.partial(page_cache.invalidate_room_pages, room_id))
+    if listings:
+        transaction.on_commit(page_cache.invalidate_listing_pages)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_pages_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(instance.pk, listings=True)
+
+
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+def room_image_pages_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(instance.room_id, listings=True)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_pages_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(instance.room_id, listings=False)
+
+
+# =========================================================
+# IMAGE DERIVATIVES
+# =========================================================
+#
+# Photos uploaded by add_room / edit_room get their smaller copies in the
+# upload job (bulk_create, no signal). A photo saved one by one without
+# them (e.g. from the admin) gets them from a background job.
+
+@receiver(pre_save, sender=RoomImage)
+def forget_old_derivatives(sender, instance, raw=False, **kwargs):
+    # A replaced photo needs new copies
+    if raw or instance._state.adding or not instance.derivatives:
+        return
+    stored = RoomImage.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    if stored is not None and str(stored) != str(instance.image):
+        instance.derivatives = {}
+
+
+@receiver(post_save, sender=RoomImage)
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw and not instance.derivatives:
+        tasks.queue_derivatives([instance.pk])
+
+
+# =========================================================
+# METRICS
+# =========================================================
+#
+# Domain counters for /metrics (see metrics.py), counted on commit.
+
+@receiver(post_save, sender=Room)
+def count_added_room(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        metrics.rooms_added()
+
+
+@receiver(post_save, sender=Booking)
+def count_booking_event(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        metrics.bookings_created()
+        return
+
+    # Set by remember_booking_status above
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None and previous[1] != instance.status:
+        metrics.bookings_changed(instance.status)
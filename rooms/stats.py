@@ -0,0 +1,202 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import Booking, Room, RoomStat
+
+
+# =========================================================
+# DASHBOARD STATISTICS
+# =========================================================
+#
+# Dashboard numbers are read from the RoomStat table: one row per
+# (location, room type) with room, booking and price totals. The rows are
+# updated by signals whenever a Room or Booking changes (see signals.py),
+# so reading them costs one small query however many rooms there are.
+# The choices are read from the Room model, so adding a new room type or
+# location needs no change here.
+
+# Booking status -> RoomStat counter field
+BOOKING_STATUS_FIELDS = {
+    'Pending': 'pending_bookings',
+    'Approved': 'approved_bookings',
+    'Rejected': 'rejected_bookings',
+}
+
+
+def room_type_choices():
+    return [choice for choice, _label in Room.ROOM_TYPE]
+
+
+def location_choices():
+    return [choice for choice, _label in Room.LOCATION_CHOICES]
+
+
+def get_room_stats():
+    """
+    Return all room and booking statistics used by the dashboards:
+
+        total_rooms, total_bookings,
+        rooms_by_type        {room_type: count}  (every choice, in choice order)
+        rooms_by_location    {location: count}
+        bookings_by_status   {status: count}
+        popular_type         {'room_type': ..., 'total': ...} or None
+        popular_location     {'location': ..., 'total': ...} or None
+    """
+    rooms_by_type = dict.fromkeys(room_type_choices(), 0)
+    rooms_by_location = dict.fromkeys(location_choices(), 0)
+    bookings_by_status = dict.fromkeys(BOOKING_STATUS_FIELDS, 0)
+    total_rooms = 0
+
+    for stat in RoomStat.objects.all():
+        total_rooms += stat.room_count
+        if stat.room_type in rooms_by_type:
+            rooms_by_type[stat.room_type] += stat.room_count
+        if stat.location in rooms_by_location:
+            rooms_by_location[stat.location] += stat.room_count
+        for status, field in BOOKING_STATUS_FIELDS.items():
+            bookings_by_status[status] += getattr(stat, field)
+
+    return {
+        'total_rooms': total_rooms,
+        'total_bookings': sum(bookings_by_status.values()),
+        'rooms_by_type': rooms_by_type,
+        'rooms_by_location': rooms_by_location,
+        'bookings_by_status': bookings_by_status,
+        'popular_type': most_common('room_type', rooms_by_type),
+        'popular_location': most_common('location', rooms_by_location),
+    }
+
+
+def most_common(key, counts):
+    """
+    The entry with the highest count, shaped like a values() row, or None
+    when there are no rooms at all
+    """
+    if not counts or max(counts.values()) == 0:
+        return None
+    name = max(counts, key=counts.get)
+    return {key: name, 'total': counts[name]}
+
+
+# =========================================================
+# KEEPING ROOMSTAT UP TO DATE
+# =========================================================
+
+def _category(location, room_type):
+    """
+    Queryset for one RoomStat row, creating the row if needed
+    """
+    stat, _created = RoomStat.objects.get_or_create(location=location, room_type=room_type)
+    return RoomStat.objects.filter(pk=stat.pk)
+
+
+def record_room_added(location, room_type, price):
+    price = int(price)
+    _category(location, room_type).update(
+        room_count=F('room_count') + 1,
+        price_sum=F('price_sum') + price,
+        price_min=Coalesce(Least(F('price_min'), Value(price)), Value(price)),
+        price_max=Coalesce(Greatest(F('price_max'), Value(price)), Value(price)),
+    )
+
+
+def record_rooms_added(rooms):
+    """
+    record_room_added() for many new rooms (bulk_create): one update per category
+    """
+    totals = {}
+    for room in rooms:
+        price = int(room.price)
+        count, total, low, high = totals.get((room.location, room.room_type), (0, 0, price, price))
+        totals[(room.location, room.room_type)] = (count + 1, total + price, min(low, price), max(high, price))
+
+    for (location, room_type), (count, total, low, high) in totals.items():
+        _category(location, room_type).update(
+            room_count=F('room_count') + count,
+            price_sum=F('price_sum') + total,
+            price_min=Coalesce(Least(F('price_min'), Value(low)), Value(low)),
+            price_max=Coalesce(Greatest(F('price_max'), Value(high)), Value(high)),
+        )
+
+
+def record_room_removed(location, room_type, price):
+    price = int(price)
+    category = RoomStat.objects.filter(location=location, room_type=room_type)
+    category.update(
+        room_count=F('room_count') - 1,
+        price_sum=F('price_sum') - price,
+    )
+
+    # Min/max only need a rescan when the removed price was the min or max
+    limits = category.values('price_min', 'price_max').first()
+    if limits and price in (limits['price_min'], limits['price_max']):
+        prices = Room.objects.filter(location=location, room_type=room_type).aggregate(
+            low=Min('price'), high=Max('price'),
+        )
+        category.update(price_min=prices['low'], price_max=prices['high'])
+
+
+def record_bookings(location, room_type, status, delta):
+    """
+    Add `delta` (may be negative) bookings with `status` to a category
+    """
+    field = BOOKING_STATUS_FIELDS.get(status)
+    if field and delta:
+        _category(location, room_type).update(**{field: F(field) + delta})
+
+
+def compute_stat_rows(room_model=Room, booking_model=Booking):
+    """
+    Compute every RoomStat row from scratch: {(location, room_type): fields}.
+
+    Model classes can be passed in so migrations can use historical models.
+    """
+    rows = {}
+
+    room_totals = (
+        room_model.objects
+        .values_list('location', 'room_type')
+        .annotate(count=Count('id'), total=Sum('price'), low=Min('price'), high=Max('price'))
+        .order_by()
+    )
+    for location, room_type, count, total, low, high in room_totals:
+        rows[(location, room_type)] = {
+            'room_count': count,
+            'price_sum': total or 0,
+            'price_min': low,
+            'price_max': high,
+        }
+
+    booking_counts = {
+        field: Count('id', filter=Q(status=status))
+        for status, field in BOOKING_STATUS_FIELDS.items()
+    }
+    booking_totals = (
+        booking_model.objects
+        .values('room__location', 'room__room_type')
+        .annotate(**booking_counts)
+        .order_by()
+    )
+    for row in booking_totals:
+        key = (row['room__location'], row['room__room_type'])
+        fields = rows.setdefault(key, {'room_count': 0, 'price_sum': 0})
+        for field in BOOKING_STATUS_FIELDS.values():
+            fields[field] = row[field]
+
+    return rows
+
+
+@transaction.atomic
+def rebuild_room_stats():
+    """
+    Replace the RoomStat table with freshly computed numbers.
+    Returns the number of categories written.
+    """
+    rows = compute_stat_rows()
+    RoomStat.objects.all().delete()
+    RoomStat.objects.bulk_create(
+        RoomStat(location=location, room_type=room_type, **fields)
+        for (location, room_type), fields in rows.items()
+    )
+    return len(rows)
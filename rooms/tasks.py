@@ -0,0 +1,128 @@
+import functools
+import hashlib
+
+from django.db import transaction
+
+from jobs.queue import enqueue, failure_handler, handler
+from jobs.staging import discard_staged, open_staged, stage_file, staging_storage
+
+from . import images, page_cache
+from .models import Room, RoomImage
+
+
+# =========================================================
+# BACKGROUND JOBS FOR ROOMS
+# =========================================================
+#
+# add_room / edit_room only copy the uploaded photos to the staging
+# storage and queue one "rooms.add_images" job; the request returns as
+# soon as the room is committed. A worker (manage.py run_workers) then
+# resizes the photos, uploads them in parallel and adds the RoomImage rows.
+# The uploads happen before the job's transaction is opened, so no
+# transaction stays open while Cloudinary is busy.
+#
+# Photos added some other way (the admin, or before derivatives existed)
+# get their smaller copies from a "rooms.build_derivatives" job
+# (see signals.py and manage.py build_image_derivatives).
+#
+# Job keys are made from the job's input, so queueing the same work twice
+# (a retried request, build_image_derivatives run again) gives one job.
+
+
+def job_key(kind, *parts):
+    digest = hashlib.sha1(','.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{kind}:{digest}'
+
+
+def queue_room_images(room, files):
+    """
+    Stage uploaded `files` and queue the job that adds them to `room`.
+    Call inside the transaction that saves the room.
+    """
+    files = list(files)
+    if not files:
+        return None
+
+    staged = [stage_file(file, folder='room-images') for file in files]
+    return enqueue(
+        'rooms.add_images',
+        {'room_id': room.pk, 'files': staged},
+        key=job_key('rooms.add_images', room.pk, *staged),
+    )
+
+
+@handler('rooms.add_images', atomic=False)
+def add_images(payload):
+    """
+    Resize, upload and attach staged photos to a room
+    """
+    staged = payload['files']
+    storage = staging_storage()
+
+    # Staged copies are removed when the rows are committed: a rerun after
+    # that commit has nothing left to add
+    if Room.objects.filter(pk=payload['room_id']).exists() and all(storage.exists(name) for name in staged):
+        photos = []
+        for name in staged:
+            with open_staged(name) as file:
+                photos.append(images.render_derivatives(file))
+
+        # If saving fails the uploads are deleted again and the job is retried
+        with images.uploaded_derivatives(photos) as derivatives, transaction.atomic():
+            room = Room(pk=payload['room_id'])
+            values = [sizes['full']['value'] for sizes in derivatives]
+            images.attach_images(room, values, derivatives)
+            transaction.on_commit(lambda: discard_staged(staged))
+    else:
+        discard_staged(staged)
+
+
+@failure_handler('rooms.add_images')
+def discard_failed_images(payload):
+    discard_staged(payload['files'])
+
+
+def queue_derivatives(image_ids):
+    """
+    Queue the job that makes the smaller copies of existing photos
+    """
+    image_ids = sorted(image_ids)
+    if not image_ids:
+        return None
+    # The photo's file is part of the key: a replaced photo needs a new job
+    files = RoomImage.objects.filter(pk__in=image_ids).order_by('id').values_list('id', 'image')
+    return enqueue(
+        'rooms.build_derivatives',
+        {'image_ids': image_ids},
+        key=job_key('rooms.build_derivatives', *(f'{pk}={image}' for pk, image in files)),
+    )
+
+
+@handler('rooms.build_derivatives')
+def build_derivatives(payload):
+    """
+    Make and upload the derivatives of photos that have none yet
+    """
+    pending = list(
+        RoomImage.objects.filter(pk__in=payload['image_ids'], derivatives={}).order_by('id')
+    )
+    if not pending:
+        return
+
+    backend = images.get_image_backend()
+    photos = []
+    for image in pending:
+        with backend.open(image.image.get_prep_value()) as file:
+            photos.append(images.render_derivatives(file))
+
+    with images.uploaded_derivatives(photos, backend) as derivatives:
+        for image, sizes in zip(pending, derivatives):
+            image.derivatives = sizes
+        # bulk_update sends no signals: refresh the pages here
+        RoomImage.objects.bulk_update(pending, ['derivatives'])
+        images.images_changed(pending)
+        room_ids = {image.room_id for image in pending}
+        Room.objects.filter(pk__in=room_ids).touch()
+        for room_id in room_ids:
+            transaction.on_commit(functools.partial(page_cache.invalidate_room_pages, room_id))
+        transaction.on_commit(page_cache.invalidate_listing_pages)
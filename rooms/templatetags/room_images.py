@@ -0,0 +1,55 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+# =========================================================
+# RESPONSIVE ROOM IMAGES
+# =========================================================
+#
+#   {% load room_images %}
+#   {% responsive_image img "card" sizes="(min-width: 992px) 33vw, 100vw" class="card-img-top" %}
+#
+# Renders an <img> whose srcset lists every stored size of the photo
+# (RoomImage.derivatives), so the browser downloads the smallest copy
+# that is sharp enough for the slot described by `sizes`. src is the
+# `size` copy, for browsers without srcset support.
+#
+# Photos without derivatives (not processed yet) fall back to the original.
+
+
+@register.simple_tag
+def responsive_image(image, size='card', sizes=None, **attrs):
+    """
+    <img> tag for a RoomImage. Extra keyword arguments become attributes;
+    width= alone also sets a matching height and, without sizes=, the slot width.
+    """
+    if image is None:
+        return ''
+
+    derivatives = image.derivatives or {}
+    chosen = derivatives.get(size) or derivatives.get('full')
+
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+
+    if chosen is None:
+        return format_html('<img src="{}"{}>', image.image.url, flatatt(attrs))
+
+    widths = sorted(
+        (copy['width'], copy['url']) for copy in derivatives.values() if copy.get('width')
+    )
+    if widths:
+        attrs['srcset'] = ', '.join(f'{url} {width}w' for width, url in widths)
+        attrs['sizes'] = sizes or (f"{attrs['width']}px" if 'width' in attrs else '100vw')
+
+    # Intrinsic size lets the browser reserve the space before loading
+    if chosen.get('width') and chosen.get('height'):
+        if 'width' in attrs:
+            attrs.setdefault('height', round(int(attrs['width']) * chosen['height'] / chosen['width']))
+        else:
+            attrs['width'], attrs['height'] = chosen['width'], chosen['height']
+
+    return format_html('<img src="{}"{}>', chosen['url'], flatatt(attrs))
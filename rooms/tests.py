@@ -1,3 +1,1499 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import multiprocessing
+import pathlib
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+from PIL import Image as PILImage
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from monitoring.prometheus import REGISTRY
+from monitoring.testing import QueryBudgetMixin
+
+from . import api, booking_service, bulk, exports, images, journeys, metrics, search
+from .models import Booking, Room, RoomImage, RoomSearchTerm, RoomStat
+from .filters import SORT_OPTIONS, sort_ordering
+from .page_cache import LISTING_VERSION_KEY, page_cache
+from .pagination import KeysetPaginator
+from .search import search_rooms
+from .seeding import seed_benchmark_data
+from .stats import compute_stat_rows, get_room_stats
+
+# Image URLs are built from the Cloudinary config, which needs a cloud name
+if not cloudinary.config().cloud_name:
+    cloudinary.config(cloud_name='roomfinder-test')
+
+
+def make_room(owner, **kwargs):
+    """
+    Create a room with sensible defaults for tests
+    """
+    fields = {
+        'owner': owner,
+        'title': 'Test Room',
+        'description': 'A test room',
+        'price': 5000,
+        'location': 'Kathmandu',
+        'room_type': 'Single',
+        'owner_name': 'Owner',
+        'contact_number': '9800000000',
+        'available_from': datetime.date(2026, 1, 1),
+    }
+    fields.update(kwargs)
+    return Room.objects.create(**fields)
+
+
+class RoomListQueryTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        self.owner = User.objects.create_user('owner', password='pass12345')
+
+    def add_rooms(self, count):
+        # Run the commit hooks so cached listing pages are dropped
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                room = make_room(self.owner, title=f'Room {i}')
+                RoomImage.objects.create(room=room, image=f'image/upload/v1/room_{i}_a.jpg')
+                RoomImage.objects.create(room=room, image=f'image/upload/v1/room_{i}_b.jpg')
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('room_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        self.add_rooms(2)
+        few, _ = self.count_queries()
+
+        self.add_rooms(10)
+        many, response = self.count_queries()
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['rooms']), 12)
+
+    def test_cover_image_is_first_image(self):
+        self.add_rooms(1)
+        _, response = self.count_queries()
+
+        self.assertContains(response, 'room_0_a.jpg')
+        self.assertNotContains(response, 'room_0_b.jpg')
+
+    def test_images_table_is_not_read(self):
+        self.add_rooms(3)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('room_list'))
+
+        self.assertFalse([q for q in ctx.captured_queries if 'rooms_roomimage' in q['sql']])
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Pages that list rows stay within their settings.QUERY_BUDGETS,
+    however many rows there are
+    """
+
+    def setUp(self):
+        page_cache().clear()
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.customer = User.objects.create_user('customer', password='pass12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                room = make_room(self.owner, title=f'Room {i}')
+                RoomImage.objects.create(room=room, image=f'image/upload/v1/room_{i}.jpg')
+                Booking.objects.create(room=room, user=self.customer)
+
+    def test_room_list(self):
+        self.assertQueryBudget(reverse('room_list'))
+        self.client.force_login(self.customer)
+        self.assertQueryBudget(reverse('room_list'))
+
+    def test_room_detail(self):
+        url = reverse('room_detail', args=[Room.objects.first().id])
+        self.assertQueryBudget(url)
+        self.client.force_login(self.customer)
+        self.assertQueryBudget(url)
+
+    def test_my_bookings(self):
+        self.client.force_login(self.customer)
+        response = self.assertQueryBudget(reverse('my_bookings'))
+        self.assertContains(response, 'Room 4')
+
+    def test_admin_lists(self):
+        self.client.force_login(self.admin)
+        self.assertQueryBudget(reverse('manage_bookings'))
+        self.assertQueryBudget(reverse('manage_rooms'))
+
+
+class RoomCoverImageTests(TestCase):
+    """
+    Room.cover_image and Room.image_count follow the RoomImage rows
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345', is_staff=True)
+        self.room = make_room(self.owner)
+
+    def add(self, name):
+        return RoomImage.objects.create(room=self.room, image=f'image/upload/v1/{name}.jpg')
+
+    def cover(self):
+        self.room.refresh_from_db()
+        return self.room.cover.image.public_id if self.room.cover else None, self.room.image_count
+
+    def test_first_image_is_the_cover(self):
+        self.assertEqual(self.cover(), (None, 0))
+        self.add('a')
+        self.add('b')
+        self.assertEqual(self.cover(), ('a', 2))
+
+    def test_deleting_images_in_edit_room_moves_the_cover(self):
+        first, second, third = self.add('a'), self.add('b'), self.add('c')
+        self.client.force_login(self.owner)
+
+        self.client.post(reverse('edit_room', args=[self.room.id]), {
+            'title': self.room.title, 'description': self.room.description, 'price': self.room.price,
+            'location': self.room.location, 'room_type': self.room.room_type,
+            'owner_name': self.room.owner_name, 'contact_number': self.room.contact_number,
+            'available_from': self.room.available_from, 'delete_images': [first.id, second.id],
+        })
+        self.assertEqual(self.cover(), ('c', 1))
+
+        third.delete()
+        self.assertEqual(self.cover(), (None, 0))
+
+    def test_bulk_added_images_and_new_derivatives(self):
+        self.add('a')
+        added = images.attach_images(self.room, ['image/upload/v1/b.jpg', 'image/upload/v1/c.jpg'])
+        self.assertEqual(self.cover(), ('a', 3))
+
+        cover = RoomImage.objects.get(pk=self.room.cover_image['id'])
+        cover.derivatives = {'thumb': {'value': 'a-thumb', 'url': '/a-thumb.jpg', 'width': 320, 'height': 240}}
+        cover.save()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.cover.derivatives['thumb']['url'], '/a-thumb.jpg')
+
+        # Not the cover: nothing to copy
+        images.images_changed(added)
+        self.assertEqual(self.cover(), ('a', 3))
+
+    def test_backfill_command(self):
+        self.add('a')
+        self.add('b')
+        other = make_room(self.owner, title='No photos')
+        Room.objects.update(cover_image=None, image_count=0)
+        Room.objects.filter(pk=other.pk).update(image_count=4)
+
+        call_command('backfill_room_images', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(self.cover(), ('a', 2))
+        other.refresh_from_db()
+        self.assertEqual((other.cover_image, other.image_count), (None, 0))
+
+
+class RoomListPaginationTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        owner = User.objects.create_user('owner', password='pass12345')
+        # Several rooms share the same created_at so the id tie-break matters
+        same_time = timezone.now()
+        self.rooms = [make_room(owner, title=f'Room {i}') for i in range(7)]
+        Room.objects.filter(id__in=[r.id for r in self.rooms[:4]]).update(created_at=same_time)
+        self.owner = owner
+
+    def paginator(self):
+        return KeysetPaginator(Room.objects.all(), ordering=('-created_at', '-id'), per_page=3)
+
+    def walk_forward(self):
+        paginator = self.paginator()
+        page = paginator.page()
+        seen = [room.id for room in page]
+        while page.has_next:
+            page = paginator.page(page.next_cursor)
+            seen += [room.id for room in page]
+        return seen
+
+    def test_pages_cover_every_room_once_in_order(self):
+        expected = list(Room.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk_forward(), expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+
+        self.assertEqual([r.id for r in back], [r.id for r in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_new_rooms_do_not_shift_later_pages(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        expected_second = [r.id for r in paginator.page(first.next_cursor)]
+
+        make_room(self.owner, title='Brand new')
+
+        self.assertEqual([r.id for r in paginator.page(first.next_cursor)], expected_second)
+
+    def test_no_offset_in_sql(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.page(cursor)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'].upper())
+
+    def test_room_list_pages_and_rejects_bad_cursor(self):
+        response = self.client.get(reverse('room_list'))
+        self.assertEqual(len(response.context['rooms']), 7)
+        self.assertFalse(response.context['page'].has_next)
+
+        response = self.client.get(reverse('room_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class RoomStatsTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        tenant = User.objects.create_user('tenant', password='pass12345')
+        make_room(self.owner, location='Pokhara', room_type='Double')
+        make_room(self.owner, location='Pokhara', room_type='Shared')
+        room = make_room(self.owner, location='Kathmandu', room_type='Double')
+        Booking.objects.create(room=room, user=tenant)
+
+    def test_all_stats_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_room_stats()
+
+        self.assertEqual(stats['total_rooms'], 3)
+        self.assertEqual(stats['total_bookings'], 1)
+        self.assertEqual(stats['rooms_by_type'], {'Single': 0, 'Double': 2, 'Shared': 1})
+        self.assertEqual(stats['rooms_by_location'], {'Kathmandu': 1, 'Pokhara': 2, 'Biratnagar': 0})
+        self.assertEqual(stats['popular_type'], {'room_type': 'Double', 'total': 2})
+        self.assertEqual(stats['popular_location'], {'location': 'Pokhara', 'total': 2})
+        self.assertEqual(stats['bookings_by_status'], {'Pending': 1, 'Approved': 0, 'Rejected': 0})
+
+    def test_new_choices_are_picked_up(self):
+        new_locations = Room.LOCATION_CHOICES + [('Chitwan', 'Chitwan')]
+        make_room(self.owner, location='Chitwan')
+
+        with mock.patch.object(Room, 'LOCATION_CHOICES', new_locations):
+            stats = get_room_stats()
+
+        self.assertEqual(stats['rooms_by_location']['Chitwan'], 1)
+
+    def test_no_rooms(self):
+        Room.objects.all().delete()
+        stats = get_room_stats()
+        self.assertIsNone(stats['popular_type'])
+        self.assertIsNone(stats['popular_location'])
+
+
+class RoomStatMaintenanceTests(TestCase):
+    """
+    After any change the incrementally updated RoomStat rows must equal a
+    full recomputation.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.tenant = User.objects.create_user('tenant', password='pass12345')
+
+    def assertStatsConsistent(self):
+        stored = {
+            (stat.location, stat.room_type): stat
+            for stat in RoomStat.objects.all()
+        }
+        for key, fields in compute_stat_rows().items():
+            for field, value in fields.items():
+                self.assertEqual(getattr(stored[key], field), value, f'{key} {field}')
+        # Categories with nothing left must be all zeros
+        for key, stat in stored.items():
+            if key not in compute_stat_rows():
+                self.assertEqual(stat.room_count, 0)
+                self.assertEqual(stat.pending_bookings + stat.approved_bookings + stat.rejected_bookings, 0)
+
+    def test_room_and_booking_changes(self):
+        cheap = make_room(self.owner, price=3000)
+        dear = make_room(self.owner, price=9000)
+        booking = Booking.objects.create(room=dear, user=self.tenant)
+        self.assertStatsConsistent()
+
+        booking.status = 'Approved'
+        booking.save()
+        self.assertStatsConsistent()
+
+        # Move the booked room to another category and change its price
+        dear.location = 'Pokhara'
+        dear.price = '7000'
+        dear.save()
+        self.assertStatsConsistent()
+
+        cheap.delete()
+        self.assertStatsConsistent()
+
+        dear.delete()
+        self.assertStatsConsistent()
+        self.assertEqual(get_room_stats()['total_rooms'], 0)
+
+
+class RoomSearchTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.balcony_title = make_room(self.owner, title='Balcony room', description='Bright room with wifi')
+        self.balcony_text = make_room(self.owner, title='Plain room', description='Has a small balcony')
+        self.other = make_room(self.owner, title='Basement', description='Quiet and cheap', location='Pokhara')
+
+    def search(self, text, **filters):
+        rooms = search_rooms(Room.objects.filter_by(**filters), text)
+        return list(rooms.order_by('-search_rank', '-id'))
+
+    def test_title_matches_rank_higher(self):
+        self.assertEqual(self.search('balcony'), [self.balcony_title, self.balcony_text])
+
+    def test_prefix_and_all_words_must_match(self):
+        self.assertEqual(self.search('balc wif'), [self.balcony_title])
+        # Equal rank (one title word each) falls back to newest first
+        self.assertEqual(self.search('ba'), [self.other, self.balcony_title, self.balcony_text])
+
+    def test_combines_with_filters(self):
+        self.assertEqual(self.search('ba', location='Pokhara'), [self.other])
+
+    def test_index_follows_edits_and_deletes(self):
+        # PostgreSQL searches its own tsvector column: no terms are written
+        self.assertEqual(RoomSearchTerm.objects.exists(), search.uses_search_terms())
+
+        self.other.description = 'Now with a balcony'
+        self.other.save()
+        self.assertIn(self.other, self.search('balcony'))
+
+        self.other.delete()
+        self.assertFalse(RoomSearchTerm.objects.filter(room_id=self.other.id).exists())
+
+    def test_room_list_search_pages_by_rank(self):
+        response = self.client.get(reverse('room_list'), {'q': 'balcony'})
+        self.assertEqual(list(response.context['rooms']), [self.balcony_title, self.balcony_text])
+
+    def test_next_page_continues_after_the_same_rank(self):
+        # More matches than one page, most of them with the same rank: the
+        # cursor must compare ranks exactly to neither skip nor repeat rooms
+        for i in range(14):
+            make_room(self.owner, title=f'Room {i}', description='balcony ' * (i % 3 + 1))
+
+        seen = []
+        cursor = None
+        while True:
+            params = {'q': 'balcony', **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(reverse('room_list'), params).context['page']
+            seen.extend(room.id for room in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(len(seen), 16)
+        self.assertEqual(len(set(seen)), 16)
+
+
+class RoomFilterTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        owner = User.objects.create_user('owner', password='pass12345')
+        self.cheap = make_room(owner, price=3000, available_from=datetime.date(2026, 2, 1))
+        self.middle = make_room(owner, price=8000, available_from=datetime.date(2026, 3, 1))
+        self.dear = make_room(owner, price=20000, available_from=datetime.date(2026, 6, 1))
+
+    def listed(self, **params):
+        response = self.client.get(reverse('room_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['rooms'])
+
+    def test_price_band_and_cheapest_sort(self):
+        self.assertEqual(
+            self.listed(min_price=3000, max_price=10000, sort='cheapest'),
+            [self.cheap, self.middle],
+        )
+
+    def test_available_by_date_newest_first(self):
+        self.assertEqual(self.listed(available_by='2026-03-15'), [self.middle, self.cheap])
+
+    def test_invalid_values_are_ignored(self):
+        self.assertEqual(len(self.listed(min_price='abc', available_by='2026-13-45', sort='bogus')), 3)
+
+
+class RoomFilterQueryPlanTests(TestCase):
+    """
+    Every filter + sort combination offered on room_list must be served by
+    an index that already returns rows in the requested order.
+    """
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always get a sequential scan;
+            # with sorting disabled a Sort node only appears if no index fits
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertIndexOrdered(self, sort, after=None, **filters):
+        queryset = Room.objects.filter_by(**filters)
+        ordering = sort_ordering(sort)
+        if after is not None:
+            # A later page: the rows after `after`, through its cursor
+            paginator = KeysetPaginator(queryset, ordering=ordering)
+            _direction, values = paginator.decode_cursor(paginator.encode_cursor('n', after))
+            queryset = queryset.filter(paginator._seek(values, forward=True))
+        plan = self.plan(queryset.order_by(*ordering)[:12])
+
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index', plan)
+            self.assertNotRegex(plan, r'\bSort\b')
+        else:
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+        return plan
+
+    def test_sort_only(self):
+        for sort in SORT_OPTIONS:
+            with self.subTest(sort=sort):
+                self.assertIndexOrdered(sort)
+
+    def test_location_and_type(self):
+        for sort in SORT_OPTIONS:
+            with self.subTest(sort=sort):
+                self.assertIndexOrdered(sort, location='Pokhara', room_type='Single')
+
+    def test_location_only(self):
+        for sort in SORT_OPTIONS:
+            with self.subTest(sort=sort):
+                self.assertIndexOrdered(sort, location='Pokhara')
+
+    def test_location_price_band_newest(self):
+        # SQLite has no histograms and guesses a price range to be very
+        # selective, so it picks (location, price) and sorts; Postgres
+        # walks (location, -created_at) and filters the price
+        if connection.vendor != 'postgresql':
+            self.skipTest('SQLite prefers the price range here')
+        self.assertIndexOrdered('newest', location='Pokhara', min_price=5000, max_price=15000)
+
+    def test_price_band(self):
+        self.assertIndexOrdered('cheapest', min_price=5000, max_price=15000)
+        self.assertIndexOrdered('cheapest', location='Pokhara', min_price=5000, max_price=15000)
+        self.assertIndexOrdered(
+            'cheapest', location='Pokhara', room_type='Single', min_price=5000, max_price=15000,
+        )
+
+    def test_cursor_pages_start_at_the_cursor(self):
+        # Without a range on the first ordering column a deep page would
+        # read the index from its start
+        room = make_room(User.objects.create_user('owner'), location='Pokhara')
+        for sort in SORT_OPTIONS:
+            column = sort_ordering(sort)[0].lstrip('-')
+            for filters in ({}, {'location': 'Pokhara'}):
+                with self.subTest(sort=sort, **filters):
+                    plan = self.assertIndexOrdered(sort, after=room, **filters)
+                    if connection.vendor == 'postgresql':
+                        self.assertRegex(plan, rf'Index Cond: .*\b{column}\b')
+                    else:
+                        self.assertRegex(plan, rf'SEARCH rooms_room USING INDEX \w+ \(.*{column}[<>]')
+
+    def test_available_by(self):
+        for sort in SORT_OPTIONS:
+            with self.subTest(sort=sort):
+                self.assertIndexOrdered(sort, available_by=datetime.date(2026, 5, 1))
+
+
+class RoomPageCacheTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.customer = User.objects.create_user('customer', password='pass12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room = make_room(self.owner, title='Sunny room')
+        self.detail_url = reverse('room_detail', args=[self.room.id])
+
+    def get(self, url, params=None, queries=None):
+        if queries is None:
+            return self.client.get(url, params)
+        with self.assertNumQueries(queries):
+            return self.client.get(url, params)
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        first = self.get(self.detail_url)
+        # Only the freshness query of the conditional GET check is left
+        second = self.get(self.detail_url, queries=1)
+        self.assertEqual(first.content, second.content)
+
+        self.get(reverse('room_list'), {'sort': 'cheapest', 'min_price': '1000'})
+        # The listing freshness comes from the cache: no query at all
+        self.get(reverse('room_list'), {'min_price': '1000', 'sort': 'cheapest'}, queries=0)
+
+    def test_room_and_image_changes_invalidate(self):
+        self.get(self.detail_url)
+        self.get(reverse('room_list'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.title = 'Renamed room'
+            self.room.save()
+        self.assertContains(self.get(self.detail_url), 'Renamed room')
+        self.assertContains(self.get(reverse('room_list')), 'Renamed room')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomImage.objects.create(room=self.room, image='image/upload/v1/new_cover.jpg')
+        self.assertContains(self.get(self.detail_url), 'new_cover.jpg')
+        self.assertContains(self.get(reverse('room_list')), 'new_cover.jpg')
+
+    def test_evicted_version_does_not_bring_back_old_pages(self):
+        self.get(reverse('room_list'))
+        page_cache().delete(LISTING_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.title = 'Renamed room'
+            self.room.save()
+        self.assertContains(self.get(reverse('room_list')), 'Renamed room')
+
+    def test_booking_changes_only_invalidate_the_room(self):
+        self.assertNotContains(self.get(self.detail_url), 'Already booked')
+        listing_version = page_cache().get(LISTING_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(room=self.room, user=self.customer, status='Approved')
+
+        self.assertContains(self.get(self.detail_url), 'Already booked')
+        self.assertEqual(page_cache().get(LISTING_VERSION_KEY), listing_version)
+
+    def test_logged_in_users_and_flash_messages_bypass_cache(self):
+        self.get(self.detail_url)
+
+        self.client.cookies['messages'] = 'pending'
+        self.assertIsNotNone(self.get(self.detail_url).context)
+        del self.client.cookies['messages']
+
+        self.client.force_login(self.customer)
+        response = self.get(self.detail_url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, reverse('book_room', args=[self.room.id]))
+
+
+class RoomConditionalGetTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.customer = User.objects.create_user('customer', password='pass12345')
+        self.room = make_room(self.owner)
+        self.other = make_room(self.owner, location='Pokhara')
+        self.detail_url = reverse('room_detail', args=[self.room.id])
+
+    def revalidate(self, url, response, queries=None):
+        headers = {'HTTP_IF_NONE_MATCH': response['ETag']}
+        if queries is None:
+            return self.client.get(url, **headers)
+        with self.assertNumQueries(queries):
+            return self.client.get(url, **headers)
+
+    def test_unchanged_detail_page_is_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('Cookie', response['Vary'])
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+        not_modified = self.revalidate(self.detail_url, response, queries=1)
+        self.assertEqual(not_modified.status_code, 304)
+
+        since = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_images_and_approved_bookings_change_the_detail_etag(self):
+        response = self.client.get(self.detail_url)
+
+        RoomImage.objects.create(room=self.room, image='image/upload/v1/extra.jpg')
+        response = self.revalidate(self.detail_url, response)
+        self.assertEqual(response.status_code, 200)
+
+        Booking.objects.create(room=self.room, user=self.customer)
+        self.assertEqual(self.revalidate(self.detail_url, response).status_code, 304)
+
+        booking = Booking.objects.get(room=self.room)
+        booking.status = 'Approved'
+        booking.save()
+        self.assertEqual(self.revalidate(self.detail_url, response).status_code, 200)
+
+    def test_listing_etag_follows_room_changes(self):
+        url = reverse('room_list')
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response, queries=0).status_code, 304)
+
+        # Bookings do not appear on the listings
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(room=self.room, user=self.customer, status='Approved')
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        # An evicted version only costs one full response
+        page_cache().clear()
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    @override_settings(CACHES={
+        **settings.CACHES,
+        'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'freshness-test'},
+    })
+    def test_listing_etag_from_the_database_with_a_per_process_cache(self):
+        # Changes made by other processes never reach this cache: a
+        # listing must not look fresh because of it
+        url = reverse('room_list')
+        kathmandu = self.client.get(url, {'location': 'Kathmandu'})
+        response = self.client.get(url)
+
+        # Without running the on-commit invalidation, as in another process
+        self.other.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertEqual(
+            self.client.get(url, {'location': 'Kathmandu'}, HTTP_IF_NONE_MATCH=kathmandu['ETag']).status_code,
+            304,
+        )
+
+    def test_etag_depends_on_user(self):
+        anonymous = self.client.get(self.detail_url)
+        self.client.force_login(self.customer)
+        response = self.revalidate(self.detail_url, anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+
+class BookingServiceTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.first = User.objects.create_user('first', password='pass12345')
+        self.second = User.objects.create_user('second', password='pass12345')
+        self.room = make_room(self.owner)
+
+    def test_request_checks_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            booking_service.request_booking(self.room.id, self.first)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertIn('EXISTS', selects[0].upper())
+        self.assertIn('INSERT', ' '.join(q['sql'] for q in ctx.captured_queries))
+
+        with self.assertRaises(booking_service.BookingRefused) as refused:
+            booking_service.request_booking(self.room.id, self.first)
+        self.assertEqual(refused.exception.level, 'warning')
+
+        with self.assertRaises(booking_service.BookingRefused):
+            booking_service.request_booking(self.room.id, self.owner)
+
+    def test_only_one_approval_per_room(self):
+        first = booking_service.request_booking(self.room.id, self.first)
+        second = booking_service.request_booking(self.room.id, self.second)
+
+        booking_service.approve_booking(first.id)
+        with self.assertRaises(booking_service.BookingRefused):
+            booking_service.approve_booking(second.id)
+        with self.assertRaises(booking_service.BookingRefused):
+            booking_service.request_booking(self.room.id, User.objects.create_user('third'))
+
+        self.assertEqual(Booking.objects.get(pk=second.id).status, 'Pending')
+        self.assertEqual(RoomStat.objects.get().approved_bookings, 1)
+
+    def test_constraints_hold_without_the_checks(self):
+        Booking.objects.create(room=self.room, user=self.first, status='Approved')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.create(room=self.room, user=self.first)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.create(room=self.room, user=self.second, status='Approved')
+
+    def test_views_report_refusals(self):
+        self.client.force_login(self.first)
+        self.client.get(reverse('book_room', args=[self.room.id]))
+        response = self.client.get(reverse('book_room', args=[self.room.id]), follow=True)
+        self.assertContains(response, 'You already requested this room.')
+        self.assertEqual(self.client.get(reverse('book_room', args=[9999])).status_code, 404)
+
+        admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        Booking.objects.create(room=self.room, user=self.second, status='Approved')
+        self.client.force_login(admin)
+        pending = Booking.objects.get(user=self.first)
+        response = self.client.get(reverse('approve_booking', args=[pending.id]), follow=True)
+        self.assertContains(response, 'Room already approved for another booking.')
+
+
+def approve_with_retry(booking_id):
+    """
+    Try to approve a booking from its own connection. Returns True if it
+    won. SQLite reports a busy database instead of waiting, so retry then.
+    """
+    try:
+        for _attempt in range(200):
+            try:
+                booking_service.approve_booking(booking_id)
+                return True
+            except booking_service.BookingRefused:
+                return False
+            except OperationalError:
+                time.sleep(0.01)
+        raise AssertionError('database stayed locked')
+    finally:
+        connection.close()
+
+
+class BookingConcurrencyTests(TransactionTestCase):
+    """
+    Many admins approving different bookings of the same room at the same
+    moment: exactly one approval may win.
+    """
+
+    CONTENDERS = 12
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.room = make_room(owner)
+        self.booking_ids = [
+            Booking.objects.create(room=self.room, user=User.objects.create_user(f'tenant{i}')).id
+            for i in range(self.CONTENDERS)
+        ]
+
+    def assertSingleApproval(self, results):
+        self.assertEqual(sum(results), 1)
+        self.assertEqual(Booking.objects.filter(room=self.room, status='Approved').count(), 1)
+        stat = RoomStat.objects.get(location=self.room.location, room_type=self.room.room_type)
+        self.assertEqual((stat.approved_bookings, stat.pending_bookings), (1, self.CONTENDERS - 1))
+
+    def test_threads(self):
+        barrier = threading.Barrier(self.CONTENDERS)
+        results = []
+
+        def contend(booking_id):
+            barrier.wait()
+            results.append(approve_with_retry(booking_id))
+
+        threads = [threading.Thread(target=contend, args=(i,)) for i in self.booking_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertSingleApproval(results)
+
+    def test_processes(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('an in-memory database cannot be shared with other processes')
+
+        # Children must open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+
+        def contend(booking_id):
+            results.put(approve_with_retry(booking_id))
+
+        processes = [context.Process(target=contend, args=(i,)) for i in self.booking_ids]
+        for process in processes:
+            process.start()
+        outcomes = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(timeout=10)
+
+        self.assertSingleApproval(outcomes)
+
+
+class BulkBookingActionTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner', password='pass12345')
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.tenants = [User.objects.create_user(f'tenant{i}') for i in range(3)]
+        self.room = make_room(owner)
+        self.other_room = make_room(owner, location='Pokhara')
+        self.bookings = [Booking.objects.create(room=self.room, user=user) for user in self.tenants]
+        self.other = Booking.objects.create(room=self.other_room, user=self.tenants[0])
+        self.client.force_login(self.admin)
+
+    def post(self, ids, action, **headers):
+        return self.client.post(
+            reverse('bulk_booking_action'),
+            {'booking_ids': [str(i) for i in ids], 'action': action},
+            **headers,
+        )
+
+    def statuses(self):
+        return dict(Booking.objects.values_list('id', 'status'))
+
+    def test_approve_rejects_competitors_in_one_transaction(self):
+        first, second, third = self.bookings
+        response = self.post([second.id, first.id, self.other.id, 9999], 'approve',
+                             HTTP_ACCEPT='application/json')
+
+        results = {row['id']: row['result'] for row in response.json()['results']}
+        self.assertEqual(results, {
+            first.id: booking_service.APPROVED,
+            second.id: booking_service.AUTO_REJECTED,
+            third.id: booking_service.AUTO_REJECTED,
+            self.other.id: booking_service.APPROVED,
+            9999: booking_service.NOT_FOUND,
+        })
+        self.assertEqual(self.statuses(), {
+            first.id: 'Approved', second.id: 'Rejected', third.id: 'Rejected', self.other.id: 'Approved',
+        })
+
+        response = self.post([second.id], 'approve', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['results'], [{'id': second.id, 'result': booking_service.ROOM_TAKEN}])
+
+        # update() skipped the signals; the counters were kept in step by hand
+        for key, fields in compute_stat_rows().items():
+            stat = RoomStat.objects.get(location=key[0], room_type=key[1])
+            for field, value in fields.items():
+                self.assertEqual(getattr(stat, field), value)
+
+    def test_updates_are_set_based(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.post([booking.id for booking in self.bookings], 'reject')
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "rooms_booking"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(self.statuses().values()), {'Rejected', 'Pending'})
+
+    def test_html_summary_and_bad_input(self):
+        response = self.post([self.bookings[0].id], 'approve')
+        self.assertRedirects(response, reverse('manage_bookings'), fetch_redirect_response=False)
+        page = self.client.get(reverse('manage_bookings'))
+        self.assertContains(page, '1 approved, 2 auto-rejected')
+        self.assertContains(page, self.room.title)
+
+        self.assertEqual(self.post([self.other.id], 'delete', HTTP_ACCEPT='application/json').status_code, 400)
+        self.assertEqual(self.client.get(reverse('bulk_booking_action')).status_code, 405)
+
+
+class SlowImageBackend:
+    """
+    Local stand-in for Cloudinary: every upload takes LATENCY seconds.
+    Files named "broken*" fail to upload.
+    """
+
+    LATENCY = 0.1
+    stored = set()
+
+    def upload(self, file):
+        time.sleep(self.LATENCY)
+        if file.name.startswith('broken'):
+            raise OSError('upload failed')
+        value = f'image/upload/v1/{file.name}'
+        self.stored.add(value)
+        return value
+
+    def delete(self, value):
+        self.stored.discard(value)
+
+    def url(self, value):
+        return f'https://images.test/{value}'
+
+
+@override_settings(ROOM_IMAGE_BACKEND='rooms.tests.SlowImageBackend', ROOM_IMAGE_UPLOAD_WORKERS=8)
+class RoomImageUploadTests(TestCase):
+
+    def setUp(self):
+        SlowImageBackend.stored.clear()
+        # Staged photos go to a temporary folder
+        staging = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(STORAGES={
+            **settings.STORAGES,
+            'staging': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': staging},
+            },
+        }))
+        self.staging = pathlib.Path(staging)
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def files(self, *names):
+        return [SimpleUploadedFile(name, b'image data', content_type='image/jpeg') for name in names]
+
+    def add_room(self, files):
+        return self.client.post(reverse('add_room'), {
+            'title': 'Bright room', 'description': 'Near the lake', 'price': '6000',
+            'location': 'Pokhara', 'room_type': 'Single', 'owner_name': 'Owner',
+            'contact_number': '9800000000', 'available_from': '2026-01-01',
+            'images': files,
+        })
+
+    def staged_files(self):
+        return [path for path in self.staging.rglob('*') if path.is_file()]
+
+    def test_request_only_stages_photos(self):
+        started = time.perf_counter()
+        response = self.add_room(self.files('photo_1.jpg', 'photo_2.jpg'))
+        elapsed = time.perf_counter() - started
+
+        self.assertRedirects(response, reverse('manage_rooms'), fetch_redirect_response=False)
+        self.assertLess(elapsed, SlowImageBackend.LATENCY)
+        self.assertEqual(SlowImageBackend.stored, set())
+        self.assertEqual(len(self.staged_files()), 2)
+        self.assertEqual(Job.objects.get().kind, 'rooms.add_images')
+
+    def test_job_uploads_in_parallel_and_inserts_in_bulk(self):
+        names = [f'photo_{i}.jpg' for i in range(8)]
+        self.add_room(self.files(*names))
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        elapsed = time.perf_counter() - started
+
+        # One after the other this would take 8 x 0.1 s
+        self.assertLess(elapsed, 8 * SlowImageBackend.LATENCY / 2)
+        room = Room.objects.get(title='Bright room')
+        self.assertEqual(
+            sorted(image.image.get_prep_value() for image in room.images.all()),
+            sorted(f'image/upload/v1/{name}' for name in names),
+        )
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "rooms_roomimage"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_failed_upload_removes_the_others_and_retries(self):
+        self.add_room(self.files('good_1.jpg', 'broken.jpg', 'good_2.jpg'))
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run_pending()
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('ImageUploadError', job.last_error)
+        self.assertFalse(RoomImage.objects.exists())
+        self.assertEqual(SlowImageBackend.stored, set())
+        # Kept for the next attempt
+        self.assertEqual(len(self.staged_files()), 3)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=1)
+    def test_job_failed_for_good_discards_the_staged_photos(self):
+        self.add_room(self.files('good_1.jpg', 'broken.jpg'))
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_rerun_after_the_commit_adds_nothing(self):
+        self.add_room(self.files('photo_1.jpg', 'photo_2.jpg'))
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+
+        # e.g. the worker died before the job was marked done
+        Job.objects.update(status=Job.QUEUED)
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        self.assertEqual(RoomImage.objects.count(), 2)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_large_photos_are_shrunk(self):
+        photo = io.BytesIO()
+        PILImage.new('RGB', (4000, 3000), 'white').save(photo, format='PNG')
+        upload = SimpleUploadedFile('large.png', photo.getvalue(), content_type='image/png')
+
+        shrunk = images.shrink_image(upload, max_size=1600)
+
+        self.assertEqual(shrunk.name, 'large.jpg')
+        self.assertEqual(PILImage.open(shrunk).size, (1600, 1200))
+
+    def test_failed_save_removes_the_uploads(self):
+        room = make_room(self.admin)
+        with self.assertRaises(IntegrityError):
+            with images.uploaded_images(self.files('a.jpg', 'b.jpg')) as uploaded:
+                with transaction.atomic():
+                    images.attach_images(room, uploaded)
+                    Booking.objects.create(room=room, user=self.admin)
+                    Booking.objects.create(room=room, user=self.admin)
+
+        self.assertEqual(SlowImageBackend.stored, set())
+        self.assertFalse(room.images.exists())
+
+
+@override_settings(ROOM_IMAGE_BACKEND='rooms.images.StorageImageBackend', ROOM_IMAGE_MAX_SIZE=1600,
+                   ROOM_IMAGE_DERIVATIVES={'thumb': 320, 'card': 640})
+class RoomImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        # Staged and stored photos go to temporary folders
+        self.media = pathlib.Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(STORAGES={
+            **settings.STORAGES,
+            'staging': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': self.media / 'staging'},
+            },
+            'room_images': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': self.media, 'base_url': '/media/'},
+            },
+        }))
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+
+    def photo(self, name='photo.png', size=(2000, 1500)):
+        data = io.BytesIO()
+        PILImage.new('RGB', size, 'white').save(data, format='PNG')
+        return SimpleUploadedFile(name, data.getvalue(), content_type='image/png')
+
+    def run_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+
+    def test_upload_job_stores_every_size(self):
+        self.client.force_login(self.admin)
+        self.client.post(reverse('add_room'), {
+            'title': 'Bright room', 'description': 'Near the lake', 'price': '6000',
+            'location': 'Pokhara', 'room_type': 'Single', 'owner_name': 'Owner',
+            'contact_number': '9800000000', 'available_from': '2026-01-01',
+            'images': [self.photo()],
+        })
+        self.run_jobs()
+
+        image = RoomImage.objects.get()
+        sizes = image.derivatives
+        self.assertEqual(sorted(sizes), ['card', 'full', 'thumb'])
+        self.assertEqual(image.image.public_id, 'room-images/photo')
+        self.assertEqual(sizes['full']['value'], 'room-images/photo.jpg')
+        for name, width in [('full', 1600), ('card', 640), ('thumb', 320)]:
+            self.assertEqual((sizes[name]['width'], sizes[name]['height']), (width, width * 3 // 4))
+            with PILImage.open(self.media / sizes[name]['value']) as stored:
+                self.assertEqual(stored.size, (width, width * 3 // 4))
+        self.assertEqual(sizes['card']['url'], '/media/room-images/photo-card.jpg')
+
+    def test_listing_card_uses_srcset(self):
+        room = make_room(self.admin)
+        photo = images.render_derivatives(self.photo())
+        with images.uploaded_derivatives([photo]) as derivatives:
+            RoomImage.objects.create(room=room, image=derivatives[0]['full']['value'], derivatives=derivatives[0])
+
+        response = self.client.get(reverse('room_list'))
+
+        self.assertContains(response, (
+            '<img src="/media/room-images/photo-card.jpg" alt="Room Image" class="card-img-top" '
+            'decoding="async" height="480" loading="lazy" '
+            'sizes="(min-width: 768px) 33vw, 100vw" srcset="/media/room-images/photo-thumb.jpg 320w, '
+            '/media/room-images/photo-card.jpg 640w, /media/room-images/photo.jpg 1600w" width="640">'
+        ), html=True)
+
+    def test_photos_saved_without_sizes_get_them_from_a_job(self):
+        room = make_room(self.admin)
+        (self.media / 'room-images').mkdir()
+        (self.media / 'room-images' / 'old.png').write_bytes(self.photo().read())
+
+        # e.g. added in the admin: the original is shown until the job ran
+        image = RoomImage.objects.create(room=room, image='room-images/old.png')
+        self.assertEqual(Job.objects.get().kind, 'rooms.build_derivatives')
+        response = self.client.get(reverse('room_detail', args=[room.id]))
+        self.assertContains(response, RoomImage.objects.get().image.url)
+        self.assertNotContains(response, 'srcset')
+
+        self.run_jobs()
+
+        image.refresh_from_db()
+        self.assertEqual(image.derivatives['thumb']['url'], '/media/room-images/old-thumb.jpg')
+        response = self.client.get(reverse('room_detail', args=[room.id]))
+        self.assertContains(response, (
+            '<img src="/media/room-images/old-thumb.jpg" alt="Test Room" class="rounded" decoding="async" '
+            'height="135" loading="lazy" sizes="180px" srcset="/media/room-images/old-thumb.jpg 320w, '
+            '/media/room-images/old-card.jpg 640w, /media/room-images/old.jpg 1600w" width="180">'
+        ), html=True)
+
+        # Replacing the photo drops the old copies and queues new ones
+        image.image = 'room-images/new.png'
+        image.save()
+        self.assertEqual(image.derivatives, {})
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_backfill_command_queues_batches(self):
+        room = make_room(self.admin)
+        RoomImage.objects.bulk_create(RoomImage(room=room, image=f'room-images/{i}.jpg') for i in range(5))
+
+        call_command('build_image_derivatives', batch_size=2, stdout=io.StringIO())
+
+        batches = [job.payload['image_ids'] for job in Job.objects.order_by('id')]
+        self.assertEqual([len(ids) for ids in batches], [2, 2, 1])
+
+        # Running it again before the workers did finds the same jobs
+        call_command('build_image_derivatives', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(Job.objects.count(), 3)
+
+
+class RoomApiTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner', password='pass12345')
+        self.rooms = [
+            make_room(owner, title=f'Room {i}', price=4000 + i * 1000, location='Pokhara' if i % 2 else 'Kathmandu')
+            for i in range(5)
+        ]
+        RoomImage.objects.create(room=self.rooms[0], image='image/upload/v1/first.jpg')
+
+    def get(self, name, params=None, *args, **headers):
+        return self.client.get(reverse(name, args=args), params or {}, **headers)
+
+    def test_list_uses_room_list_filters_and_sorting(self):
+        response = self.get('api_room_list', {'location': 'pokhara', 'sort': 'cheapest'})
+
+        results = response.json()['results']
+        self.assertEqual([room['title'] for room in results], ['Room 1', 'Room 3'])
+        self.assertEqual(set(results[0]), {
+            'id', 'title', 'price', 'location', 'room_type', 'available_from', 'image_count', 'cover',
+        })
+
+    def test_sparse_fields_only_select_their_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get('api_room_list', {'fields': 'title,price', 'sort': 'cheapest'})
+
+        self.assertEqual(response.json()['results'][0], {'title': 'Room 0', 'price': 4000})
+        select = [q['sql'] for q in ctx.captured_queries if '"rooms_room"."price"' in q['sql']][-1]
+        self.assertNotIn('description', select)
+
+        response = self.get('api_room_list', {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown field(s): secret'})
+
+    def test_pages_follow_next_links(self):
+        seen = []
+        response = self.get('api_room_list', {'fields': 'id', 'limit': 2})
+        while True:
+            data = response.json()
+            seen += [room['id'] for room in data['results']]
+            if not data['next']:
+                break
+            response = self.client.get(data['next'])
+
+        self.assertEqual(seen, [room.id for room in reversed(self.rooms)])
+        self.assertEqual(self.get('api_room_list', {'cursor': 'nope'}).status_code, 400)
+
+    def test_detail_with_images(self):
+        room = self.rooms[0]
+        response = self.get('api_room_detail', {'fields': 'id,cover,images,image_count'}, room.id)
+
+        data = response.json()
+        self.assertEqual(data['id'], room.id)
+        self.assertEqual(data['image_count'], 1)
+        self.assertIn('first.jpg', data['cover']['full']['url'])
+        self.assertEqual(data['images'], [data['cover']])
+        self.assertEqual(self.get('api_room_detail', None, 9999).status_code, 404)
+
+    def test_detail_answers_conditional_get(self):
+        first = self.get('api_room_detail', None, self.rooms[1].id)
+        again = self.get('api_room_detail', None, self.rooms[1].id, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_export_streams_every_matching_room(self):
+        response = self.get('api_room_export', {'fields': 'id,price', 'min_price': 6000})
+
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(rows, [{'id': room.id, 'price': room.price} for room in self.rooms[2:]])
+
+        # Read in chunks by id, even when id is not one of the fields
+        with mock.patch.object(api, 'EXPORT_CHUNK_SIZE', 2):
+            response = self.get('api_room_export', {'fields': 'price', 'min_price': 6000})
+            rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(rows, [{'price': room.price} for room in self.rooms[2:]])
+
+
+class DataExportTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', password='pass12345', is_staff=True)
+        owner = User.objects.create_user('owner', password='pass12345')
+        self.room = make_room(owner, title='Lake, "view" room')
+        self.other_room = make_room(owner, title='Quiet room')
+        tenants = [User.objects.create_user(f'tenant{i}', email=f't{i}@example.com') for i in range(3)]
+        self.bookings = [Booking.objects.create(room=self.room, user=user) for user in tenants]
+        booking_service.approve_booking(self.bookings[0].id)
+        # One booking from last year
+        Booking.objects.filter(pk=self.bookings[2].pk).update(
+            booked_at=timezone.make_aware(datetime.datetime(2025, 12, 31, 23, 30)),
+        )
+        self.client.force_login(self.admin)
+
+    def export(self, kind, **params):
+        response = self.client.get(reverse('export_data', args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_bookings_csv_with_filters(self):
+        content = self.export('bookings', format='csv', status='Pending', **{'from': '2026-01-01'})
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], [self.bookings[1].id])
+        self.assertEqual(rows[0]['room_title'], 'Lake, "view" room')
+        self.assertEqual(rows[0]['username'], 'tenant1')
+
+        content = self.export('bookings', format='csv', to='2025-12-31')
+        self.assertEqual([int(row['id']) for row in csv.DictReader(io.StringIO(content))], [self.bookings[2].id])
+
+    def test_rooms_ndjson(self):
+        content = self.export('rooms', format='ndjson', status='available')
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Quiet room'])
+        self.assertEqual((rows[0]['owner'], rows[0]['is_booked']), ('owner', False))
+
+    def test_rows_are_read_in_chunks_by_id(self):
+        # Constant memory without relying on a server-side cursor
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2), CaptureQueriesContext(connection) as ctx:
+            content = self.export('bookings', format='ndjson')
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [booking.id for booking in self.bookings])
+        chunks = [q['sql'] for q in ctx.captured_queries if 'FROM "rooms_booking"' in q['sql']]
+        self.assertEqual(len(chunks), 2)
+        self.assertIn('LIMIT 2', chunks[0])
+
+    def test_bad_requests(self):
+        url = reverse('export_data', args=['bookings'])
+        self.assertEqual(self.client.get(url, {'status': 'Lost'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': '31/01/2026'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_data', args=['users'])).status_code, 400)
+
+        self.client.force_login(User.objects.get(username='tenant0'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_data', 'bookings', format='ndjson', status='Approved', stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(row['id'], row['status']) for row in rows], [(self.bookings[0].id, 'Approved')])
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = pathlib.Path(folder) / 'rooms.csv'
+            call_command('export_data', 'rooms', output=str(path), stderr=io.StringIO())
+            self.assertEqual(len(list(csv.DictReader(path.open(newline='')))), 2)
+
+
+class ImportRoomsTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord')
+        self.folder = pathlib.Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(STORAGES={
+            **settings.STORAGES,
+            'staging': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': self.folder / 'staging'},
+            },
+        }))
+
+    def row(self, **values):
+        return {
+            'title': 'Sunny room', 'description': 'Balcony and wifi', 'price': '7000',
+            'location': 'Pokhara', 'room_type': 'Single', 'owner_name': 'Landlord',
+            'contact_number': '9800000000', 'available_from': '2026-03-01', **values,
+        }
+
+    def write_csv(self, rows):
+        path = self.folder / 'rooms.csv'
+        with path.open('w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, path, **options):
+        out = io.StringIO()
+        call_command('import_rooms', str(path), owner='landlord', stdout=out, stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    def test_csv_import_in_batches_with_error_report(self):
+        path = self.write_csv([
+            self.row(title='Room A', location='pokhara'),
+            self.row(title='Room B', price='7,000'),
+            self.row(title='Room C', room_type='Penthouse', available_from=''),
+            self.row(title='x' * 201),
+            self.row(title='Room E', location='Kathmandu', price='9000'),
+            self.row(title='Room F', location='Kathmandu', price='5000'),
+        ])
+        report = self.folder / 'errors.csv'
+
+        insert = mock.patch.object(bulk, 'insert_objects', wraps=bulk.insert_objects)
+        with insert as inserts, self.captureOnCommitCallbacks(execute=True):
+            output = self.run_import(path, batch_size=2, report=str(report))
+
+        self.assertIn('Imported 3 rooms, rejected 3 rows', output)
+        self.assertEqual(
+            sorted(Room.objects.values_list('title', 'location')),
+            [('Room A', 'Pokhara'), ('Room E', 'Kathmandu'), ('Room F', 'Kathmandu')],
+        )
+        # Two batches: the three valid rooms, two per batch
+        self.assertEqual([len(call.args[0]) for call in inserts.call_args_list], [2, 1])
+
+        errors = [(row['line'], row['field']) for row in csv.DictReader(report.open(newline=''))]
+        self.assertEqual(errors, [
+            ('3', 'price'), ('4', 'room_type'), ('4', 'available_from'), ('5', 'title'),
+        ])
+
+        # Stats and search index were updated like for rooms saved one by one
+        stat = RoomStat.objects.get(location='Kathmandu', room_type='Single')
+        self.assertEqual((stat.room_count, stat.price_min, stat.price_max), (2, 5000, 9000))
+        self.assertEqual(search_rooms(Room.objects.all(), 'balcony').count(), 3)
+
+    def test_ndjson_with_images(self):
+        images_dir = self.folder / 'photos'
+        images_dir.mkdir()
+        (images_dir / 'a.jpg').write_bytes(b'image data')
+        (self.folder / 'secret.jpg').write_bytes(b'not yours')
+        path = self.folder / 'rooms.ndjson'
+        path.write_text('\n'.join([
+            json.dumps(self.row(title='With photo', images=['a.jpg'])),
+            json.dumps(self.row(title='Missing photo', images=['b.jpg'])),
+            json.dumps(self.row(title='Sneaky', images=['../secret.jpg'])),
+            json.dumps(self.row(title='Not names', images=[1, None])),
+            json.dumps(self.row(title='Not a list', images={'a': 'a.jpg'})),
+            '{not json',
+            '',
+        ]))
+
+        output = self.run_import(path, images_dir=str(images_dir))
+
+        self.assertIn('Imported 1 rooms, rejected 5 rows', output)
+        room = Room.objects.get()
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.payload['room_id']), ('rooms.add_images', room.id))
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write_csv([self.row(), self.row(price='-5')])
+
+        output = self.run_import(path, dry_run=True)
+
+        self.assertIn('Checked 1 rooms, rejected 1 rows', output)
+        self.assertFalse(Room.objects.exists())
+
+    def test_unreadable_files_stop_the_command(self):
+        latin1 = self.folder / 'latin1.csv'
+        latin1.write_bytes('title,location\nCaf\xe9 room,Pokhara\n'.encode('latin-1'))
+        huge = self.folder / 'huge.csv'
+        huge.write_text('title,description\nRoom,"' + 'x' * 200000 + '"\n')
+        ndjson = self.folder / 'latin1.ndjson'
+        ndjson.write_bytes('{"title": "Caf\xe9"}\n'.encode('latin-1'))
+
+        for path in (latin1, huge, ndjson):
+            with self.subTest(path=path.name), self.assertRaisesMessage(CommandError, 'Could not read'):
+                self.run_import(path)
+
+
+class RoomMetricsTests(TestCase):
+    """
+    Domain counters behind /metrics
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass12345')
+        self.customers = [User.objects.create_user(f'customer{i}', password='pass12345') for i in range(3)]
+
+    def value(self, metric, *labels):
+        return REGISTRY.collect().get((metric.name, labels), 0)
+
+    def bookings(self, event):
+        return self.value(metrics.BOOKINGS, event)
+
+    def test_room_and_booking_events_are_counted_on_commit(self):
+        rooms_before = self.value(metrics.ROOMS_ADDED)
+        created, approved, rejected = self.bookings('created'), self.bookings('approved'), self.bookings('rejected')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room = make_room(self.owner)
+            other_room = make_room(self.owner)
+            first, second, third = [booking_service.request_booking(room.id, user) for user in self.customers]
+            booking_service.request_booking(other_room.id, self.customers[0])
+        self.assertEqual(self.value(metrics.ROOMS_ADDED), rooms_before + 2)
+        self.assertEqual(self.bookings('created'), created + 4)
+
+        # Not counted until (and unless) the transaction commits
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            booking_service.approve_booking(first.id)
+        self.assertEqual(self.bookings('approved'), approved)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.bookings('approved'), approved + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking_service.reject_booking(first.id)
+            # One approved, the other pending request rejected with it
+            booking_service.decide_bookings([second.id], 'approve')
+        self.assertEqual(self.bookings('approved'), approved + 2)
+        self.assertEqual(self.bookings('rejected'), rejected + 2)
+
+    def test_image_upload_durations(self):
+        with override_settings(ROOM_IMAGE_BACKEND='rooms.tests.SlowImageBackend'):
+            before = REGISTRY.collect().get((metrics.IMAGE_UPLOAD_SECONDS.name, ()), {'count': 0, 'sum': 0})
+            images.upload_files([SimpleUploadedFile(f'{i}.jpg', b'x') for i in range(2)])
+
+        after = REGISTRY.collect()[(metrics.IMAGE_UPLOAD_SECONDS.name, ())]
+        self.assertEqual(after['count'], before['count'] + 2)
+        self.assertGreaterEqual(after['sum'] - before['sum'], 2 * SlowImageBackend.LATENCY)
+
+
+TINY_SCALE = {'rooms': 6, 'images_per_room': 1, 'customers': 3, 'bookings_per_customer': 2}
+
+
+class BenchmarkJourneyTests(TestCase):
+
+    def setUp(self):
+        page_cache().clear()
+        self.counts = seed_benchmark_data(TINY_SCALE)
+
+    def test_seeding(self):
+        self.assertEqual(self.counts['rooms'], 6)
+        self.assertEqual(Room.objects.count(), 6)
+        self.assertEqual(RoomImage.objects.count(), 6)
+        self.assertEqual(Booking.objects.filter(user__username__startswith='benchmark_customer_').count(), 6)
+        self.assertEqual(sum(RoomStat.objects.values_list('room_count', flat=True)), 6)
+        with self.assertRaises(ValueError):
+            seed_benchmark_data(TINY_SCALE)
+
+    def test_every_journey_runs_without_errors(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = pathlib.Path(folder) / 'results.json'
+            call_command('benchmark_journeys', iterations=2, output=str(path), stdout=io.StringIO())
+            out = io.StringIO()
+            # Compared with itself: the same journeys, one more time
+            call_command('benchmark_journeys', iterations=2, output=str(path), compare=str(path), stdout=out)
+            report = json.loads(path.read_text())
+
+        self.assertIn('COMPARED WITH', out.getvalue())
+        self.assertEqual(report['target'], 'in-process')
+        self.assertEqual(set(report['journeys']), set(journeys.JOURNEYS))
+        for name, result in report['journeys'].items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['requests'], 0, name)
+            self.assertLessEqual(result['p50'], result['p99'])
+        self.assertEqual(report['journeys']['book']['steps']['book_room']['requests'], 2)
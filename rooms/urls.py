@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
 path('', views.room_list, name='room_list'),  # Homepage
@@ -27,6 +27,8 @@ path('', views.room_list, name='room_list'),  # Homepage
     path('manage-bookings/', views.manage_bookings, name='manage_bookings'),
     path('approve/<int:booking_id>/', views.approve_booking, name='approve_booking'),
     path('reject/<int:booking_id>/', views.reject_booking, name='reject_booking'),
+    path('manage-bookings/bulk/', views.bulk_booking_action, name='bulk_booking_action'),
+    path('manage-bookings/export/<str:kind>/', views.export_data, name='export_data'),
 
 
     # =====================================================
@@ -44,4 +46,12 @@ path('', views.room_list, name='room_list'),  # Homepage
     path('book/<int:id>/', views.book_room, name='book_room'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
     path('cancel/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
+
+
+    # =====================================================
+    # JSON API (read-only, see api.py)
+    # =====================================================
+    path('api/rooms/', api.room_list_api, name='api_room_list'),
+    path('api/rooms/export/', api.room_export_api, name='api_room_export'),
+    path('api/rooms/<int:id>/', api.room_detail_api, name='api_room_detail'),
 ]
@@ -1,9 +1,25 @@
+from collections import Counter
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.db import transaction
-from .models import Room, RoomImage, Booking
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from roomfinder.routers import keep_routing, use_primary
+from .models import Room, Booking
+from . import booking_service, exports, tasks
+from .filters import SORT_OPTIONS, parse_room_filters, parse_sort, sort_ordering
+from .freshness import conditional_page, room_detail_freshness, room_list_freshness
+from .pagination import KeysetPaginator, InvalidCursor
+from .page_cache import cache_anonymous_page, room_detail_key, room_list_key
+from .search import search_rooms
+from .stats import get_room_stats
+
+
+# Number of room cards shown per page on the room list
+ROOMS_PER_PAGE = 12
 
 
 # =========================================================
@@ -67,12 +83,11 @@ def dashboard(request):
     """
     Admin dashboard with statistics
     """
-    rooms_count = Room.objects.count()
-    bookings_count = Booking.objects.count()
+    stats = get_room_stats()
 
     return render(request, "admin/dashboard.html", {
-        "rooms_count": rooms_count,
-        "bookings_count": bookings_count,
+        "rooms_count": stats["total_rooms"],
+        "bookings_count": stats["total_bookings"],
     })
 
 
@@ -92,57 +107,119 @@ def manage_bookings(request):
 
 @login_required
 @admin_required
-def approve_booking(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+def export_data(request, kind):
+    """
+    Download bookings or rooms as CSV / NDJSON (see exports.py)
+    """
+    format = request.GET.get("format", "csv")
+    try:
+        filters = exports.parse_export_filters(kind, request.GET)
+        lines = exports.export_lines(kind, format, filters)
+    except exports.ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
 
-    # Prevent double approval
-    with transaction.atomic():
-        already_approved = Booking.objects.filter(
-            room=booking.room,
-            status="Approved"
-        ).exists()
+    response = StreamingHttpResponse(keep_routing(lines), content_type=exports.FORMATS[format])
+    response["Content-Disposition"] = f'attachment; filename="{exports.export_filename(kind, format)}"'
+    return response
 
-        if already_approved:
-            messages.error(request, "Room already approved for another booking.")
-        else:
-            booking.status = "Approved"
-            booking.save()
-            messages.success(request, "Booking approved successfully.")
+
+@login_required
+@admin_required
+@use_primary()
+def approve_booking(request, booking_id):
+    # Locked and guarded by a constraint, so two admins cannot both
+    # approve a booking for the same room (see booking_service.py)
+    try:
+        booking_service.approve_booking(booking_id)
+    except Booking.DoesNotExist:
+        raise Http404("No booking found.")
+    except booking_service.BookingRefused as refused:
+        messages.error(request, refused.message)
+    else:
+        messages.success(request, "Booking approved successfully.")
 
     return redirect("manage_bookings")
 
 
 @login_required
 @admin_required
+@use_primary()
 def reject_booking(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
-    booking.status = "Rejected"
-    booking.save()
+    try:
+        booking_service.reject_booking(booking_id)
+    except Booking.DoesNotExist:
+        raise Http404("No booking found.")
     messages.success(request, "Booking rejected successfully.")
     return redirect("manage_bookings")
 
 
+@login_required
+@admin_required
+@require_POST
+def bulk_booking_action(request):
+    """
+    Approve or reject all ticked bookings at once.
+    Answers with JSON if the client asks for it, otherwise with a message.
+    """
+    action = request.POST.get("action")
+    booking_ids = [int(value) for value in request.POST.getlist("booking_ids") if value.isdigit()]
+    wants_json = "application/json" in request.headers.get("Accept", "")
+
+    if action not in ("approve", "reject") or not booking_ids:
+        if wants_json:
+            return JsonResponse({"error": "Choose bookings and an action."}, status=400)
+        messages.error(request, "Choose bookings and an action.")
+        return redirect("manage_bookings")
+
+    try:
+        results = booking_service.decide_bookings(booking_ids, action)
+    except booking_service.BookingRefused as refused:
+        if wants_json:
+            return JsonResponse({"error": refused.message}, status=409)
+        messages.error(request, refused.message)
+        return redirect("manage_bookings")
+
+    if wants_json:
+        return JsonResponse({
+            "results": [
+                {"id": booking_id, "result": result}
+                for booking_id, result in sorted(results.items())
+            ]
+        })
+
+    # e.g. "2 approved, 3 auto-rejected, 1 room already booked"
+    counts = Counter(results.values())
+    summary = ", ".join(f"{count} {result}" for result, count in counts.items())
+    changed = counts[booking_service.APPROVED] + counts[booking_service.REJECTED]
+    notify = messages.success if changed else messages.warning
+    notify(request, f"Bookings updated: {summary}.")
+    return redirect("manage_bookings")
+
+
 @login_required
 @admin_required
 def add_room(request):
     if request.method == "POST":
-        room = Room.objects.create(
-            owner=request.user,
-            title=request.POST["title"],
-            description=request.POST["description"],
-            price=request.POST["price"],
-            location=request.POST["location"],
-            room_type=request.POST["room_type"],
-            owner_name=request.POST["owner_name"],
-            contact_number=request.POST["contact_number"],
-            available_from=request.POST["available_from"],
-        )
-
-        # Multiple image upload
-        for img in request.FILES.getlist("images"):
-            RoomImage.objects.create(room=room, image=img)
-
-        messages.success(request, "Room added successfully.")
+        with transaction.atomic():
+            room = Room.objects.create(
+                owner=request.user,
+                title=request.POST["title"],
+                description=request.POST["description"],
+                price=request.POST["price"],
+                location=request.POST["location"],
+                room_type=request.POST["room_type"],
+                owner_name=request.POST["owner_name"],
+                contact_number=request.POST["contact_number"],
+                available_from=request.POST["available_from"],
+            )
+
+            # Photos are resized and uploaded by a background job (see tasks.py)
+            has_photos = tasks.queue_room_images(room, request.FILES.getlist("images"))
+
+        if has_photos:
+            messages.success(request, "Room added successfully. Photos will appear in a moment.")
+        else:
+            messages.success(request, "Room added successfully.")
         return redirect("manage_rooms")
 
     return render(request, "room_admin/add_room.html")
@@ -154,24 +231,24 @@ def edit_room(request, id):
     room = get_object_or_404(Room, id=id)
 
     if request.method == "POST":
-        room.title = request.POST["title"]
-        room.description = request.POST["description"]
-        room.price = request.POST["price"]
-        room.location = request.POST["location"]
-        room.room_type = request.POST["room_type"]
-        room.owner_name = request.POST["owner_name"]
-        room.contact_number = request.POST["contact_number"]
-        room.available_from = request.POST["available_from"]
-        room.save()
-
-        # Delete selected images
-        delete_images = request.POST.getlist("delete_images")
-        if delete_images:
-            room.images.filter(id__in=delete_images).delete()
-
-        # Add new images
-        for img in request.FILES.getlist("images"):
-            RoomImage.objects.create(room=room, image=img)
+        with transaction.atomic():
+            room.title = request.POST["title"]
+            room.description = request.POST["description"]
+            room.price = request.POST["price"]
+            room.location = request.POST["location"]
+            room.room_type = request.POST["room_type"]
+            room.owner_name = request.POST["owner_name"]
+            room.contact_number = request.POST["contact_number"]
+            room.available_from = request.POST["available_from"]
+            room.save()
+
+            # Delete selected images
+            delete_images = request.POST.getlist("delete_images")
+            if delete_images:
+                room.images.filter(id__in=delete_images).delete()
+
+            # New photos are added by a background job
+            tasks.queue_room_images(room, request.FILES.getlist("images"))
 
         messages.success(request, "Room updated successfully.")
         return redirect("manage_rooms")
@@ -181,6 +258,7 @@ def edit_room(request, id):
 
 @login_required
 @admin_required
+@use_primary()
 def delete_room(request, id):
     room = get_object_or_404(Room, id=id)
     room.delete()
@@ -198,52 +276,66 @@ def customer_dashboard(request):
     return render(request, "customer/dashboard.html")
 
 
+# Order matters: a 304 is answered before the page cache is looked at
+@conditional_page(room_list_freshness)
+@cache_anonymous_page(room_list_key)
 def room_list(request):
-    rooms = Room.objects.all()
-
-    # Filtering
-    location = request.GET.get("location")
-    room_type = request.GET.get("room_type")
-
-    if location:
-        rooms = rooms.filter(location__icontains=location)
-
-    if room_type:
-        rooms = rooms.filter(room_type=room_type)
+    filters = parse_room_filters(request.GET)
+    sort = parse_sort(request.GET)
+    query = request.GET.get("q", "").strip()
+
+    # Owner and cover image are loaded up front (no query per card)
+    rooms = Room.objects.for_listing().filter_by(**filters)
+    ordering = sort_ordering(sort)
+
+    # Text search over title and description: best matches first
+    if query:
+        rooms = search_rooms(rooms, query)
+        ordering = ("-search_rank",) + ordering
+
+    # One page at a time (cursor = position of the last card)
+    paginator = KeysetPaginator(rooms, ordering=ordering, per_page=ROOMS_PER_PAGE)
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid page cursor.")
 
     return render(request, "customer/room_list.html", {
-        "rooms": rooms,
-        "location": location,
-        "room_type": room_type,
+        "rooms": page.object_list,
+        "page": page,
+        "filters": filters,
+        "location": filters["location"],
+        "room_type": filters["room_type"],
+        "query": query,
+        "sort": sort,
+        "sort_options": SORT_OPTIONS,
+        "location_choices": Room.LOCATION_CHOICES,
+        "room_type_choices": Room.ROOM_TYPE,
     })
 
 
+@conditional_page(room_detail_freshness)
+@cache_anonymous_page(room_detail_key)
 def room_detail(request, id):
     room = get_object_or_404(Room, id=id)
-    return render(request, "customer/room_detail.html", {"room": room})
+    is_booked = room.bookings.filter(status="Approved").exists()
+    return render(request, "customer/room_detail.html", {"room": room, "is_booked": is_booked})
 
 
 @login_required
 @customer_required
+@use_primary()
 def book_room(request, id):
-    room = get_object_or_404(Room, id=id)
-
-    # Cannot book own room
-    if room.owner == request.user:
-        messages.error(request, "You cannot book your own room.")
-        return redirect("room_detail", id=id)
-
-    # Already approved booking
-    if Booking.objects.filter(room=room, status="Approved").exists():
-        messages.error(request, "This room is already booked.")
-        return redirect("room_detail", id=id)
-
-    # Already requested
-    if Booking.objects.filter(room=room, user=request.user).exists():
-        messages.warning(request, "You already requested this room.")
+    # All checks in one query; unique (room, user) catches double clicks
+    try:
+        booking_service.request_booking(id, request.user)
+    except Room.DoesNotExist:
+        raise Http404("No room found.")
+    except booking_service.BookingRefused as refused:
+        notify = messages.warning if refused.level == "warning" else messages.error
+        notify(request, refused.message)
         return redirect("room_detail", id=id)
 
-    Booking.objects.create(room=room, user=request.user, status="Pending")
     messages.success(request, "Booking request sent successfully.")
     return redirect("my_bookings")
 
@@ -251,12 +343,14 @@ def book_room(request, id):
 @login_required
 @customer_required
 def my_bookings(request):
-    bookings = Booking.objects.filter(user=request.user)
+    # The room title is shown in every row: load it in the same query
+    bookings = Booking.objects.filter(user=request.user).select_related("room")
     return render(request, "customer/my_bookings.html", {"bookings": bookings})
 
 
 @login_required
 @customer_required
+@use_primary()
 def cancel_booking(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id, user=request.user)
 